@@ -0,0 +1,307 @@
+"""
+Benchmark suite for PA1 raster primitives. Lines, triangles (flat, smooth, textured, anti-aliased) and Buff operations
+are timed at several canvas sizes and n_steps values on a HeadlessSketch, so no display is needed.
+
+For every benchmark the best time of several repeats, the drawn pixels per second and the peak memory allocated by
+one run (traced by tracemalloc in a separate, untimed run) are reported. Drawn pixels of raster benchmarks are the
+fragments the rasterizer writes, see Buff.fragmentCount, so overdrawn pixels count every time they are drawn.
+Results can be saved as a JSON baseline, and a later run compared against it fails with a non-zero exit code when any
+benchmark becomes slower, or allocates more peak bytes or blocks, than the tolerance.
+
+Usage example, save a baseline and then check a change against it with 20% tolerance:
+
+    python Benchmark.py --save baseline.json
+    python Benchmark.py --compare baseline.json --tolerance 0.2
+
+Add --reference to also time the per-primitive drawLine and drawTriangle instead of the batch rasterizer.
+"""
+
+import os
+import sys
+import json
+import math
+import time
+import argparse
+import platform
+import tracemalloc
+
+import numpy as np
+
+from Buff import Buff
+from ColorType import ColorType
+from SketchBase import SketchBase
+from VertexBatch import VertexBatch
+from Headless import HeadlessSketch
+
+DEFAULT_SIZES = [(250, 250), (500, 500), (1000, 1000)]
+DEFAULT_STEPS = [12, 48, 192]
+
+
+def timeIt(func, repeat=5):
+    """
+    Best wall time of several runs of func, the minimum is the least disturbed by other processes
+
+    :param func: the function to time, takes no argument
+    :type func: callable
+    :param repeat: number of runs
+    :type repeat: int
+    :return: seconds
+    :rtype: float
+    """
+    best = math.inf
+    for _ in range(repeat):
+        t1 = time.perf_counter()
+        func()
+        best = min(best, time.perf_counter() - t1)
+    return best
+
+
+def measureAllocations(func):
+    """
+    Peak memory allocated by one run of func and the number of memory blocks still alive after it
+
+    :param func: the function to measure, takes no argument
+    :type func: callable
+    :return: (peak bytes, blocks)
+    :rtype: tuple[int]
+    """
+    tracemalloc.start()
+    try:
+        before = tracemalloc.take_snapshot()
+        func()
+        after = tracemalloc.take_snapshot()
+        _, peak = tracemalloc.get_traced_memory()
+    finally:
+        tracemalloc.stop()
+    blocks = sum(stat.count_diff for stat in after.compare_to(before, "filename"))
+    return peak, blocks
+
+
+def texturedFan(sketch, n_steps):
+    """
+    Triangle fan around the canvas center with texture coordinates, like testCaseTriTexture02
+
+    :rtype: VertexBatch
+    """
+    n_steps = int(n_steps / 2)
+    radius = int(min(sketch.buff.width, sketch.buff.height) * 0.45)
+    cx = int(sketch.buff.width / 2)
+    cy = int(sketch.buff.height / 2)
+    theta = 2 * math.pi * np.arange(1, n_steps + 1) / n_steps
+    rim = np.stack([cx + np.sin(theta) * radius, cy + np.cos(theta) * radius], axis=1).astype(np.int64)
+    coords = np.stack([np.broadcast_to([cx, cy], rim.shape), rim, np.roll(rim, -1, axis=0)], axis=1)
+    uvs = (coords - [cx - radius, cy - radius]) / (2 * radius)
+    return VertexBatch(coords.reshape(-1, 2), np.ones((coords.size // 2, 3)), uvs.reshape(-1, 2))
+
+
+def wavyPolygon(sketch, n_steps, edgesPerStep=100):
+    """
+    Concave polygon around the canvas center with n_steps * edgesPerStep edges, its rim waves in and out
+
+    :rtype: VertexBatch
+    """
+    n = n_steps * edgesPerStep
+    theta = 2 * math.pi * np.arange(n) / n
+    radius = min(sketch.buff.width, sketch.buff.height) * (0.35 + 0.1 * np.sin(theta * n_steps))
+    coords = np.stack([sketch.buff.width / 2 + np.sin(theta) * radius,
+                       sketch.buff.height / 2 + np.cos(theta) * radius], axis=1).astype(np.int64)
+    colors = np.stack([np.abs(np.sin(theta)), np.abs(np.cos(theta)), np.full(n, 0.5)], axis=1)
+    return VertexBatch(coords, colors)
+
+
+def rasterBenchmarks(sketch, reference=False):
+    """
+    Raster benchmarks as (name, script, doAA), every script accepts n_steps and draws on sketch.buff
+
+    :param sketch: the sketch to draw on
+    :type sketch: HeadlessSketch
+    :param reference: use drawLine and drawTriangle for every primitive instead of the batch rasterizer
+    :type reference: bool
+    :rtype: list[tuple]
+    """
+    def textured(n_steps):
+        sketch.drawTriangles(sketch.buff, texturedFan(sketch, n_steps), doTexture=True)
+
+    def polygon(n_steps):
+        sketch.drawPolygon(sketch.buff, wavyPolygon(sketch, n_steps))
+
+    suffix = "Reference" if reference else ""
+    benchmarks = [("line" + suffix, sketch.testCaseLine01, False),
+                  ("lineAA" + suffix, sketch.testCaseLine02, True),
+                  ("triangleFlat" + suffix, sketch.testCaseTri01, False),
+                  ("triangleSmooth" + suffix, sketch.testCaseTri02, False),
+                  ("triangleTexture" + suffix, textured, False),
+                  ("triangleAA" + suffix, sketch.testCaseTri02, True)]
+    if not reference:
+        # polygons have no per-primitive reference implementation
+        benchmarks.append(("polygon", polygon, False))
+    return benchmarks
+
+
+def buffBenchmarks(width, height):
+    """
+    Buff operation benchmarks as (name, function)
+
+    :rtype: list[tuple]
+    """
+    buff = Buff(width, height)
+    buff.buff[::7, ::5] = 200
+    mask = np.zeros((height, width), dtype=bool)
+    mask[::3, ::2] = True
+    color = ColorType(0.2, 0.4, 0.6)
+    return [("buffClear", buff.clear),
+            ("buffCopy", buff.copy),
+            ("buffResize", lambda: buff.copy().resize(width // 2 + 1, height // 2 + 1)),
+            ("buffGetBytes", lambda: bytes(buff.getBytes())),
+            ("buffFillRect", lambda: buff.copy().fillRect((0, 0, width, height), color)),
+            ("buffFillMask", lambda: buff.copy().fillMask(mask, color)),
+            # every pixel matches with the largest tolerance, so the whole buff is flooded
+            ("buffFloodFill", lambda: buff.copy().floodFill(0, 0, color, tolerance=255))]
+
+
+def runBenchmarks(sizes=None, stepsList=None, repeat=5, reference=False, log=print):
+    """
+    Run all benchmarks
+
+    :param sizes: canvas sizes as (width, height)
+    :type sizes: list[tuple[int]]
+    :param stepsList: n_steps values for raster benchmarks
+    :type stepsList: list[int]
+    :param repeat: timed runs of every benchmark
+    :type repeat: int
+    :param reference: also time per-primitive drawLine and drawTriangle
+    :type reference: bool
+    :param log: called with one line of text for every finished benchmark, None for silence
+    :type log: callable
+    :return: benchmark key to {"seconds", "pixels", "pixelsPerSecond", "peakBytes", "blocks"}
+    :rtype: dict
+    """
+    sizes = DEFAULT_SIZES if sizes is None else sizes
+    stepsList = DEFAULT_STEPS if stepsList is None else stepsList
+    results = {}
+
+    def record(key, func, pixels):
+        seconds = timeIt(func, repeat)
+        peak, blocks = measureAllocations(func)
+        results[key] = {"seconds": seconds, "pixels": int(pixels), "pixelsPerSecond": pixels / max(seconds, 1e-12),
+                        "peakBytes": peak, "blocks": blocks}
+        if log is not None:
+            log("{:<44} {:>10.3f} ms {:>10.2f} Mpx/s {:>10.1f} KiB {:>8d} blocks".format(
+                key, seconds * 1000, pixels / max(seconds, 1e-12) / 1e6, peak / 1024, blocks))
+
+    for width, height in sizes:
+        sketch = HeadlessSketch(width, height)
+        for useBatch in ([True, False] if reference else [True]):
+            sketch.useBatchRaster = useBatch
+            for name, script, doAA in rasterBenchmarks(sketch, not useBatch):
+                sketch.doAA = doAA
+                for n_steps in stepsList:
+                    key = "{}/{}x{}/n{}".format(name, width, height, n_steps)
+                    # fragments written by one run, counted on a render before timing
+                    try:
+                        before = sketch.buff.fragmentCount
+                        pixels = sketch.renderScript(script, n_steps).fragmentCount - before
+                    except ZeroDivisionError:
+                        # drawLine and drawTriangle cannot draw zero length segments
+                        if log is not None:
+                            log("{:<44} skipped, primitive not drawable".format(key))
+                        continue
+                    record(key, lambda: sketch.renderScript(script, n_steps), pixels)
+        for name, func in buffBenchmarks(width, height):
+            record("{}/{}x{}".format(name, width, height), func, width * height)
+    return results
+
+
+# allocation changes below these are noise of the interpreter, not regressions
+MIN_BYTES_CHANGE = 4096
+MIN_BLOCKS_CHANGE = 16
+
+
+def compareResults(results, baseline, tolerance=0.2, allocTolerance=None):
+    """
+    Find benchmarks which are slower than baseline, or allocate more peak bytes or blocks than baseline, by more than
+    tolerance. Allocations must also grow by at least MIN_BYTES_CHANGE or MIN_BLOCKS_CHANGE to count.
+    Benchmarks missing on either side are not compared, and neither are metrics missing in baseline.
+
+    :param results: results of the current run
+    :type results: dict
+    :param baseline: saved results
+    :type baseline: dict
+    :param tolerance: allowed relative slow down, 0.2 means 20% slower is still accepted
+    :type tolerance: float
+    :param allocTolerance: allowed relative growth of peakBytes and blocks, use tolerance if not given
+    :type allocTolerance: float
+    :return: list of (key, metric, baseline value, current value), metric is "seconds", "peakBytes" or "blocks"
+    :rtype: list[tuple]
+    """
+    allocTolerance = tolerance if allocTolerance is None else allocTolerance
+    checks = [("seconds", tolerance, 0), ("peakBytes", allocTolerance, MIN_BYTES_CHANGE),
+              ("blocks", allocTolerance, MIN_BLOCKS_CHANGE)]
+    regressions = []
+    for key, result in results.items():
+        if key not in baseline:
+            continue
+        for metric, allowed, minChange in checks:
+            if metric not in baseline[key]:
+                continue
+            before, after = baseline[key][metric], result[metric]
+            if after > max(before, 0) * (1 + allowed) and after - before > minChange:
+                regressions.append((key, metric, before, after))
+    return regressions
+
+
+def saveResults(results, path):
+    """
+    Save results with the machine description to a JSON file
+
+    :rtype: None
+    """
+    with open(path, "w") as f:
+        json.dump({"machine": {"python": platform.python_version(), "numpy": np.__version__,
+                               "processor": platform.processor(), "cpus": os.cpu_count()},
+                   "results": results}, f, indent=2, sort_keys=True)
+
+
+def loadResults(path):
+    """
+    Load results saved by saveResults
+
+    :rtype: dict
+    """
+    with open(path) as f:
+        return json.load(f)["results"]
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Benchmark PA1 raster primitives")
+    parser.add_argument("--sizes", type=int, nargs="+", default=None, metavar="SIZE",
+                        help="square canvas sizes, e.g. 250 500 1000")
+    parser.add_argument("--steps", type=int, nargs="+", default=None)
+    parser.add_argument("--repeat", type=int, default=5)
+    parser.add_argument("--reference", action="store_true", help="also time drawLine and drawTriangle")
+    parser.add_argument("--texture", default=os.path.join(os.path.dirname(os.path.abspath(__file__)), "pattern.jpg"))
+    parser.add_argument("--save", default=None, help="save results as JSON baseline to this path")
+    parser.add_argument("--compare", default=None, help="compare with JSON baseline at this path")
+    parser.add_argument("--tolerance", type=float, default=0.2)
+    parser.add_argument("--alloc-tolerance", type=float, default=None,
+                        help="allowed growth of peak bytes and blocks, same as --tolerance if not given")
+    args = parser.parse_args()
+
+    SketchBase.texture_file_path = args.texture
+    results = runBenchmarks(None if args.sizes is None else [(s, s) for s in args.sizes], args.steps, args.repeat,
+                            args.reference)
+    if args.save is not None:
+        saveResults(results, args.save)
+        print("Saved: ", args.save)
+    if args.compare is not None:
+        regressions = compareResults(results, loadResults(args.compare), args.tolerance, args.alloc_tolerance)
+        for key, metric, before, after in regressions:
+            if metric == "seconds":
+                print("Regression: {} {:.3f} ms -> {:.3f} ms".format(key, before * 1000, after * 1000))
+            elif metric == "peakBytes":
+                print("Regression: {} {:.1f} KiB -> {:.1f} KiB peak".format(key, before / 1024, after / 1024))
+            else:
+                print("Regression: {} {} -> {} blocks".format(key, before, after))
+        if len(regressions) > 0:
+            sys.exit(1)
+        print("No regression beyond {:.0%}".format(args.tolerance))
@@ -1,7 +1,18 @@
 """
 Defines Buff class to store canvas data. For a buff with size Width x Height, each entry will store a pixel color.
 Each pixel color will be represented in (R, G, B) format, where R, G, B are unsigned char in range [0, 255].
-This Buff class has a method to export all data to byte string to feed into graphic card.
+Pixels are stored row by row in an array of shape (height, width, 3), which is the memory order OpenGL expects, so
+getBytes can feed the data into graphic card without any copy. buff is a (width, height, 3) view of the same memory,
+so buff[x, y] still addresses the pixel at (x, y).
+Region operations fill rectangles, boolean masks and flood filled regions with slice assignments instead of setting
+pixels one by one.
+Buff also tracks dirty rectangles, the regions changed since they were last taken, so that the display only needs to
+upload changed regions to graphic card. Scattered pixels are recorded as one rectangle per band of dirtyBandRows rows,
+and rectangles are only merged inside a band, so a long diagonal line doesn't mark its whole bounding box.
+An optional float32 depth plane of shape (height, width) can be enabled for depth tested drawing, smaller depth is
+nearer. It is cleared to DEPTH_FAR together with the colors.
+Layers (see Layer.py) can be attached above the base colors. They are composited only by flatten, which writes the
+visible image into a separate array, so the base colors are never changed by layers.
 
 First version Created on 09/27/2018
 
@@ -9,6 +20,10 @@ First version Created on 09/27/2018
 :version: 2021.2.1
 """
 
+import bisect
+import threading
+from contextlib import contextmanager
+
 import numpy as np
 from typing import Union
 
@@ -20,12 +35,23 @@ class Buff:
     """
     Buff class to store canvas color information
     """
-    buff = None
+    buff = None  # numpy.ndarray<uint8>(width, height, 3): view of data, indexed by [x, y]
+    data = None  # numpy.ndarray<uint8>(height, width, 3): pixel storage, row-major
     buffPointArray = None
     size = None
     width = None
     height = None
     background_color = None
+    dirtyRects = None  # list<tuple<int>>: changed regions as (x_min, y_min, x_max, y_max), max values are exclusive
+    maxDirtyRects = 128  # if more regions are changed, they are merged band by band, then into one rectangle
+    dirtyBandRows = 32  # rows of a dirty band, dirty rectangles are only merged with ones in the same band
+    fragmentCount = 0  # int: pixels written or blended by point, line and triangle drawing, overdraw counts every time
+    __fillRow = None  # tuple: last fill color and a row of pixels in it, reused by fills in the same color
+    depth = None  # numpy.ndarray<float32>(height, width): depth plane, None if depth is not enabled
+    DEPTH_FAR = np.float32(np.inf)
+    alpha = None  # numpy.ndarray<float32>(height, width): coverage in [0, 1], only layers have it, None for opaque buff
+    layers = None  # list<Layer>: layers above the base colors, composited by flatten in order
+    composite = None  # numpy.ndarray<uint8>(height, width, 3): flattened image, None if there is no layer
 
     def __init__(self, width=0, height=0, color=None):
         """
@@ -56,7 +82,11 @@ class Buff:
         self.width = width
         self.height = height
         self.size = (width, height)
-        self.buff = np.zeros((self.width, self.height, 3), dtype=np.uint8)
+        self._setData(np.zeros((self.height, self.width, 3), dtype=np.uint8))
+        self.dirtyRects = []
+        self.layers = []
+        # tiles may be drawn by several threads at the same time
+        self.__dirtyLock = threading.Lock()
         if isinstance(color, ColorType):
             self.background_color = ColorType(*color.getRGB())
             self.clear()
@@ -67,39 +97,295 @@ class Buff:
     def __repr__(self):
         return str(self.buff)
 
-    def clear(self):
+    def clear(self, rect=None):
+        """
+        Clear buff to background color. Attached layers are not cleared, call clear of every layer for that
+
+        :param rect: only clear this region (x_min, y_min, x_max, y_max), max values are exclusive. Clear all if not given
+        :type rect: tuple[int]
+        :rtype: None
+        """
+        if rect is None:
+            self.__fillRows(0, 0, self.width, self.height, self.background_color.getRGB_8bit())
+            if self.alpha is not None:
+                self.alpha[:, :] = 0
+            self.clearDepth()
+            self.markAllDirty()
+            return
+        x_min, y_min, x_max, y_max = (max(0, int(rect[0])), max(0, int(rect[1])), int(rect[2]), int(rect[3]))
+        self.__fillRows(x_min, y_min, min(x_max, self.width), min(y_max, self.height),
+                        self.background_color.getRGB_8bit())
+        if self.alpha is not None:
+            self.alpha[y_min:y_max, x_min:x_max] = 0
+        self.clearDepth(rect)
+        self.markDirty(x_min, y_min, x_max, y_max)
+
+    def __fillRows(self, x_min, y_min, x_max, y_max, rgb):
+        """
+        Set a region to one color. Rows are assigned from a tiled row of pixels, which is much faster than
+        broadcasting a single pixel along the 3 channels
+        """
+        if x_min >= x_max or y_min >= y_max:
+            return
+        if self.data.flags.c_contiguous:
+            rows = self.data.reshape(self.height, self.width * 3)
+            rows[y_min:y_max, 3 * x_min:3 * x_max] = self.__tiledRow(rgb)[:3 * (x_max - x_min)]
+        else:
+            self.data[y_min:y_max, x_min:x_max] = rgb
+
+    def __tiledRow(self, rgb):
+        """
+        A full row of pixels in color rgb, kept for the next fill in the same color
+        """
+        if self.__fillRow is None or self.__fillRow[0] != rgb or self.__fillRow[1].size < self.width * 3:
+            self.__fillRow = (rgb, np.tile(np.array(rgb, dtype=np.uint8), self.width))
+        return self.__fillRow[1]
+
+    def enableDepth(self):
         """
-        Clear buff to background color
+        Create the depth plane, all pixels start at DEPTH_FAR. Does nothing if it already exists
 
         :rtype: None
         """
-        r, g, b = self.background_color.getRGB_8bit()
-        self.buff[:, :, 0] = r
-        self.buff[:, :, 1] = g
-        self.buff[:, :, 2] = b
+        if self.depth is None:
+            self.depth = np.full((self.height, self.width), self.DEPTH_FAR, dtype=np.float32)
+
+    def disableDepth(self):
+        """
+        Drop the depth plane
+
+        :rtype: None
+        """
+        self.depth = None
+
+    def clearDepth(self, rect=None):
+        """
+        Reset depth plane to DEPTH_FAR. Does nothing if depth is not enabled
+
+        :param rect: only clear this region (x_min, y_min, x_max, y_max), max values are exclusive. Clear all if not given
+        :type rect: tuple[int]
+        :rtype: None
+        """
+        if self.depth is None:
+            return
+        if rect is None:
+            self.depth[:, :] = self.DEPTH_FAR
+        else:
+            self.depth[max(0, int(rect[1])):int(rect[3]), max(0, int(rect[0])):int(rect[2])] = self.DEPTH_FAR
+
+    @contextmanager
+    def writing(self):
+        """
+        Group a sequence of writes into one frame, e.g. with buff.writing(): draw... .
+        A plain buff has no other reader, so nothing is done. SharedBuff publishes the frame when the group ends.
+        """
+        yield self
+
+    def markDirty(self, x_min: int, y_min: int, x_max: int, y_max: int, fragments: int = 0) -> None:
+        """
+        Record a changed region of buff. This must be called by code which writes buff.buff directly.
+        A region which touches the last recorded one is merged into it, so pixels drawn one after another along a
+        primitive don't create one rectangle each.
+
+        :param x_min: left bound of the region
+        :type x_min: int
+        :param y_min: bottom bound of the region
+        :type y_min: int
+        :param x_max: right bound of the region, exclusive
+        :type x_max: int
+        :param y_max: top bound of the region, exclusive
+        :type y_max: int
+        :param fragments: number of fragments the rasterizer wrote into the region, added to fragmentCount
+        :type fragments: int
+        :rtype: None
+        """
+        x_min = max(0, int(x_min))
+        y_min = max(0, int(y_min))
+        x_max = min(self.width, int(x_max))
+        y_max = min(self.height, int(y_max))
+        if x_min >= x_max or y_min >= y_max:
+            return
+        with self.__dirtyLock:
+            self.fragmentCount += fragments
+            self.__addDirtyRect(x_min, y_min, x_max, y_max)
+
+    def markDirtyPixels(self, xs, ys, fragments: int = 0) -> None:
+        """
+        Record changed pixels scattered over buff, one rectangle for every band of dirtyBandRows rows they touch, which
+        spans the changed columns of the band. So the uploaded area follows the pixels, not their bounding box.
+
+        :param xs: x coordinates of changed pixels, all inside buff
+        :type xs: numpy.ndarray[int]
+        :param ys: y coordinates of changed pixels, all inside buff
+        :type ys: numpy.ndarray[int]
+        :param fragments: number of fragments the rasterizer wrote, added to fragmentCount
+        :type fragments: int
+        :rtype: None
+        """
+        if xs.size == 0:
+            return
+        band = ys // self.dirtyBandRows
+        bandCount = (self.height - 1) // self.dirtyBandRows + 1
+        lo = np.full(bandCount, self.width, dtype=np.int64)
+        hi = np.full(bandCount, -1, dtype=np.int64)
+        np.minimum.at(lo, band, xs)
+        np.maximum.at(hi, band, xs)
+        y_min, y_max = int(ys.min()), int(ys.max()) + 1
+        for b in np.flatnonzero(hi >= 0).tolist():
+            self.markDirty(lo[b], max(b * self.dirtyBandRows, y_min), hi[b] + 1,
+                           min((b + 1) * self.dirtyBandRows, y_max), fragments)
+            fragments = 0
+
+    def __band(self, y_min, y_max):
+        return y_min // self.dirtyBandRows, (y_max - 1) // self.dirtyBandRows
+
+    def __addDirtyRect(self, x_min, y_min, x_max, y_max):
+        if len(self.dirtyRects) > 0:
+            lx_min, ly_min, lx_max, ly_max = self.dirtyRects[-1]
+            if lx_min <= x_min and x_max <= lx_max and ly_min <= y_min and y_max <= ly_max:
+                return
+            if x_min <= lx_max and lx_min <= x_max and y_min <= ly_max and ly_min <= y_max and \
+                    self.__band(y_min, y_max) == self.__band(ly_min, ly_max):
+                self.dirtyRects[-1] = (min(x_min, lx_min), min(y_min, ly_min), max(x_max, lx_max), max(y_max, ly_max))
+                return
+        self.dirtyRects.append((x_min, y_min, x_max, y_max))
+        if len(self.dirtyRects) > self.maxDirtyRects:
+            # merge rectangles of the same bands first, only fall back to one bounding rectangle if still too many
+            merged = {}
+            for rect in self.dirtyRects:
+                key = self.__band(rect[1], rect[3])
+                last = merged.get(key, rect)
+                merged[key] = (min(rect[0], last[0]), min(rect[1], last[1]), max(rect[2], last[2]),
+                               max(rect[3], last[3]))
+            self.dirtyRects = list(merged.values())
+            if len(self.dirtyRects) > self.maxDirtyRects:
+                rects = np.array(self.dirtyRects)
+                self.dirtyRects = [(*rects[:, :2].min(axis=0).tolist(), *rects[:, 2:].max(axis=0).tolist())]
+
+    def markAllDirty(self) -> None:
+        """
+        Record that the whole buff is changed
+        """
+        with self.__dirtyLock:
+            self.dirtyRects = [(0, 0, self.width, self.height)]
+
+    def takeDirtyRects(self):
+        """
+        Get all regions changed since last call and reset the record
+
+        :rtype: list[tuple[int]]
+        """
+        with self.__dirtyLock:
+            rects = self.dirtyRects
+            self.dirtyRects = []
+        return rects
 
     def resize(self, width: int, height: int):
         """
-        Resize current buff to new size, data in buff will be kept as much as possible
+        Resize current buff to new size, data in buff will be kept as much as possible.
+        Kept pixels are not marked dirty, only the newly exposed regions are, so a display which still holds the kept
+        pixels only needs to update the exposed regions.
 
         :param width: the buff width
         :type width: int
         :param height: the buff height
         :type height: int
+        :return: newly exposed regions (x_min, y_min, x_max, y_max), max values are exclusive. They are cleared to black
+        :rtype: list[tuple[int]]
         """
+        if (width, height) == (self.width, self.height):
+            return []
         w_min = min(self.width, width)
         h_min = min(self.height, height)
 
         # keep as much common pixels as possible, clip pixels outside canvas
-        tempbuff = self.buff
-        newbuff = np.zeros((width, height, 3), dtype=np.uint8)
-        newbuff[:w_min, :h_min, :] = tempbuff[:w_min, :h_min, :]
-
-        self.buff = newbuff
+        newdata = np.zeros((height, width, 3), dtype=np.uint8)
+        newdata[:h_min, :w_min, :] = self.data[:h_min, :w_min, :]
+
+        self._setData(newdata)
+        if self.depth is not None:
+            newdepth = np.full((height, width), self.DEPTH_FAR, dtype=np.float32)
+            newdepth[:h_min, :w_min] = self.depth[:h_min, :w_min]
+            self.depth = newdepth
+        if self.alpha is not None:
+            newalpha = np.zeros((height, width), dtype=np.float32)
+            newalpha[:h_min, :w_min] = self.alpha[:h_min, :w_min]
+            self.alpha = newalpha
+        for layer in self.layers:
+            layer.resize(width, height)
+        self.composite = None
         self.size = (width, height)
         self.width = width
         self.height = height
 
+        # the region right of the kept pixels, and the region above them
+        exposed = [rect for rect in [(w_min, 0, width, height), (0, h_min, w_min, height)]
+                   if rect[0] < rect[2] and rect[1] < rect[3]]
+        with self.__dirtyLock:
+            rects, self.dirtyRects = self.dirtyRects, []
+            for x_min, y_min, x_max, y_max in rects + exposed:
+                x_max, y_max = min(x_max, width), min(y_max, height)
+                if x_min < x_max and y_min < y_max:
+                    self.__addDirtyRect(x_min, y_min, x_max, y_max)
+        return exposed
+
+    def addLayer(self, layer):
+        """
+        Attach a layer above the base colors and the layers attached before it
+
+        :param layer: the layer to attach, with the same size as buff
+        :type layer: Layer
+        :return: layer
+        :rtype: Layer
+        """
+        if layer.size != self.size:
+            raise TypeError("addLayer only accept layer with the same size")
+        if layer.parent is not None:
+            raise ValueError("The layer is already attached to a buff")
+        layer.parent = self
+        self.layers.append(layer)
+        self.markAllDirty()
+        return layer
+
+    def removeLayer(self, layer):
+        """
+        Detach a layer from buff
+
+        :type layer: Layer
+        :rtype: None
+        """
+        self.layers.remove(layer)
+        layer.parent = None
+        if len(self.layers) == 0:
+            self.composite = None
+        self.markAllDirty()
+
+    def flatten(self, rects=None):
+        """
+        Composite the base colors and all visible layers into the image which is displayed. Only the given regions are
+        composited, the rest of the flattened image is kept from the last call.
+        Without any layer, this is the base colors array itself and nothing is computed.
+
+        :param rects: regions to composite as (x_min, y_min, x_max, y_max), max values are exclusive. All if not given
+        :type rects: list[tuple[int]]
+        :return: the flattened image with shape (height, width, 3)
+        :rtype: numpy.ndarray[uint8]
+        """
+        if len(self.layers) == 0:
+            return self.data
+        if self.composite is None or self.composite.shape != self.data.shape:
+            self.composite = np.empty_like(self.data)
+            rects = None
+        if rects is None:
+            rects = [(0, 0, self.width, self.height)]
+        for rect in rects:
+            x_min, y_min, x_max, y_max = rect
+            colors = self.data[y_min:y_max, x_min:x_max].astype(np.float32)
+            for layer in self.layers:
+                layer.compositeOnto(colors, rect)
+            self.composite[y_min:y_max, x_min:x_max] = np.clip(np.round(colors), 0, 255).astype(np.uint8)
+        return self.composite
+
     def setBackground(self, color: ColorType) -> None:
         """
         set background color for buff
@@ -144,8 +430,169 @@ class Buff:
         self.buff[x, y, 0] = r
         self.buff[x, y, 1] = g
         self.buff[x, y, 2] = b
+        self.markDirty(x, y, x + 1, y + 1, 1)
         return True
 
+    def fillRect(self, rect, color: ColorType) -> None:
+        """
+        Fill a rectangle with color, the part outside of buff is ignored
+
+        :param rect: the region as (x_min, y_min, x_max, y_max), max values are exclusive
+        :type rect: tuple[int]
+        :param color: the fill color
+        :type color: ColorType
+        :rtype: None
+        """
+        x_min, y_min = max(0, int(rect[0])), max(0, int(rect[1]))
+        x_max, y_max = min(self.width, int(rect[2])), min(self.height, int(rect[3]))
+        if x_min >= x_max or y_min >= y_max:
+            return
+        self.__fillRows(x_min, y_min, x_max, y_max, color.getRGB_8bit())
+        if self.alpha is not None:
+            self.alpha[y_min:y_max, x_min:x_max] = 1
+        self.markDirty(x_min, y_min, x_max, y_max)
+
+    def fillMask(self, mask, color: ColorType, origin=(0, 0)) -> None:
+        """
+        Fill the pixels selected by a boolean mask with color
+
+        :param mask: selected pixels, shape (rows, columns) in the same order as data, mask[j, i] selects the pixel at
+                     (origin[0] + i, origin[1] + j). The part outside of buff is ignored
+        :type mask: numpy.ndarray[bool]
+        :param color: the fill color
+        :type color: ColorType
+        :param origin: the buff coordinates of mask[0, 0]
+        :type origin: tuple[int]
+        :rtype: None
+        """
+        mask = np.asarray(mask, dtype=bool)
+        x0, y0 = int(origin[0]), int(origin[1])
+        x_min, y_min = max(0, x0), max(0, y0)
+        x_max, y_max = min(self.width, x0 + mask.shape[1]), min(self.height, y0 + mask.shape[0])
+        if x_min >= x_max or y_min >= y_max:
+            return
+        mask = mask[y_min - y0:y_max - y0, x_min - x0:x_max - x0]
+        rows = np.flatnonzero(mask.any(axis=1))
+        if rows.size == 0:
+            return
+        columns = np.flatnonzero(mask.any(axis=0))
+        # shrink to the bounding box of selected pixels, so a small selection in a big mask costs little
+        mask = mask[rows[0]:rows[-1] + 1, columns[0]:columns[-1] + 1]
+        x_min, y_min = x_min + int(columns[0]), y_min + int(rows[0])
+        x_max, y_max = x_min + mask.shape[1], y_min + mask.shape[0]
+        if self.data.flags.c_contiguous:
+            # select the 3 channels of every pixel on flat rows, filled from a row of pixels in color
+            row = self.__tiledRow(color.getRGB_8bit())[:3 * (x_max - x_min)]
+            np.copyto(self.data.reshape(self.height, self.width * 3)[y_min:y_max, 3 * x_min:3 * x_max],
+                      row, where=np.repeat(mask, 3, axis=1))
+        else:
+            self.data[y_min:y_max, x_min:x_max][mask] = color.getRGB_8bit()
+        if self.alpha is not None:
+            self.alpha[y_min:y_max, x_min:x_max][mask] = 1
+        self.markDirty(x_min, y_min, x_max, y_max)
+
+    def floodFill(self, x: int, y: int, color: ColorType, tolerance=0, connectivity=4) -> int:
+        """
+        Fill the connected region around (x, y) whose colors match the color at (x, y)
+
+        :param x: seed x coordinate
+        :type x: int
+        :param y: seed y coordinate
+        :type y: int
+        :param color: the fill color
+        :type color: ColorType
+        :param tolerance: a pixel matches if no channel differs from the seed color by more than tolerance
+        :type tolerance: int
+        :param connectivity: 4 for pixels sharing an edge, 8 to also connect pixels sharing a corner
+        :type connectivity: int
+        :return: number of filled pixels
+        :rtype: int
+        """
+        spans = self.__floodSpans(x, y, tolerance, connectivity)
+        if len(spans) == 0:
+            return 0
+        rgb = color.getRGB_8bit()
+        for row, start, end in spans:
+            self.__fillRows(start, row, end, row + 1, rgb)
+            if self.alpha is not None:
+                self.alpha[row, start:end] = 1
+        spans = np.array(spans)
+        self.markDirty(spans[:, 1].min(), spans[:, 0].min(), spans[:, 2].max(), spans[:, 0].max() + 1)
+        return int((spans[:, 2] - spans[:, 1]).sum())
+
+    def floodRegion(self, x: int, y: int, tolerance=0, connectivity=4):
+        """
+        The region floodFill would fill, without changing buff
+
+        :return: mask of shape (height, width) in the same order as data
+        :rtype: numpy.ndarray[bool]
+        """
+        mask = np.zeros((self.height, self.width), dtype=bool)
+        for row, start, end in self.__floodSpans(x, y, tolerance, connectivity):
+            mask[row, start:end] = True
+        return mask
+
+    def __floodSpans(self, x, y, tolerance, connectivity):
+        """
+        Scanline flood fill with a span stack. Rows are split into runs of matching pixels with NumPy, a band of rows
+        at a time when a row is first visited, and the region grows one whole run at a time.
+
+        :return: filled runs as (row, start, end), end is exclusive
+        :rtype: list[tuple[int]]
+        """
+        if connectivity not in (4, 8):
+            raise ValueError("connectivity can only be 4 or 8")
+        if x < 0 or x >= self.width or y < 0 or y >= self.height:
+            return []
+        seed = self.data[y, x].astype(np.int16)
+        # channel bounds tiled along a whole row, so rows are compared as flat arrays
+        lo = np.tile(np.clip(seed - tolerance, 0, 255).astype(np.uint8), self.width)
+        hi = np.tile(np.clip(seed + tolerance, 0, 255).astype(np.uint8), self.width)
+        band = 128
+        runs = {}
+
+        def rowRuns(row):
+            # starts and ends of the runs of matching pixels on row, rows of the same band are split together
+            if row not in runs:
+                first = row - row % band
+                pixels = self.data[first:first + band].reshape(-1, self.width * 3)
+                inside = ((pixels >= lo) & (pixels <= hi)) if tolerance > 0 else (pixels == hi)
+                inside = inside.reshape(-1, self.width, 3)
+                match = inside[:, :, 0] & inside[:, :, 1] & inside[:, :, 2]
+                # run boundaries alternate between start and end on every row
+                boundaries = np.flatnonzero(np.diff(np.pad(match.view(np.int8), ((0, 0), (1, 1))), axis=1))
+                start_rows = boundaries[0::2] // (self.width + 1)
+                start_columns = boundaries[0::2] % (self.width + 1)
+                end_columns = boundaries[1::2] % (self.width + 1)
+                bounds = np.searchsorted(start_rows, np.arange(match.shape[0] + 1)).tolist()
+                start_columns, end_columns = start_columns.tolist(), end_columns.tolist()
+                for i in range(match.shape[0]):
+                    runs[first + i] = (start_columns[bounds[i]:bounds[i + 1]], end_columns[bounds[i]:bounds[i + 1]],
+                                       set())
+            return runs[row]
+
+        starts, ends, done = rowRuns(y)
+        first = bisect.bisect_right(ends, x)
+        spans = [(y, starts[first], ends[first])]
+        done.add(first)
+        # runs on the next rows are filled if they touch [left, right)
+        reach = 0 if connectivity == 4 else 1
+        stack = [(y + 1, spans[0][1] - reach, spans[0][2] + reach), (y - 1, spans[0][1] - reach, spans[0][2] + reach)]
+        while len(stack) > 0:
+            row, left, right = stack.pop()
+            if row < 0 or row >= self.height:
+                continue
+            starts, ends, done = rowRuns(row)
+            for i in range(bisect.bisect_right(ends, left), bisect.bisect_left(starts, right)):
+                if i in done:
+                    continue
+                done.add(i)
+                start, end = starts[i], ends[i]
+                spans.append((row, start, end))
+                stack.append((row + 1, start - reach, end + reach))
+                stack.append((row - 1, start - reach, end + reach))
+        return spans
+
     def getPoint(self, x: int, y: int) -> Union[bool, Point]:
         """
         Get pixel information and return result in Point format
@@ -173,19 +620,28 @@ class Buff:
         """
         return self.buff[x, y, :]
 
-    def setStaticBuffArray(self, buffArray):
+    def setStaticBuffArray(self, buffArray, rowMajor=False):
         """
+        Load an array into buff, this is usually used for texture buff.
+        Texture lookup should go through TextureSampler, which reads the array directly. The Point array used by
+        getPointFromPointArray is no longer generated here, it will be generated on its first use.
+
         :param buffArray: an array to load into buff array
         :type buffArray: numpy.array(dtype=uint8)
+        :param rowMajor: if True, buffArray has shape (height, width, 3) like an image, otherwise (width, height, 3)
+        :type rowMajor: bool
         """
-        self._setBuffArray(buffArray)
-        self.generatePointArray()
+        if rowMajor:
+            self._setDataArray(buffArray)
+        else:
+            self._setBuffArray(buffArray)
+        self.buffPointArray = None
 
     def generatePointArray(self):
         """
-        use current buff to generate a Point array, which can speed up the point retrieval.
+        use current buff to generate a Point array.
         This point array won't update with buff. If buff updated, then this function need to be called again
-        This is only recommended to texture buff
+        This is only kept for compatibility, it creates one Point per pixel. Use TextureSampler for texture lookup.
         """
         self.buffPointArray = [[Point() for _ in range(self.height)] for _ in range(self.width)]
         for i in range(self.width):
@@ -196,7 +652,8 @@ class Buff:
     def getPointFromPointArray(self, x: int, y: int) -> Point:
         """
         Retrieve point from Point array. If Point array not prepared, then generatePointArray will be called.
-        This is used to speed up texture buff query. Remember to call generatePointArray if buff changed.
+        This is a compatibility shim for code which still queries texture by Point, TextureSampler doesn't need the
+        Point array. Remember to call generatePointArray if buff changed.
 
         :param x: Query point x coordinate
         :type x: int
@@ -208,24 +665,80 @@ class Buff:
             self.generatePointArray()
         return self.buffPointArray[x][y]
 
+    def _setData(self, data):
+        """
+        In class usage only. Replace pixel storage and rebuild the buff view on it
+        """
+        self.data = data
+        self.buff = np.transpose(data, (1, 0, 2))
+
     def _setBuffArray(self, buffarray):
         """
-        In class usage only
+        In class usage only. Load an array with shape (width, height, 3)
         """
         if not isinstance(buffarray, np.ndarray):
             raise TypeError("buffarray can be ndarray only")
         if self.width * self.height * 3 != buffarray.size:
             raise TypeError("You are copying buffarray with incorrect shape to this buff")
-        self.buff = buffarray.reshape((self.width, self.height, 3)).copy()
+        self._setData(np.ascontiguousarray(np.transpose(buffarray.reshape((self.width, self.height, 3)), (1, 0, 2)),
+                                           dtype=np.uint8))
+        self.markAllDirty()
+
+    def _setDataArray(self, dataarray):
+        """
+        In class usage only. Load an array with shape (height, width, 3)
+        """
+        if not isinstance(dataarray, np.ndarray):
+            raise TypeError("dataarray can be ndarray only")
+        if self.width * self.height * 3 != dataarray.size:
+            raise TypeError("You are copying dataarray with incorrect shape to this buff")
+        self._setData(np.array(dataarray.reshape((self.height, self.width, 3)), dtype=np.uint8))
+        self.markAllDirty()
 
     def getBytes(self):
         """
-        Turn buff to bytes, which is a copy of raw data memory content in C-order, to feed into graphic card.
+        Raw data memory content in C-order, rows from bottom to top, to feed into graphic card.
+        This is a memoryview on the buff memory instead of a copy, so it changes when buff changes.
+        Call bytes() on it if a snapshot is needed.
+        If buff has layers, this is the flattened image, call flatten on the changed regions before.
+
+        :rtype: memoryview
+        """
+        if len(self.layers) == 0:
+            return memoryview(self.data).cast("B")
+        if self.composite is None:
+            self.flatten()
+        return memoryview(self.composite).cast("B")
+
+    def getRegionBytes(self, rect):
+        """
+        Turn a region of buff to bytes in the same layout as getBytes, to update part of a texture in graphic card.
+        Rows of a region are only contiguous if it covers full width, otherwise a compact copy is made.
+        If buff has layers, the region is flattened first.
 
-        :rtype: bytes
+        :param rect: the region as (x_min, y_min, x_max, y_max), max values are exclusive
+        :type rect: tuple[int]
+        :rtype: memoryview
+        """
+        x_min, y_min, x_max, y_max = rect
+        image = self.flatten([rect])
+        return memoryview(np.ascontiguousarray(image[y_min:y_max, x_min:x_max, :])).cast("B")
+
+    def copyRegion(self, other, rect):
+        """
+        Copy a region from another buff with the same size into this buff
+
+        :param other: the buff to copy from
+        :type other: Buff
+        :param rect: the region as (x_min, y_min, x_max, y_max), max values are exclusive
+        :type rect: tuple[int]
+        :rtype: None
         """
-        # flip width and height to generate bytes correctly
-        return np.transpose(self.buff, (1, 0, 2)).tobytes()
+        if other.size != self.size:
+            raise TypeError("copyRegion only accept buff with the same size")
+        x_min, y_min, x_max, y_max = rect
+        self.data[y_min:y_max, x_min:x_max, :] = other.data[y_min:y_max, x_min:x_max, :]
+        self.markDirty(x_min, y_min, x_max, y_max)
 
     def copy(self):
         """
@@ -234,7 +747,11 @@ class Buff:
         :rtype: Buff
         """
         newBuff = Buff(self.width, self.height, self.background_color)
-        newBuff._setBuffArray(self.buff)
+        newBuff._setDataArray(self.data)
+        if self.depth is not None:
+            newBuff.depth = self.depth.copy()
+        for layer in self.layers:
+            newBuff.addLayer(layer.copy())
         return newBuff
 
 
@@ -252,20 +769,20 @@ if __name__ == "__main__":
     print(p_default)
 
     b = Buff(5, 5, ColorType(0.3, 0., 0.4))
-    print(b.getBytes())
+    print(bytes(b.getBytes()))
     print(b.getPoint(2, 2))
     print(b.getPoint(50, 50))
 
     c = b
     d = b.copy()
-    print("c (reference of b): ", c.getBytes())
-    print("d (copy of b)     :", d.getBytes())
+    print("c (reference of b): ", bytes(c.getBytes()))
+    print("d (copy of b)     :", bytes(d.getBytes()))
     b.setBackground(ColorType(0.1, 0.2, 0.3))
     b.clear()
     b.setPixel(2, 2, 2, 0, 0)
     print("change b's background and set pixel at (2, 2)")
-    print("c (reference of b): ", c.getBytes())
-    print("d (copy of b)     :", d.getBytes())
+    print("c (reference of b): ", bytes(c.getBytes()))
+    print("d (copy of b)     :", bytes(d.getBytes()))
 
     e = Buff(3, 3, ColorType(0, 0, 0))
     e.setPixel(0, 0, 1, 1, 1)
@@ -274,16 +791,16 @@ if __name__ == "__main__":
     e.setPixel(1, 0, 4, 4, 4)
     e.setPixel(1, 1, 5, 5, 5)
     print(e)
-    print(e.getBytes())
+    print(bytes(e.getBytes()))
     e.resize(2, 4)
     print(e)
-    print(e.getBytes())
+    print(bytes(e.getBytes()))
     e.resize(5, 3)
     print(e)
-    print(e.getBytes())
+    print(bytes(e.getBytes()))
     e.resize(6, 6)
     print(e)
-    print(e.getBytes())
+    print(bytes(e.getBytes()))
     e.resize(2, 2)
     print(e)
-    print(e.getBytes())
+    print(bytes(e.getBytes()))
@@ -44,6 +44,7 @@ except ImportError:
 
 from Buff import Buff
 from ColorType import ColorType
+from SharedBuff import SharedBuff
 
 # -------------------------- System Checking --------------------------
 WX_MINIMUM_REQUIRED = "3.0.0"
@@ -78,6 +79,12 @@ class CanvasBase(glcanvas.GLCanvas):
     buff = Buff()
     buff_last = Buff()
 
+    # texture storage grows by this factor when buff outgrows it, so dragging a window edge doesn't reallocate it
+    # on every resize event
+    textureGrowth = 1.5
+    # if set, buff is exported to this file as a SharedBuff, so other processes can watch the frames
+    sharedBuffPath = None
+
     def __init__(self, parent):
         """
         Inherit from WxPython GLCanvas class. Bind implemented methods to window events.
@@ -89,6 +96,10 @@ class CanvasBase(glcanvas.GLCanvas):
         self.init = False
         self.context = glcanvas.GLContext(self)
         self.size = None
+        # persistent texture which holds buff content, only dirty regions of buff are uploaded to it.
+        # textureSize is the allocated storage size, which can be larger than buff
+        self.textureId = None
+        self.textureSize = None
 
         self.Bind(wx.EVT_PAINT, self.OnPaint)
         self.Bind(wx.EVT_WINDOW_DESTROY, self.OnDestroy)
@@ -107,19 +118,18 @@ class CanvasBase(glcanvas.GLCanvas):
 
     def clear(self):
         """
-        clear display buff, but save last frame to buff_last
+        clear display buff. buff_last still holds the last painted frame, OnDraw keeps it up to date
         """
-        self.buff_last = self.buff.copy()
         self.buff.clear()
         self.points_l.clear()
         self.points_r.clear()
 
     def OnResize(self, event):
         """
-        This method handles onresize event.
+        This method handles onresize event. The GL context and the texture are kept, buff is resized in place and
+        only its newly exposed regions are passed to Interrupt_Resize to be drawn again.
         """
 
-        self.context = glcanvas.GLContext(self)
         self.size = self.GetClientSize()
         self.SetCurrent(self.context)
 
@@ -128,9 +138,15 @@ class CanvasBase(glcanvas.GLCanvas):
         gl.glLoadIdentity()
         glu.gluOrtho2D(0, self.size.width, 0, self.size.height)
 
-        # Create new buffer for display and store last frame buffer to buff_last
-        self.buff_last = self.buff.copy()
-        self.buff.resize(self.size.width, self.size.height)
+        # Resize buffer for display, and buff_last in place with it. Kept pixels of buff_last are still the last frame,
+        # the exposed regions are marked dirty in buff and copied to buff_last at the next paint. If their sizes
+        # differ, buff_last is not in step with buff yet and the next paint copies all of it
+        if self.buff_last.size == self.buff.size:
+            self.buff_last.resize(self.size.width, self.size.height)
+        with self.buff.writing():
+            exposed = self.buff.resize(self.size.width, self.size.height)
+            if len(exposed) > 0:
+                self.Interrupt_Resize(exposed)
 
         # Update screen and display
         self.Refresh(eraseBackground=True)
@@ -162,7 +178,10 @@ class CanvasBase(glcanvas.GLCanvas):
         # load buff as Texture
         # Create new buffer for display and store last frame buffer to buff_last
         self.buff_last = self.buff.copy()
-        self.buff = Buff(self.size.width, self.size.height, ColorType(0, 0, 0))
+        if self.sharedBuffPath is not None:
+            self.buff = SharedBuff(self.sharedBuffPath, self.size.width, self.size.height, ColorType(0, 0, 0))
+        else:
+            self.buff = Buff(self.size.width, self.size.height, ColorType(0, 0, 0))
 
         gl.glClearColor(0., 0., 0., 0.)
         gl.glClearDepth(1.0)
@@ -184,42 +203,96 @@ class CanvasBase(glcanvas.GLCanvas):
         gl.glLoadIdentity()
         # Set coordinate system, origin at left-bottom
         glu.gluOrtho2D(0, self.size.width, 0, self.size.height)
-        # Save current frame to last frame in case you need it
-        self.buff_last = self.buff.copy()
+        # Regions of buff changed since last paint
+        dirtyRects = self.buff.takeDirtyRects()
+        # Save current frame to last frame in case you need it, only changed regions are copied
+        if self.buff_last.size != self.buff.size:
+            self.buff_last = self.buff.copy()
+        else:
+            for rect in dirtyRects:
+                self.buff_last.copyRegion(self.buff, rect)
 
         # The core part for display: generate a rectangle which covers the whole canvas and map texture to it. \
         # Texture is the content we want to display on canvas
         gl.glPixelStorei(gl.GL_UNPACK_ALIGNMENT, 1)
         gl.glEnable(gl.GL_TEXTURE_2D)
-        gl.glTexParameter(gl.GL_TEXTURE_2D, gl.GL_TEXTURE_WRAP_S, gl.GL_REPEAT)
-        gl.glTexParameter(gl.GL_TEXTURE_2D, gl.GL_TEXTURE_WRAP_T, gl.GL_REPEAT)
-        gl.glTexParameter(gl.GL_TEXTURE_2D, gl.GL_TEXTURE_MAG_FILTER, gl.GL_NEAREST)
-        gl.glTexParameter(gl.GL_TEXTURE_2D, gl.GL_TEXTURE_MIN_FILTER, gl.GL_LINEAR)
+        if self.textureId is None:
+            self.__createTexture()
+        gl.glBindTexture(gl.GL_TEXTURE_2D, self.textureId)
         gl.glTexEnvf(gl.GL_TEXTURE_ENV, gl.GL_TEXTURE_ENV_MODE, gl.GL_MODULATE)
-        gl.glTexImage2D(gl.GL_TEXTURE_2D, 0, gl.GL_RGB, self.size.width, self.size.height, 0, gl.GL_RGB,
-                        gl.GL_UNSIGNED_BYTE, self.buff.getBytes())
+        if self.textureSize is None or self.buff.width > self.textureSize[0] or \
+                self.buff.height > self.textureSize[1]:
+            self.__allocateTexture()
+            dirtyRects = [(0, 0, self.buff.width, self.buff.height)]
+        # composite layers of changed regions, then read regions straight from buff memory, unpack parameters select
+        # the rows and columns of each region
+        self.buff.flatten(dirtyRects)
+        gl.glPixelStorei(gl.GL_UNPACK_ROW_LENGTH, self.buff.width)
+        for x_min, y_min, x_max, y_max in dirtyRects:
+            gl.glPixelStorei(gl.GL_UNPACK_SKIP_PIXELS, x_min)
+            gl.glPixelStorei(gl.GL_UNPACK_SKIP_ROWS, y_min)
+            gl.glTexSubImage2D(gl.GL_TEXTURE_2D, 0, x_min, y_min, x_max - x_min, y_max - y_min, gl.GL_RGB,
+                               gl.GL_UNSIGNED_BYTE, self.buff.getBytes())
+        gl.glPixelStorei(gl.GL_UNPACK_ROW_LENGTH, 0)
+        gl.glPixelStorei(gl.GL_UNPACK_SKIP_PIXELS, 0)
+        gl.glPixelStorei(gl.GL_UNPACK_SKIP_ROWS, 0)
+        # only the lower left part of texture storage holds buff
+        u = self.buff.width / self.textureSize[0]
+        v = self.buff.height / self.textureSize[1]
         gl.glClear(gl.GL_COLOR_BUFFER_BIT)
         gl.glBegin(gl.GL_QUADS)
-        gl.glTexCoord2f(1.0, 0.0)
+        gl.glTexCoord2f(u, 0.0)
         gl.glVertex2i(self.buff.width, 0)
         gl.glTexCoord2f(0.0, 0.0)
         gl.glVertex2i(0, 0)
-        gl.glTexCoord2f(0.0, 1.0)
+        gl.glTexCoord2f(0.0, v)
         gl.glVertex2i(0, self.buff.height)
-        gl.glTexCoord2f(1.0, 1.0)
+        gl.glTexCoord2f(u, v)
         gl.glVertex2i(self.buff.width, self.buff.height)
         gl.glEnd()
 
         # Swap Buffer to display canvas
         self.SwapBuffers()
 
+    def __createTexture(self):
+        """
+        Create the texture object which holds buff content in current context
+        """
+        self.textureId = gl.glGenTextures(1)
+        self.textureSize = None
+        gl.glBindTexture(gl.GL_TEXTURE_2D, self.textureId)
+        gl.glTexParameter(gl.GL_TEXTURE_2D, gl.GL_TEXTURE_WRAP_S, gl.GL_REPEAT)
+        gl.glTexParameter(gl.GL_TEXTURE_2D, gl.GL_TEXTURE_WRAP_T, gl.GL_REPEAT)
+        gl.glTexParameter(gl.GL_TEXTURE_2D, gl.GL_TEXTURE_MAG_FILTER, gl.GL_NEAREST)
+        gl.glTexParameter(gl.GL_TEXTURE_2D, gl.GL_TEXTURE_MIN_FILTER, gl.GL_LINEAR)
+
+    def __allocateTexture(self):
+        """
+        Allocate texture storage big enough for buff. Storage only grows, by textureGrowth at least, so it is not
+        reallocated again while the window is dragged a bit larger
+        """
+        width, height = self.buff.width, self.buff.height
+        if self.textureSize is not None:
+            # only the side buff has outgrown is enlarged
+            if width <= self.textureSize[0]:
+                width = self.textureSize[0]
+            else:
+                width = max(width, int(self.textureSize[0] * self.textureGrowth))
+            if height <= self.textureSize[1]:
+                height = self.textureSize[1]
+            else:
+                height = max(height, int(self.textureSize[1] * self.textureGrowth))
+        gl.glTexImage2D(gl.GL_TEXTURE_2D, 0, gl.GL_RGB, width, height, 0, gl.GL_RGB, gl.GL_UNSIGNED_BYTE, None)
+        self.textureSize = (width, height)
+
     def OnMouseLeft(self, event):
         """
         Record left mouse click event and feed coordinates to Interrupt_MouseL
         """
         x = event.GetX()
         y = event.GetY()
-        self.Interrupt_MouseL(x, self.size.height - y)
+        with self.buff.writing():
+            self.Interrupt_MouseL(x, self.size.height - y)
         self.Refresh(True)
 
     def OnMouseRight(self, event):
@@ -228,7 +301,8 @@ class CanvasBase(glcanvas.GLCanvas):
         """
         x = event.GetX()
         y = event.GetY()
-        self.Interrupt_MouseR(x, self.size.height - y)
+        with self.buff.writing():
+            self.Interrupt_MouseR(x, self.size.height - y)
         self.Refresh(True)
 
     def OnKeyDown(self, event):
@@ -236,7 +310,8 @@ class CanvasBase(glcanvas.GLCanvas):
         Record the key down event and feed the key to Interrupt_MouseL
         """
         keycode = event.GetKeyCode()
-        self.Interrupt_Keyboard(keycode)
+        with self.buff.writing():
+            self.Interrupt_Keyboard(keycode)
         self.Refresh(True)
 
     def Interrupt_MouseL(self, x, y):
@@ -248,6 +323,15 @@ class CanvasBase(glcanvas.GLCanvas):
     def Interrupt_Keyboard(self, keycode):
         raise NotImplementedError("keyboard interrupt not implemented yet")
 
+    def Interrupt_Resize(self, exposedRects):
+        """
+        Called after buff is resized with the newly exposed regions of buff, which are black. Override it to draw them.
+
+        :param exposedRects: regions (x_min, y_min, x_max, y_max), max values are exclusive
+        :type exposedRects: list[tuple[int]]
+        """
+        pass
+
     @staticmethod
     def OnDestroy(event):
         print("Destroy Window")
@@ -0,0 +1,256 @@
+"""
+Capture every test case across a sweep of n_steps with anti-aliasing off and on into a frame sequence, the batch version
+of stepping through test cases with t and changing n_steps with , and . in Sketch.
+
+Frames are encoded by FrameEncoder on a background thread while the next frame is rasterized, so rendering and
+encoding overlap. The encoder keeps a few frames in a bounded queue, rendering waits only when encoding falls behind.
+Output formats:
+
+* png: one PNG file per frame
+* gif: one animated GIF with all frames, built with Pillow
+* raw: one rgb24 video stream with all frames, and a text file with the frame names in order. Play it with e.g.
+  ffplay -f rawvideo -pixel_format rgb24 -video_size WIDTHxHEIGHT -framerate 10 capture.rgb
+
+Usage example, sweep n_steps from 6 to 192 with anti-aliasing off and on, for test case 1 and 3:
+
+    python Capture.py --size 500 500 --cases 1 3 --aa off on --out capture --format png
+"""
+
+import os
+import time
+import queue
+import argparse
+import threading
+
+import numpy as np
+
+from SketchBase import SketchBase
+from Headless import HeadlessSketch, toImageArray
+
+try:
+    # From pip package "Pillow"
+    from PIL import Image
+except Exception:
+    print("Need to install PIL package. Pip package name is Pillow")
+    raise ImportError
+
+
+class FrameEncoder:
+    """
+    Encode frames on a background thread. Use it as a context manager, or call close when all frames are submitted
+
+    Properties:
+        out: str, output directory
+        format: str, FrameEncoder.PNG, FrameEncoder.GIF or FrameEncoder.RAW
+        fps: int, frame rate of animated output
+        name: str, file name of gif and raw output, without extension
+        frameCount: int, number of frames encoded so far
+        encodeTime: float, seconds the background thread spent encoding
+    """
+    PNG = "png"
+    GIF = "gif"
+    RAW = "raw"
+    FORMATS = (PNG, GIF, RAW)
+
+    out = None
+    format = PNG
+    fps = 10
+    name = "capture"
+    frameCount = 0
+    encodeTime = 0.0
+
+    def __init__(self, out, format=PNG, fps=10, queueSize=4, name="capture"):
+        """
+        :param out: output directory, created if missing
+        :type out: str
+        :param format: FrameEncoder.PNG, FrameEncoder.GIF or FrameEncoder.RAW
+        :type format: str
+        :param fps: frame rate of animated output
+        :type fps: int
+        :param queueSize: number of submitted frames waiting for the encoder before submit blocks
+        :type queueSize: int
+        :param name: file name of gif and raw output, without extension
+        :type name: str
+        :rtype: None
+        """
+        if format not in self.FORMATS:
+            raise ValueError("Unknown capture format: " + str(format))
+        os.makedirs(out, exist_ok=True)
+        self.out = out
+        self.format = format
+        self.fps = fps
+        self.name = name
+        self.frameCount = 0
+        self.encodeTime = 0.0
+        self.__queue = queue.Queue(maxsize=queueSize)
+        self.__error = None
+        self.__size = None
+        self.__frames = []  # gif frames, saved together when closed
+        self.__names = []
+        self.__stream = None
+        self.__thread = threading.Thread(target=self.__run, name="FrameEncoder", daemon=True)
+        self.__thread.start()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, excType, excValue, traceback):
+        self.close()
+
+    def submit(self, name, image):
+        """
+        Queue a frame for encoding. The image is copied, so the caller can draw on it again right away
+
+        :param name: frame name, the file name of png output
+        :type name: str
+        :param image: image array of shape (height, width, 3), the first row is the top of the canvas
+        :type image: numpy.ndarray[uint8]
+        :rtype: None
+        """
+        self.__raiseError()
+        if self.format != self.PNG:
+            if self.__size is None:
+                self.__size = image.shape
+            elif image.shape != self.__size:
+                raise ValueError("Frames of {} output must have the same size".format(self.format))
+        self.__queue.put((name, np.array(image, dtype=np.uint8, copy=True)))
+
+    def close(self):
+        """
+        Wait until all submitted frames are encoded and finish the output files
+
+        :rtype: None
+        """
+        if self.__thread is None:
+            return
+        self.__queue.put(None)
+        self.__thread.join()
+        self.__thread = None
+        if self.__error is None:
+            self.__finish()
+        self.__raiseError()
+
+    def __raiseError(self):
+        if self.__error is not None:
+            raise RuntimeError("Frame encoding failed") from self.__error
+
+    def __run(self):
+        """
+        Background thread, encode frames in submission order until close
+        """
+        while True:
+            job = self.__queue.get()
+            if job is None:
+                return
+            if self.__error is not None:
+                # keep draining, so submit never blocks on a dead encoder
+                continue
+            start = time.perf_counter()
+            try:
+                self.__encode(*job)
+                self.frameCount += 1
+            except Exception as e:
+                self.__error = e
+            self.encodeTime += time.perf_counter() - start
+
+    def __encode(self, name, image):
+        if self.format == self.PNG:
+            Image.fromarray(image).save(os.path.join(self.out, name + ".png"))
+        elif self.format == self.GIF:
+            self.__frames.append(Image.fromarray(image).quantize(method=Image.Quantize.MEDIANCUT))
+        else:
+            if self.__stream is None:
+                self.__stream = open(os.path.join(self.out, self.name + ".rgb"), "wb")
+            self.__stream.write(image.data)
+        self.__names.append(name)
+
+    def __finish(self):
+        """
+        Write output which needs all frames
+        """
+        if self.format == self.GIF and len(self.__frames) > 0:
+            self.__frames[0].save(os.path.join(self.out, self.name + ".gif"), save_all=True,
+                                  append_images=self.__frames[1:], duration=int(1000 / self.fps), loop=0)
+            self.__frames.clear()
+        elif self.format == self.RAW and self.__stream is not None:
+            self.__stream.close()
+            with open(os.path.join(self.out, self.name + ".txt"), "w") as f:
+                f.write("{}x{} rgb24 {} fps\n".format(self.__size[1], self.__size[0], self.fps))
+                f.write("\n".join(self.__names) + "\n")
+
+
+def stepSweep(start=SketchBase.MIN_N_STEPS, stop=SketchBase.MAX_N_STEPS):
+    """
+    n_steps from start to stop, doubling every time like pressing . in Sketch
+
+    :rtype: list[int]
+    """
+    steps = []
+    n_steps = max(start, 1)
+    while n_steps <= stop:
+        steps.append(n_steps)
+        n_steps = round(n_steps * 2)
+    return steps
+
+
+def capture(sketch, encoder, cases=None, steps=None, aaModes=(False,)):
+    """
+    Render test cases for every anti-aliasing mode and n_steps and submit the frames to encoder. Frames are named
+    like case01_aa1_n012, and come in the order of cases, then modes, then steps
+
+    :param sketch: the sketch to render with, its doAA is changed
+    :type sketch: HeadlessSketch
+    :param encoder: encoder to submit frames to, it is not closed
+    :type encoder: FrameEncoder
+    :param cases: test case indices, all if not given
+    :type cases: list[int]
+    :param steps: n_steps values, stepSweep() if not given
+    :type steps: list[int]
+    :param aaModes: anti-aliasing off or on, a mode given twice is rendered once. Anti-aliasing is coverage based,
+                    so there are no levels to sweep
+    :type aaModes: list[bool]
+    :return: number of frames rendered
+    :rtype: int
+    """
+    if cases is None:
+        cases = range(len(sketch.test_case_list))
+    if steps is None:
+        steps = stepSweep()
+    aaModes = list(dict.fromkeys(bool(doAA) for doAA in aaModes))
+    count = 0
+    for case in cases:
+        for doAA in aaModes:
+            sketch.doAA = doAA
+            for n_steps in steps:
+                buff = sketch.renderTestCase(case, n_steps)
+                encoder.submit("case{:02d}_aa{:d}_n{:03d}".format(case, doAA, n_steps), toImageArray(buff))
+                count += 1
+    return count
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Capture PA1 test cases across n_steps with anti-aliasing off and on")
+    parser.add_argument("--size", type=int, nargs=2, default=[500, 500], metavar=("WIDTH", "HEIGHT"))
+    parser.add_argument("--cases", type=int, nargs="*", default=None, help="test case indices, all if not given")
+    parser.add_argument("--steps", type=int, nargs=2, default=[SketchBase.MIN_N_STEPS, SketchBase.MAX_N_STEPS],
+                        metavar=("FIRST", "LAST"), help="n_steps range, doubled from FIRST up to LAST")
+    parser.add_argument("--aa", choices=["off", "on"], nargs="+", default=["off", "on"],
+                        help="anti-aliasing modes to capture")
+    parser.add_argument("--smooth", action="store_true")
+    parser.add_argument("--texture", default=SketchBase.texture_file_path)
+    parser.add_argument("--seed", type=int, default=SketchBase.paletteSeed, help="palette seed of random colors")
+    parser.add_argument("--out", default="capture")
+    parser.add_argument("--format", choices=FrameEncoder.FORMATS, default=FrameEncoder.PNG)
+    parser.add_argument("--fps", type=int, default=10)
+    args = parser.parse_args()
+
+    SketchBase.texture_file_path = args.texture
+    SketchBase.paletteSeed = args.seed
+    sketch = HeadlessSketch(*args.size)
+    sketch.doSmooth = args.smooth
+
+    start = time.perf_counter()
+    with FrameEncoder(args.out, args.format, args.fps) as encoder:
+        frames = capture(sketch, encoder, args.cases, stepSweep(*args.steps), [mode == "on" for mode in args.aa])
+    print("Captured {} frames to {} in {:.2f}s, {:.2f}s of it encoding".format(
+        frames, args.out, time.perf_counter() - start, encoder.encodeTime))
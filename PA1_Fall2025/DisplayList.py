@@ -0,0 +1,215 @@
+"""
+Defines DisplayList class, a retained list of draw commands kept beside a Buff. Every command is a VertexBatch of
+points, line segments, triangles, a triangle strip, a triangle fan or a polygon with the flags it is drawn with, in
+submission order. Replaying the list from the
+first command on a cleared buff gives the same image as drawing the primitives immediately.
+
+A flag of a command is either fixed to True/False, or None to follow the sketch's current flag of the same name.
+When a sketch flag is toggled, only the region covered by commands following that flag needs to be re-rasterized.
+
+Display lists are saved as JSON, so a scene can be replayed later for reproducible renders.
+"""
+
+import json
+
+import numpy as np
+
+from VertexBatch import VertexBatch
+
+
+class DisplayCommand:
+    """
+    Properties:
+        kind: str, one of DisplayCommand.KINDS
+        batch: VertexBatch, every vertex is a point, every 2 vertices a segment, every 3 vertices a triangle, or all
+            vertices are one strip, fan or polygon
+        flags: dict, flag name to True/False, or None to follow the sketch
+    """
+    __slots__ = ["kind", "batch", "flags", "bbox"]
+
+    POINTS = "points"
+    LINES = "lines"
+    TRIANGLES = "triangles"
+    TRIANGLE_STRIP = "triangleStrip"
+    TRIANGLE_FAN = "triangleFan"
+    POLYGON = "polygon"
+    # flags each kind of command can hold
+    FLAG_NAMES = {POINTS: (),
+                  LINES: ("doSmooth", "doAA"),
+                  TRIANGLES: ("doSmooth", "doAA", "doTexture"),
+                  TRIANGLE_STRIP: ("doSmooth", "doAA", "doTexture"),
+                  TRIANGLE_FAN: ("doSmooth", "doAA", "doTexture"),
+                  POLYGON: ("doSmooth", "doAA")}
+    KINDS = tuple(FLAG_NAMES)
+
+    def __init__(self, kind, batch, flags=None):
+        """
+        :param kind: one of DisplayCommand.KINDS
+        :type kind: str
+        :param batch: the vertices of this command
+        :type batch: VertexBatch
+        :param flags: fixed flags, missing flags follow the sketch
+        :type flags: dict
+        :rtype: None
+        """
+        if kind not in self.FLAG_NAMES:
+            raise ValueError("Unknown display command kind: " + str(kind))
+        flags = {} if flags is None else flags
+        unknown = set(flags) - set(self.FLAG_NAMES[kind])
+        if len(unknown) > 0:
+            raise ValueError("Flags {} don't apply to {}".format(sorted(unknown), kind))
+        self.kind = kind
+        self.batch = batch
+        self.flags = {name: flags.get(name) for name in self.FLAG_NAMES[kind]}
+        # anti-aliased lines can cover one pixel more on each side
+        if len(batch) > 0:
+            self.bbox = (*(batch.coords.min(axis=0) - 1).tolist(), *(batch.coords.max(axis=0) + 2).tolist())
+        else:
+            self.bbox = (0, 0, 0, 0)
+
+    def __repr__(self):
+        return "DisplayCommand(" + self.kind + ", " + str(len(self.batch)) + " vertices, " + str(self.flags) + ")"
+
+    def follows(self, flag):
+        """
+        Is this command drawn with the sketch's current value of flag
+
+        :param flag: flag name, e.g. "doAA"
+        :type flag: str
+        :rtype: bool
+        """
+        return flag in self.flags and self.flags[flag] is None
+
+    def resolveFlags(self, sketch):
+        """
+        Flags to draw with, where following flags take their values from sketch
+
+        :rtype: dict
+        """
+        return {name: getattr(sketch, name) if value is None else value for name, value in self.flags.items()}
+
+    def toDict(self):
+        """
+        :rtype: dict
+        """
+        return {"kind": self.kind,
+                "coords": self.batch.coords.tolist(),
+                "colors": self.batch.colors.tolist(),
+                "uvs": None if self.batch.uvs is None else self.batch.uvs.tolist(),
+                "depths": None if self.batch.depths is None else self.batch.depths.tolist(),
+                "flags": self.flags}
+
+    @classmethod
+    def fromDict(cls, d):
+        """
+        :rtype: DisplayCommand
+        """
+        return cls(d["kind"], VertexBatch(d["coords"], d["colors"], d.get("uvs"), d.get("depths")), d.get("flags"))
+
+
+class DisplayList:
+    """
+    Draw commands in submission order
+    """
+    commands = None
+
+    def __init__(self, commands=None):
+        """
+        :param commands: initial commands
+        :type commands: list[DisplayCommand]
+        :rtype: None
+        """
+        self.commands = [] if commands is None else list(commands)
+
+    def __len__(self):
+        return len(self.commands)
+
+    def __iter__(self):
+        return iter(self.commands)
+
+    def __repr__(self):
+        return "DisplayList(" + str(len(self)) + " commands)"
+
+    def clear(self):
+        """
+        Remove all commands
+        """
+        self.commands.clear()
+
+    def append(self, kind, batch, flags=None):
+        """
+        Record a command at the end of the list
+
+        :param kind: one of DisplayCommand.KINDS
+        :type kind: str
+        :param batch: the vertices of the command
+        :type batch: VertexBatch
+        :param flags: fixed flags, missing flags follow the sketch
+        :type flags: dict
+        :return: the recorded command
+        :rtype: DisplayCommand
+        """
+        command = DisplayCommand(kind, batch, flags)
+        self.commands.append(command)
+        return command
+
+    def affectedRect(self, flags):
+        """
+        Bounding rectangle of all commands which follow any of flags, so they change when one of flags is toggled
+
+        :param flags: flag names
+        :type flags: list[str]
+        :return: (x_min, y_min, x_max, y_max) with exclusive max values, None if no command is affected
+        :rtype: tuple[int]
+        """
+        boxes = [c.bbox for c in self.commands if any(c.follows(f) for f in flags) and len(c.batch) > 0]
+        if len(boxes) == 0:
+            return None
+        boxes = np.array(boxes)
+        return (*boxes[:, :2].min(axis=0).tolist(), *boxes[:, 2:].max(axis=0).tolist())
+
+    def overlapping(self, rect):
+        """
+        Commands whose bounding box overlaps rect, in submission order
+
+        :param rect: (x_min, y_min, x_max, y_max) with exclusive max values
+        :type rect: tuple[int]
+        :rtype: list[DisplayCommand]
+        """
+        x_min, y_min, x_max, y_max = rect
+        return [c for c in self.commands
+                if c.bbox[0] < x_max and x_min < c.bbox[2] and c.bbox[1] < y_max and y_min < c.bbox[3]]
+
+    def toDict(self):
+        """
+        :rtype: dict
+        """
+        return {"version": 1, "commands": [c.toDict() for c in self.commands]}
+
+    @classmethod
+    def fromDict(cls, d):
+        """
+        :rtype: DisplayList
+        """
+        return cls(DisplayCommand.fromDict(c) for c in d["commands"])
+
+    def save(self, path):
+        """
+        Save the list to a JSON file
+
+        :type path: str
+        :rtype: None
+        """
+        with open(path, "w") as f:
+            json.dump(self.toDict(), f)
+
+    @classmethod
+    def load(cls, path):
+        """
+        Load a list saved by save
+
+        :type path: str
+        :rtype: DisplayList
+        """
+        with open(path) as f:
+            return cls.fromDict(json.load(f))
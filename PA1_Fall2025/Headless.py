@@ -0,0 +1,229 @@
+"""
+Headless offscreen renderer for PA1. HeadlessSketch draws test cases or primitive scripts on a plain Buff without
+wxPython or OpenGL, so frames can be rendered on machines without display. Frames are streamed to PNG or .npy files
+one by one as they are rendered.
+
+Usage example, render test case 1 and 3 with n_steps 12 and 48 to ./frames:
+
+    python Headless.py --size 500 500 --cases 1 3 --steps 12 48 --out frames --format png
+
+A primitive script is a python file which defines draw(sketch, n_steps), where sketch is a HeadlessSketch:
+
+    python Headless.py --script myScript.py --steps 6 12 24 --out frames --format npy
+
+Add --save-lists to also save the display list of every frame as JSON, and replay one later with --replay:
+
+    python Headless.py --replay frames/case01_n012.json --aa --out frames
+
+Add --share to export every rendered frame to a file which other processes can watch with SharedBuffReader:
+
+    python Headless.py --share /dev/shm/pa1_frames --steps 6 12 24
+"""
+
+import os
+import argparse
+import importlib.util
+
+import numpy as np
+
+from Buff import Buff
+from ColorType import ColorType
+from SketchBase import SketchBase
+from DisplayList import DisplayList
+from SharedBuff import SharedBuff
+from TextureSampler import TextureSampler
+
+try:
+    # From pip package "Pillow"
+    from PIL import Image
+except Exception:
+    print("Need to install PIL package. Pip package name is Pillow")
+    raise ImportError
+
+
+class HeadlessSketch(SketchBase):
+    """
+    SketchBase which draws on its own Buff instead of a window
+    """
+    buff = None
+
+    def __init__(self, width=500, height=500, background=None, sharedBuffPath=None):
+        """
+        :param width: the buff width
+        :type width: int
+        :param height: the buff height
+        :type height: int
+        :param background: the buff background color, black if not given
+        :type background: ColorType
+        :param sharedBuffPath: if given, draw on a SharedBuff exported to this file, every render is one frame
+        :type sharedBuffPath: str
+        :rtype: None
+        """
+        if background is None:
+            background = ColorType(0, 0, 0)
+        if sharedBuffPath is not None:
+            self.buff = SharedBuff(sharedBuffPath, width, height, background)
+        else:
+            self.buff = Buff(width, height, background)
+        super(HeadlessSketch, self).__init__()
+
+    def renderTestCase(self, index, n_steps=None):
+        """
+        Clear buff and draw one test case on it
+
+        :param index: index in test_case_list
+        :type index: int
+        :param n_steps: n_steps passed to the test case, use self.n_steps if not given
+        :type n_steps: int
+        :return: the buff drawn on, this is not a copy and will be changed by the next render
+        :rtype: Buff
+        """
+        return self.renderScript(self.test_case_list[index], n_steps)
+
+    def renderScript(self, script, n_steps=None):
+        """
+        Clear buff and run a primitive script on it
+
+        :param script: a callable which accepts n_steps and draws on this sketch
+        :type script: callable
+        :param n_steps: n_steps passed to the script, use self.n_steps if not given
+        :type n_steps: int
+        :return: the buff drawn on, this is not a copy and will be changed by the next render
+        :rtype: Buff
+        """
+        if n_steps is None:
+            n_steps = self.n_steps
+        with self.buff.writing():
+            self.clear()
+            script(n_steps)
+        return self.buff
+
+    def renderDisplayList(self, displayList):
+        """
+        Clear buff and replay a display list on it with the current flags
+
+        :param displayList: the display list to replay, it becomes the display list of this sketch
+        :type displayList: DisplayList
+        :return: the buff drawn on, this is not a copy and will be changed by the next render
+        :rtype: Buff
+        """
+        with self.buff.writing():
+            self.clear()
+            self.displayList = displayList
+            self.redraw()
+        return self.buff
+
+    def frames(self, jobs):
+        """
+        Render a sequence of frames lazily, the next frame is only drawn when asked for
+
+        :param jobs: pairs of (test case index or script, n_steps)
+        :type jobs: iterable
+        :return: generator of (name, buff)
+        """
+        for job, n_steps in jobs:
+            if callable(job):
+                name = "{}_n{:03d}".format(getattr(job, "__name__", "script"), n_steps)
+                yield name, self.renderScript(job, n_steps)
+            else:
+                yield "case{:02d}_n{:03d}".format(job, n_steps), self.renderTestCase(job, n_steps)
+
+
+def toImageArray(buff):
+    """
+    Turn buff into an image array of shape (height, width, 3), the first row is the top of the canvas.
+    Layers of buff are flattened into it
+
+    :param buff: the buff to convert
+    :type buff: Buff
+    :rtype: numpy.ndarray[uint8]
+    """
+    return np.flip(buff.flatten(), axis=0)
+
+
+def saveFrame(buff, path):
+    """
+    Save buff to a PNG file or a .npy file, chosen by the file extension.
+    Both of them store the image array given by toImageArray.
+
+    :param buff: the buff to save
+    :type buff: Buff
+    :param path: output file path, ends with .png or .npy
+    :type path: str
+    :rtype: None
+    """
+    extension = os.path.splitext(path)[1].lower()
+    if extension == ".png":
+        Image.fromarray(np.ascontiguousarray(toImageArray(buff))).save(path)
+    elif extension == ".npy":
+        np.save(path, toImageArray(buff))
+    else:
+        raise ValueError("Unknown frame format: " + extension)
+
+
+def loadScript(path):
+    """
+    Load draw(sketch, n_steps) from a primitive script file
+
+    :param path: the script file path
+    :type path: str
+    :rtype: callable
+    """
+    spec = importlib.util.spec_from_file_location(os.path.splitext(os.path.basename(path))[0], path)
+    module = importlib.util.module_from_spec(spec)
+    spec.loader.exec_module(module)
+    if not hasattr(module, "draw"):
+        raise AttributeError("Primitive script must define draw(sketch, n_steps)")
+    return module.draw
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Render PA1 test cases without display")
+    parser.add_argument("--size", type=int, nargs=2, default=[500, 500], metavar=("WIDTH", "HEIGHT"))
+    parser.add_argument("--cases", type=int, nargs="*", default=None, help="test case indices, all if not given")
+    parser.add_argument("--script", default=None, help="primitive script which defines draw(sketch, n_steps)")
+    parser.add_argument("--replay", default=None, help="render a display list saved as JSON")
+    parser.add_argument("--save-lists", action="store_true", help="save display list of every frame as JSON")
+    parser.add_argument("--steps", type=int, nargs="+", default=[SketchBase.n_steps])
+    parser.add_argument("--smooth", action="store_true")
+    parser.add_argument("--aa", action="store_true")
+    parser.add_argument("--texture", default=SketchBase.texture_file_path)
+    parser.add_argument("--filter", choices=TextureSampler.FILTERS, default=SketchBase.textureFilter,
+                        help="texture filtering, mipmapped filters build the mip pyramid")
+    parser.add_argument("--out", default="frames")
+    parser.add_argument("--format", choices=["png", "npy"], default="png")
+    parser.add_argument("--share", default=None, help="also export frames to this file for SharedBuffReader")
+    parser.add_argument("--seed", type=int, default=SketchBase.paletteSeed, help="palette seed of random colors")
+    args = parser.parse_args()
+
+    SketchBase.texture_file_path = args.texture
+    SketchBase.paletteSeed = args.seed
+    sketch = HeadlessSketch(*args.size, sharedBuffPath=args.share)
+    sketch.doSmooth = args.smooth
+    sketch.doAA = args.aa
+    sketch.setTextureFilter(args.filter)
+
+    if args.script is not None:
+        draw = loadScript(args.script)
+
+        def script(n_steps):
+            draw(sketch, n_steps)
+        script.__name__ = os.path.splitext(os.path.basename(args.script))[0]
+        targets = [script]
+    elif args.cases is None:
+        targets = list(range(len(sketch.test_case_list)))
+    else:
+        targets = args.cases
+
+    os.makedirs(args.out, exist_ok=True)
+    if args.replay is not None:
+        path = os.path.join(args.out, os.path.splitext(os.path.basename(args.replay))[0] + "_replay." + args.format)
+        saveFrame(sketch.renderDisplayList(DisplayList.load(args.replay)), path)
+        print("Saved: ", path)
+        targets = []
+    for name, frame in sketch.frames((t, n) for t in targets for n in args.steps):
+        path = os.path.join(args.out, name + "." + args.format)
+        saveFrame(frame, path)
+        print("Saved: ", path)
+        if args.save_lists:
+            sketch.displayList.save(os.path.join(args.out, name + ".json"))
@@ -0,0 +1,185 @@
+"""
+Defines Layer class, an RGBA drawing layer kept above a Buff, and the blend operators used to composite colors.
+A Layer is a Buff with an alpha plane, so every drawing routine which draws on a Buff draws on a Layer as well. Pixels
+start transparent, opaque writes set alpha to 1 and anti-aliased fragments accumulate their coverage as alpha, so edges
+keep their partial coverage until the layer is composited over whatever is below it.
+
+Layers are attached to a Buff with Buff.addLayer. Buff.flatten composites the base colors and all visible layers in
+order, each with its own blend mode and opacity, into the array given to graphic card. Blending is done on whole
+regions with NumPy, never pixel by pixel.
+"""
+
+import numpy as np
+
+from Buff import Buff
+
+
+class Layer(Buff):
+    """
+    Properties:
+        alpha: numpy.ndarray<float32>(height, width), coverage of every pixel in [0, 1]
+        blendMode: str, Layer.OVER, Layer.ADD or Layer.MULTIPLY, how the layer is composited onto the content below
+        opacity: float, in [0, 1], multiplies alpha when the layer is composited
+        visible: bool, invisible layers are skipped by Buff.flatten
+        parent: Buff, the buff this layer is attached to, its dirty regions are forwarded to parent
+    """
+    OVER = "over"
+    ADD = "add"
+    MULTIPLY = "multiply"
+    BLEND_MODES = (OVER, ADD, MULTIPLY)
+
+    blendMode = OVER
+    opacity = 1.0
+    visible = True
+    parent = None
+
+    def __init__(self, width=0, height=0, blendMode=OVER, opacity=1.0):
+        """
+        :param width: the layer width
+        :type width: int
+        :param height: the layer height
+        :type height: int
+        :param blendMode: Layer.OVER, Layer.ADD or Layer.MULTIPLY
+        :type blendMode: str
+        :param opacity: layer opacity in [0, 1]
+        :type opacity: float
+        :rtype: None
+        """
+        if blendMode not in self.BLEND_MODES:
+            raise ValueError("Unknown blend mode: " + str(blendMode))
+        super(Layer, self).__init__(width, height)
+        self.alpha = np.zeros((self.height, self.width), dtype=np.float32)
+        self.blendMode = blendMode
+        self.opacity = float(opacity)
+
+    def __repr__(self):
+        return "Layer({}x{}, {}, opacity {})".format(self.width, self.height, self.blendMode, self.opacity)
+
+    def setBlendMode(self, blendMode):
+        """
+        :param blendMode: Layer.OVER, Layer.ADD or Layer.MULTIPLY
+        :type blendMode: str
+        :rtype: None
+        """
+        if blendMode not in self.BLEND_MODES:
+            raise ValueError("Unknown blend mode: " + str(blendMode))
+        self.blendMode = blendMode
+        self.markAllDirty()
+
+    def setOpacity(self, opacity):
+        """
+        :param opacity: layer opacity in [0, 1]
+        :type opacity: float
+        :rtype: None
+        """
+        self.opacity = min(max(float(opacity), 0.0), 1.0)
+        self.markAllDirty()
+
+    def setVisible(self, visible):
+        """
+        :type visible: bool
+        :rtype: None
+        """
+        self.visible = bool(visible)
+        self.markAllDirty()
+
+    def markDirty(self, x_min: int, y_min: int, x_max: int, y_max: int, fragments: int = 0) -> None:
+        """
+        Record a changed region of the layer, the same region of parent changes with it. Fragments are only counted
+        on the layer
+        """
+        super(Layer, self).markDirty(x_min, y_min, x_max, y_max, fragments)
+        if self.parent is not None:
+            self.parent.markDirty(x_min, y_min, x_max, y_max)
+
+    def markAllDirty(self) -> None:
+        """
+        Record that the whole layer is changed, and the whole parent with it
+        """
+        super(Layer, self).markAllDirty()
+        if self.parent is not None:
+            self.parent.markAllDirty()
+
+    def copy(self):
+        """
+        A deep copy of current layer, not attached to any buff
+
+        :rtype: Layer
+        """
+        newLayer = Layer(self.width, self.height, self.blendMode, self.opacity)
+        newLayer._setDataArray(self.data)
+        newLayer.alpha = self.alpha.copy()
+        newLayer.visible = self.visible
+        if self.depth is not None:
+            newLayer.depth = self.depth.copy()
+        return newLayer
+
+    def compositeOnto(self, dst, rect):
+        """
+        Composite a region of this layer onto dst with the layer blend mode and opacity
+
+        :param dst: colors below the layer in [0, 255], shape (y_max - y_min, x_max - x_min, 3). Changed in place
+        :type dst: numpy.ndarray[float32]
+        :param rect: the region as (x_min, y_min, x_max, y_max), max values are exclusive
+        :type rect: tuple[int]
+        :rtype: None
+        """
+        if not self.visible or self.opacity <= 0:
+            return
+        x_min, y_min, x_max, y_max = rect
+        alpha = self.alpha[y_min:y_max, x_min:x_max, None] * np.float32(self.opacity)
+        dst[...] = Layer.blend(dst, self.data[y_min:y_max, x_min:x_max].astype(np.float32), alpha, self.blendMode)
+
+    @staticmethod
+    def blend(dst, src, alpha, blendMode=OVER):
+        """
+        Blend src colors onto dst colors, element-wise on whole arrays:
+            over:     dst + (src - dst) * alpha
+            add:      min(dst + src * alpha, 255)
+            multiply: dst + (dst * src / 255 - dst) * alpha
+
+        :param dst: destination colors in [0, 255]
+        :type dst: numpy.ndarray[float]
+        :param src: source colors in [0, 255], broadcastable to dst
+        :type src: numpy.ndarray[float]
+        :param alpha: source alpha in [0, 1], broadcastable to dst
+        :type alpha: numpy.ndarray[float]
+        :param blendMode: Layer.OVER, Layer.ADD or Layer.MULTIPLY
+        :type blendMode: str
+        :return: blended colors in [0, 255], not rounded
+        :rtype: numpy.ndarray[float]
+        """
+        if blendMode == Layer.OVER:
+            return dst * (1 - alpha) + src * alpha
+        if blendMode == Layer.ADD:
+            return np.minimum(dst + src * alpha, 255)
+        if blendMode == Layer.MULTIPLY:
+            return dst * (1 - alpha) + dst * src / 255 * alpha
+        raise ValueError("Unknown blend mode: " + str(blendMode))
+
+
+if __name__ == "__main__":
+    from ColorType import ColorType
+
+    base = Buff(4, 1, ColorType(0.5, 0.5, 0.5))
+    glow = base.addLayer(Layer(4, 1, Layer.ADD))
+    shade = base.addLayer(Layer(4, 1, Layer.MULTIPLY, opacity=0.5))
+    glow.buff[0:2, 0] = (255, 0, 0)
+    glow.alpha[0, 0:2] = (1.0, 0.25)
+    shade.buff[1:3, 0] = (0, 0, 255)
+    shade.alpha[0, 1:3] = 1.0
+    print(base.flatten())
+    print(bytes(base.getBytes()))
+
+    # blend modes also apply per primitive batch on an opaque buff, without any layer
+    from Rasterizer import Rasterizer
+
+    opaque = Buff(8, 8, ColorType(0.5, 0.5, 0.5))
+    triangle = np.array([[[0, 0], [7, 0], [0, 7]]])
+    Rasterizer.drawTriangles(opaque, triangle, np.tile([1.0, 0.0, 0.0], (1, 3, 1)), blendMode=Layer.ADD)
+    assert opaque.buff[1, 1].tolist() == [255, 127, 127] and opaque.buff[7, 7].tolist() == [127, 127, 127]
+    Rasterizer.drawTriangles(opaque, triangle, np.full((1, 3, 3), 0.5), blendMode=Layer.MULTIPLY)
+    assert opaque.buff[1, 1].tolist() == [128, 64, 64] and opaque.buff[7, 7].tolist() == [127, 127, 127]
+    # edge pixels covered twice by the scan conversion are blended once
+    assert opaque.buff[0, 0].tolist() == [128, 64, 64]
+    print(opaque.data[:, :, 0])
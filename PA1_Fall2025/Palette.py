@@ -0,0 +1,115 @@
+"""
+Defines Palette class, a table of random colors drawn once from a seed. Colors are handed out by index, or in order
+from a cursor, so drawing with random colors gives the same image every time the same seed is used, and batches take
+their colors as slices of one NumPy array instead of calling random.random and building a ColorType per vertex.
+
+Indices wrap around the table, color i and color i + size are the same.
+"""
+
+import numpy as np
+
+from ColorType import ColorType
+
+
+class Palette:
+    """
+    Properties:
+        seed: int, seed the table is drawn from
+        table: numpy.ndarray[float64], shape (size, 3), rgb in [0, 1]
+        cursor: int, index of the next color handed out by next and take
+    """
+    seed = 0
+    table = None
+    cursor = 0
+
+    def __init__(self, seed=0, size=1024):
+        """
+        :param seed: seed of the random generator
+        :type seed: int
+        :param size: number of colors in the table
+        :type size: int
+        :rtype: None
+        """
+        if size <= 0:
+            raise ValueError("Palette size must be positive")
+        self.seed = seed
+        self.table = np.random.default_rng(seed).random((size, 3))
+        self.cursor = 0
+
+    def __len__(self):
+        return len(self.table)
+
+    def __repr__(self):
+        return "Palette(seed " + str(self.seed) + ", " + str(len(self)) + " colors)"
+
+    def reset(self):
+        """
+        Hand out colors from the first one again
+        """
+        self.cursor = 0
+
+    def reseed(self, seed):
+        """
+        Draw a new table of the same size from seed and hand out colors from the first one
+
+        :type seed: int
+        :rtype: None
+        """
+        self.__init__(seed, len(self))
+
+    def color(self, index):
+        """
+        Color at index, a new ColorType which can be changed freely
+
+        :type index: int
+        :rtype: ColorType
+        """
+        r, g, b = self.table[index % len(self)].tolist()
+        return ColorType(r, g, b)
+
+    def colors(self, indices):
+        """
+        Colors at indices, in bulk
+
+        :param indices: color indices of any shape
+        :type indices: numpy.ndarray[int]
+        :return: rgb in [0, 1], shape indices.shape + (3,)
+        :rtype: numpy.ndarray[float64]
+        """
+        return np.take(self.table, np.asarray(indices, dtype=np.int64), axis=0, mode="wrap")
+
+    def next(self):
+        """
+        Color at cursor, and move cursor to the next color
+
+        :rtype: ColorType
+        """
+        c = self.color(self.cursor)
+        self.cursor = (self.cursor + 1) % len(self)
+        return c
+
+    def take(self, n):
+        """
+        The next n colors from cursor, and move cursor after them. The result is a read-only view of table when it
+        does not wrap around
+
+        :param n: number of colors
+        :type n: int
+        :return: rgb in [0, 1], shape (n, 3)
+        :rtype: numpy.ndarray[float64]
+        """
+        start = self.cursor
+        self.cursor = (start + n) % len(self)
+        if start + n <= len(self):
+            colors = self.table[start:start + n]
+            colors.flags.writeable = False
+            return colors
+        return self.colors(np.arange(start, start + n))
+
+
+if __name__ == "__main__":
+    p = Palette(seed=480, size=8)
+    print(p, p.next(), p.next())
+    print(p.take(3))
+    p.reset()
+    print(p.next(), p.colors([[0, 1], [8, 9]]).shape)
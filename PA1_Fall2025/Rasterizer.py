@@ -0,0 +1,839 @@
+"""
+Vectorized rasterization routines for the PA1 canvas. Instead of creating one Point and one ColorType for every pixel,
+the functions here compute all covered pixels of a primitive (or of a whole list of primitives) as NumPy index and
+attribute arrays, and then write them into Buff.buff with a single fancy-indexed assignment.
+
+The triangle fill follows exactly the same scan conversion as Sketch.drawTriangle (split at the middle vertex, fill
+the two flat triangles row by row, round the span ends, interpolate color along the edges and then along the span),
+and fragments are emitted in the same order as the per-pixel path writes them. So both paths produce the same image,
+and Sketch.drawTriangle can stay as the reference implementation.
+Line segments are walked with the same Bresenham steps as Sketch.drawLine, all segments at once.
+
+Attributes are handled as float arrays with k channels. The first three channels are always RGB in [0, 1], any extra
+channels (e.g. texture coordinates) are interpolated in the same way.
+"""
+
+import numpy as np
+
+from Layer import Layer
+from TextureSampler import TextureSampler
+
+
+class Rasterizer:
+    """
+    A collection of static methods to rasterize primitives in batch
+    """
+
+    @staticmethod
+    def __walk(start, sign, length, clip_lo=None, clip_hi=None):
+        """
+        Enumerate the steps t in [0, length] of walks start + t * sign, all walks at once.
+        If clip_lo and clip_hi are given, only steps whose coordinate falls in [clip_lo, clip_hi) are kept.
+
+        :return: the index of the walk every step belongs to, and t of every step
+        :rtype: tuple[numpy.ndarray[int]]
+        """
+        t_lo = np.zeros_like(length)
+        t_hi = length
+        if clip_lo is not None:
+            t_lo = np.maximum(np.where(sign > 0, clip_lo - start, start - (clip_hi - 1)), 0)
+            t_hi = np.minimum(np.where(sign > 0, clip_hi - 1 - start, start - clip_lo), length)
+        counts = np.maximum(t_hi - t_lo + 1, 0)
+        index = np.repeat(np.arange(length.size), counts)
+        offsets = np.cumsum(counts) - counts
+        t = t_lo[index] + np.arange(int(counts.sum())) - offsets[index]
+        return index, t
+
+    @staticmethod
+    def __inside(xs, ys, clip):
+        """
+        Mask of coordinates inside clip rectangle (x_min, y_min, x_max, y_max), max values are exclusive
+        """
+        return (xs >= clip[0]) & (xs < clip[2]) & (ys >= clip[1]) & (ys < clip[3])
+
+    @staticmethod
+    def expandSpans(rows, x_start, x_end, attr_start, attr_end, clip=None):
+        """
+        Expand horizontal spans into pixels. Every span goes from x_start to x_end (both inclusive, in this direction)
+        on its row, and its attributes are linearly interpolated from attr_start to attr_end along the span.
+
+        :param rows: row (y coordinate) of every span
+        :type rows: numpy.ndarray[int]
+        :param x_start: first x coordinate of every span
+        :type x_start: numpy.ndarray[int]
+        :param x_end: last x coordinate of every span
+        :type x_end: numpy.ndarray[int]
+        :param attr_start: attributes at the first pixel, shape (n, k)
+        :type attr_start: numpy.ndarray[float]
+        :param attr_end: attributes at the last pixel, shape (n, k)
+        :type attr_end: numpy.ndarray[float]
+        :param clip: only keep pixels inside rectangle (x_min, y_min, x_max, y_max), max values are exclusive
+        :type clip: tuple[int]
+        :return: xs, ys and attributes of all pixels, in span order
+        :rtype: tuple[numpy.ndarray]
+        """
+        if clip is not None:
+            in_rows = (rows >= clip[1]) & (rows < clip[3])
+            rows, x_start, x_end = rows[in_rows], x_start[in_rows], x_end[in_rows]
+            attr_start, attr_end = attr_start[in_rows], attr_end[in_rows]
+        dx = np.abs(x_end - x_start)
+        direction = np.where(x_end >= x_start, 1, -1)
+        # t is the pixel offset inside its span
+        if clip is None:
+            span_index, t = Rasterizer.__walk(x_start, direction, dx)
+        else:
+            span_index, t = Rasterizer.__walk(x_start, direction, dx, clip[0], clip[2])
+
+        xs = x_start[span_index] + t * direction[span_index]
+        ys = rows[span_index]
+        # a single pixel span takes the start attribute, same as drawPoint in Sketch
+        progress = t / np.maximum(dx, 1)[span_index]
+        a = attr_start[span_index]
+        b = attr_end[span_index]
+        attrs = a + (b - a) * progress[:, None]
+        return xs, ys, attrs
+
+    @staticmethod
+    def triangleSpans(coords, attrs, doSmooth=True):
+        """
+        Set up all triangles at once, without a loop over triangles. Every triangle is split at its middle vertex into
+        flat triangles like Sketch.drawTriangle does, and every flat triangle becomes horizontal spans in the order
+        Sketch.drawTriangle fills it: the horizontal edge, the apex as a one pixel span, then one span per row from the
+        horizontal edge towards the apex. Expanding the spans with expandSpans gives the fragments of all triangles in
+        submission order.
+        When doSmooth is False, a whole triangle takes the attributes of its third vertex, same as Sketch.drawTriangle
+
+        :param coords: triangle vertex coordinates, shape (n, 3, 2)
+        :type coords: numpy.ndarray[int]
+        :param attrs: triangle vertex attributes, shape (n, 3, k)
+        :type attrs: numpy.ndarray[float]
+        :param doSmooth: interpolate attributes or not
+        :type doSmooth: bool
+        :return: rows, x_start, x_end, attr_start, attr_end of all spans, and the triangle every span belongs to
+        :rtype: tuple[numpy.ndarray]
+        """
+        coords = np.asarray(coords, dtype=np.int64).reshape(-1, 3, 2)
+        attrs = np.asarray(attrs, dtype=np.float64)
+        attrs = attrs.reshape(coords.shape[0], 3, attrs.shape[-1])
+        n = coords.shape[0]
+
+        # vertices sorted by y, ties keep the submitted order
+        order = np.argsort(coords[:, :, 1], axis=1, kind="stable")
+        v = np.take_along_axis(coords, order[:, :, None], axis=1)
+        a = np.take_along_axis(attrs, order[:, :, None], axis=1)
+        x1, y1, x2, y2, x3, y3 = v[:, 0, 0], v[:, 0, 1], v[:, 1, 0], v[:, 1, 1], v[:, 2, 0], v[:, 2, 1]
+        a1, a2, a3 = a[:, 0], a[:, 1], a[:, 2]
+        flat_bottom = y1 == y2
+        flat_top = ~flat_bottom & (y2 == y3)
+        split = ~flat_bottom & ~flat_top
+
+        # middle point on the long edge of split triangles
+        height = np.where(split, y3 - y1, 1)
+        x_mid = np.round((y2 - y1) * (x3 - x1) / height + x1).astype(np.int64)
+        mid = (a3 - a1) * ((y2 - y1) / height)[:, None] + a1
+
+        # first flat triangle of every triangle: horizontal edge from start to end, then rows towards apex
+        flat_bottom_ = flat_bottom[:, None]
+        start_x = np.where(flat_bottom, x1, np.where(flat_top, x3, x_mid))
+        start_y = np.where(flat_bottom, y1, y2)
+        apex_x = np.where(flat_bottom, x3, x1)
+        apex_y = np.where(flat_bottom, y3, y1)
+        start_attr = np.where(flat_bottom_, a1, np.where(flat_top[:, None], a3, mid))
+        apex_attr = np.where(flat_bottom_, a3, a1)
+        # second flat triangle of split triangles, below the first one
+        pieces = np.r_[np.arange(n), np.flatnonzero(split)]
+        second = np.r_[np.zeros(n, dtype=bool), np.ones(pieces.size - n, dtype=bool)]
+        # pieces of the same triangle are next to each other, first one first
+        sort = np.argsort(pieces * 2 + second, kind="stable")
+        pieces, second = pieces[sort], second[sort]
+        second_ = second[:, None]
+
+        sx = np.where(second, x2[pieces], start_x[pieces])
+        sy = start_y[pieces]
+        ex = np.where(second, x_mid[pieces], x2[pieces])
+        ax = np.where(second, x3[pieces], apex_x[pieces])
+        ay = np.where(second, y3[pieces], apex_y[pieces])
+        s_attr = np.where(second_, a2[pieces], start_attr[pieces])
+        e_attr = np.where(second_, mid[pieces], a2[pieces])
+        a_attr = np.where(second_, a3[pieces], apex_attr[pieces])
+        if not doSmooth:
+            # split triangles take the attributes of their third vertex as well, the middle point is not used
+            s_attr = e_attr = a_attr = attrs[pieces, 2]
+
+        # spans of every piece: horizontal edge, apex, then one per row
+        rows_count = np.abs(ay - sy)
+        counts = rows_count + 2
+        piece = np.repeat(np.arange(pieces.size), counts)
+        j = np.arange(int(counts.sum())) - np.repeat(np.cumsum(counts) - counts, counts)
+        is_edge = (j == 0)
+        is_apex = (j == 1)
+        sy_, ay_ = sy[piece], ay[piece]
+        step = np.where(ay_ >= sy_, 1, -1)
+        rows = np.where(is_apex, ay_, sy_ + np.maximum(j - 2, 0) * step)
+
+        denominator = np.where(rows_count > 0, ay - sy, 1)
+        slope_left = ((ax - sx) / denominator)[piece]
+        slope_right = ((ax - ex) / denominator)[piece]
+        offset = rows - sy_
+        x_left = np.round(offset * slope_left + sx[piece]).astype(np.int64)
+        x_right = np.round(offset * slope_right + ex[piece]).astype(np.int64)
+        progress = (offset / denominator[piece])[:, None]
+        s_, e_, a_ = s_attr[piece], e_attr[piece], a_attr[piece]
+        attr_left = (a_ - s_) * progress + s_
+        attr_right = (a_ - e_) * progress + e_
+
+        is_edge_, is_apex_ = is_edge[:, None], is_apex[:, None]
+        x_start = np.where(is_edge, sx[piece], np.where(is_apex, ax[piece], x_left))
+        x_end = np.where(is_edge, ex[piece], np.where(is_apex, ax[piece], x_right))
+        attr_start = np.where(is_edge_, s_, np.where(is_apex_, a_, attr_left))
+        attr_end = np.where(is_edge_, e_, np.where(is_apex_, a_, attr_right))
+        return rows, x_start, x_end, attr_start, attr_end, pieces[piece]
+
+    @staticmethod
+    def triangleFragments(vertices, attrs, doSmooth=True, clip=None):
+        """
+        Compute all fragments of one triangle, in the same order Sketch.drawTriangle writes them.
+        When doSmooth is False, the whole triangle takes the attributes of the third vertex, same as Sketch.drawTriangle
+
+        :param vertices: three vertices as (x, y) integer pairs
+        :type vertices: list[tuple[int]]
+        :param attrs: vertex attributes, shape (3, k)
+        :type attrs: numpy.ndarray[float]
+        :param doSmooth: interpolate attributes or not
+        :type doSmooth: bool
+        :param clip: only keep fragments inside rectangle (x_min, y_min, x_max, y_max), max values are exclusive
+        :type clip: tuple[int]
+        :return: xs, ys and attributes of all fragments
+        :rtype: tuple[numpy.ndarray]
+        """
+        return Rasterizer.trianglesFragments([vertices], [attrs], doSmooth, clip)
+
+    @staticmethod
+    def trianglesFragments(coords, attrs, doSmooth=True, clip=None):
+        """
+        Fragments of a list of triangles, concatenated in submission order
+
+        :param coords: triangle vertex coordinates, shape (n, 3, 2)
+        :type coords: numpy.ndarray[int]
+        :param attrs: triangle vertex attributes, shape (n, 3, k)
+        :type attrs: numpy.ndarray[float]
+        :param doSmooth: interpolate attributes or not
+        :type doSmooth: bool
+        :param clip: only keep fragments inside this rectangle
+        :type clip: tuple[int]
+        :rtype: tuple[numpy.ndarray]
+        """
+        rows, x_start, x_end, attr_start, attr_end, _ = Rasterizer.triangleSpans(coords, attrs, doSmooth)
+        return Rasterizer.expandSpans(rows, x_start, x_end, attr_start, attr_end, clip)
+
+    @staticmethod
+    def polygonFragments(coords, attrs, doSmooth=True, clip=None, evenOdd=True):
+        """
+        Fragments of one closed polygon, convex or concave, filled with a scanline edge table.
+        Every edge is set up once and intersected with all rows it spans, the crossings are sorted by row and x, and
+        the fill rule decides which spans between neighbour crossings are inside. A pixel (x, y) is inside if it lies
+        on the half-open spans [x_a, x_b) of rows [y_min, y_max) of the edges, so polygons sharing an edge never
+        both draw the pixels on it.
+
+        :param coords: polygon vertex coordinates in order, shape (n, 2). The last vertex connects to the first
+        :type coords: numpy.ndarray[int]
+        :param attrs: vertex attributes, shape (n, k)
+        :type attrs: numpy.ndarray[float]
+        :param doSmooth: interpolate attributes along edges and spans, otherwise use the first vertex attributes
+        :type doSmooth: bool
+        :param clip: only keep fragments inside rectangle (x_min, y_min, x_max, y_max), max values are exclusive
+        :type clip: tuple[int]
+        :param evenOdd: use even-odd fill rule, otherwise non-zero winding rule
+        :type evenOdd: bool
+        :return: xs, ys and attributes of all fragments, row by row
+        :rtype: tuple[numpy.ndarray]
+        """
+        coords = np.asarray(coords, dtype=np.int64).reshape(-1, 2)
+        attrs = np.asarray(attrs, dtype=np.float64).reshape(coords.shape[0], -1)
+        if not doSmooth:
+            attrs = np.broadcast_to(attrs[0], attrs.shape)
+        empty = (np.zeros(0, dtype=np.int64), np.zeros(0, dtype=np.int64), np.zeros((0, attrs.shape[1])))
+        if coords.shape[0] < 3:
+            return empty
+
+        # edge table, horizontal edges never cross a row
+        p0, p1 = coords, np.roll(coords, -1, axis=0)
+        a0, a1 = attrs, np.roll(attrs, -1, axis=0)
+        sloped = p0[:, 1] != p1[:, 1]
+        p0, p1, a0, a1 = p0[sloped], p1[sloped], a0[sloped], a1[sloped]
+        y_lo = np.minimum(p0[:, 1], p1[:, 1])
+        y_hi = np.maximum(p0[:, 1], p1[:, 1])
+        if clip is not None:
+            y_lo = np.maximum(y_lo, clip[1])
+            y_hi = np.minimum(y_hi, clip[3])
+        counts = np.maximum(y_hi - y_lo, 0)
+        edge = np.repeat(np.arange(counts.size), counts)
+        rows = y_lo[edge] + np.arange(int(counts.sum())) - (np.cumsum(counts) - counts)[edge]
+        if rows.size == 0:
+            return empty
+
+        # crossing of every edge with every row it spans
+        t = (rows - p0[edge, 1]) / (p1[edge, 1] - p0[edge, 1])
+        xs = p0[edge, 0] + (p1[edge, 0] - p0[edge, 0]) * t
+        values = a0[edge] + (a1[edge] - a0[edge]) * t[:, None]
+        winding = np.where(p1[edge, 1] > p0[edge, 1], 1, -1)
+        order = np.lexsort((xs, rows))
+        rows, xs, values, winding = rows[order], xs[order], values[order], winding[order]
+
+        # every row holds an even number of crossings with zero total winding, so a running count over all rows
+        # restarts at every row
+        if evenOdd:
+            inside = np.arange(1, rows.size + 1) % 2 == 1
+        else:
+            inside = np.cumsum(winding) != 0
+        span = np.flatnonzero(inside[:-1] & (rows[:-1] == rows[1:]))
+        x_a, x_b = xs[span], xs[span + 1]
+        x_start = np.ceil(x_a).astype(np.int64)
+        x_end = np.ceil(x_b).astype(np.int64) - 1
+        filled = x_end >= x_start
+        span, x_a, x_b, x_start, x_end = span[filled], x_a[filled], x_b[filled], x_start[filled], x_end[filled]
+
+        # attributes at the first and last pixel of every span, interpolated between its crossings
+        width = np.maximum(x_b - x_a, 1e-12)[:, None]
+        v_a, v_b = values[span], values[span + 1]
+        attr_start = v_a + (v_b - v_a) * ((x_start - x_a)[:, None] / width)
+        attr_end = v_a + (v_b - v_a) * ((x_end - x_a)[:, None] / width)
+        return Rasterizer.expandSpans(rows[span], x_start, x_end, attr_start, attr_end, clip)
+
+    @staticmethod
+    def lineFragments(starts, ends, colorStart, colorEnd, doSmooth=True, clip=None):
+        """
+        Compute all fragments of a list of line segments with the same Bresenham walk as Sketch.drawLine.
+        The walk steps along the major axis, and the minor coordinate after t steps is given in closed form by
+        floor((2 * d_minor * t + d_major) / (2 * d_major)), which is where the Bresenham error term crosses zero.
+
+        :param starts: segment start coordinates, shape (n, 2)
+        :type starts: numpy.ndarray[int]
+        :param ends: segment end coordinates, shape (n, 2)
+        :type ends: numpy.ndarray[int]
+        :param colorStart: colors at segment starts in [0, 1], shape (n, 3)
+        :type colorStart: numpy.ndarray[float]
+        :param colorEnd: colors at segment ends in [0, 1], shape (n, 3)
+        :type colorEnd: numpy.ndarray[float]
+        :param doSmooth: interpolate color along the segment or use the start color
+        :type doSmooth: bool
+        :param clip: only keep fragments inside rectangle (x_min, y_min, x_max, y_max), max values are exclusive
+        :type clip: tuple[int]
+        :return: xs, ys, colors of all fragments and the index of the segment each fragment belongs to
+        :rtype: tuple[numpy.ndarray]
+        """
+        starts = np.asarray(starts, dtype=np.int64).reshape(-1, 2)
+        ends = np.asarray(ends, dtype=np.int64).reshape(-1, 2)
+        colorStart = np.asarray(colorStart, dtype=np.float64).reshape(-1, 3)
+        colorEnd = np.asarray(colorEnd, dtype=np.float64).reshape(-1, 3)
+
+        delta = ends - starts
+        # swap x and y based on slope, same as drawLine
+        swap = np.abs(delta[:, 0]) < np.abs(delta[:, 1])
+        d_major = np.where(swap, np.abs(delta[:, 1]), np.abs(delta[:, 0]))
+        d_minor = np.where(swap, np.abs(delta[:, 0]), np.abs(delta[:, 1]))
+        sign = np.where(delta >= 0, 1, -1)
+
+        a_start = np.where(swap, starts[:, 1], starts[:, 0])
+        a_sign = np.where(swap, sign[:, 1], sign[:, 0])
+        if clip is None:
+            segment, t = Rasterizer.__walk(a_start, a_sign, d_major)
+        else:
+            # only walk the steps whose major coordinate is inside clip
+            segment, t = Rasterizer.__walk(a_start, a_sign, d_major,
+                                           np.where(swap, clip[1], clip[0]), np.where(swap, clip[3], clip[2]))
+
+        major = d_major[segment]
+        k = (2 * d_minor[segment] * t + major) // (2 * np.maximum(major, 1))
+        seg_swap = swap[segment]
+        step_x = np.where(seg_swap, k, t)
+        step_y = np.where(seg_swap, t, k)
+        xs = starts[segment, 0] + step_x * sign[segment, 0]
+        ys = starts[segment, 1] + step_y * sign[segment, 1]
+
+        c1 = colorStart[segment]
+        if doSmooth:
+            progress = t / np.maximum(major, 1)
+            colors = c1 + (colorEnd[segment] - c1) * progress[:, None]
+        else:
+            colors = c1
+        if clip is not None:
+            inside = Rasterizer.__inside(xs, ys, clip)
+            return xs[inside], ys[inside], colors[inside], segment[inside]
+        return xs, ys, colors, segment
+
+    @staticmethod
+    def coverageLineFragments(starts, ends, colorStart, colorEnd, doSmooth=True, clip=None):
+        """
+        Anti-aliased line fragments with analytic (Wu style) coverage. The segment is walked one pixel at a time along
+        its major axis, and at every step the exact minor coordinate of the line is split between the two pixels it
+        falls in, weighted by distance. Endpoints are pixel centers, so the line has full coverage along its length.
+        The number of fragments is at most twice the segment length, so the cost does not depend on any AA level.
+
+        :param starts: segment start coordinates, shape (n, 2)
+        :type starts: numpy.ndarray[int]
+        :param ends: segment end coordinates, shape (n, 2)
+        :type ends: numpy.ndarray[int]
+        :param colorStart: colors at segment starts in [0, 1], shape (n, 3)
+        :type colorStart: numpy.ndarray[float]
+        :param colorEnd: colors at segment ends in [0, 1], shape (n, 3)
+        :type colorEnd: numpy.ndarray[float]
+        :param doSmooth: interpolate color along the segment or use the start color
+        :type doSmooth: bool
+        :param clip: only keep fragments inside rectangle (x_min, y_min, x_max, y_max), max values are exclusive
+        :type clip: tuple[int]
+        :return: xs, ys, colors, coverage of all fragments and the index of the segment each fragment belongs to
+        :rtype: tuple[numpy.ndarray]
+        """
+        starts = np.asarray(starts, dtype=np.int64).reshape(-1, 2)
+        ends = np.asarray(ends, dtype=np.int64).reshape(-1, 2)
+        colorStart = np.asarray(colorStart, dtype=np.float64).reshape(-1, 3)
+        colorEnd = np.asarray(colorEnd, dtype=np.float64).reshape(-1, 3)
+
+        delta = ends - starts
+        swap = np.abs(delta[:, 0]) < np.abs(delta[:, 1])
+        d_major = np.where(swap, delta[:, 1], delta[:, 0])
+        d_minor = np.where(swap, delta[:, 0], delta[:, 1])
+        a_start = np.where(swap, starts[:, 1], starts[:, 0])
+        b_start = np.where(swap, starts[:, 0], starts[:, 1])
+        length = np.abs(d_major)
+        gradient = d_minor / np.maximum(length, 1)
+        sign = np.where(d_major >= 0, 1, -1)
+
+        if clip is None:
+            segment, t = Rasterizer.__walk(a_start, sign, length)
+        else:
+            segment, t = Rasterizer.__walk(a_start, sign, length,
+                                           np.where(swap, clip[1], clip[0]), np.where(swap, clip[3], clip[2]))
+        total = t.size
+
+        major = a_start[segment] + t * sign[segment]
+        minor = b_start[segment] + t * gradient[segment]
+        minor_floor = np.floor(minor)
+        fraction = minor - minor_floor
+        minor_floor = minor_floor.astype(np.int64)
+
+        c1 = colorStart[segment]
+        if doSmooth:
+            progress = t / np.maximum(length, 1)[segment]
+            colors = c1 + (colorEnd[segment] - c1) * progress[:, None]
+        else:
+            colors = c1
+
+        # two fragments per step, the second one is dropped when the line runs exactly through a pixel center
+        major = np.repeat(major, 2)
+        minor = np.repeat(minor_floor, 2) + np.tile([0, 1], total)
+        coverage = np.stack([1 - fraction, fraction], axis=1).reshape(-1)
+        seg_swap = np.repeat(swap[segment], 2)
+        xs = np.where(seg_swap, minor, major)
+        ys = np.where(seg_swap, major, minor)
+        keep = coverage > 0
+        if clip is not None:
+            keep &= Rasterizer.__inside(xs, ys, clip)
+        xs, ys = xs[keep], ys[keep]
+        return xs, ys, np.repeat(colors, 2, axis=0)[keep], coverage[keep], np.repeat(segment, 2)[keep]
+
+    @staticmethod
+    def blendFragments(buff, xs, ys, rgb, coverage, blendMode=Layer.OVER):
+        """
+        Blend fragments over the existing buff content, result = (1 - coverage) * buff + coverage * color for
+        Layer.OVER, see Layer.blend for the other blend modes.
+        Fragments are applied in order, so overlapping fragments blend over each other the same way as blending them
+        one by one. This is done in rounds: the k-th fragment on every pixel is blended in the k-th round.
+        On a layer, fragments are composited over its content with alpha: coverage is accumulated into layer alpha,
+        and colors are weighted by the alpha already there. The blend mode of a layer is applied by Buff.flatten.
+
+        :param buff: The buff to edit
+        :type buff: Buff
+        :param xs: x coordinates of fragments
+        :type xs: numpy.ndarray[int]
+        :param ys: y coordinates of fragments
+        :type ys: numpy.ndarray[int]
+        :param rgb: fragment colors in [0, 1], shape (n, 3)
+        :type rgb: numpy.ndarray[float]
+        :param coverage: fragment coverage in [0, 1]
+        :type coverage: numpy.ndarray[float]
+        :param blendMode: Layer.OVER, Layer.ADD or Layer.MULTIPLY, only Layer.OVER is allowed on a layer
+        :type blendMode: str
+        :rtype: None
+        """
+        if buff.alpha is not None and blendMode != Layer.OVER:
+            raise ValueError("Fragments on a layer can only be blended with over, set blend mode of the layer instead")
+        inside = (xs >= 0) & (xs < buff.width) & (ys >= 0) & (ys < buff.height)
+        xs, ys, rgb, coverage = xs[inside], ys[inside], rgb[inside], coverage[inside]
+        if xs.size == 0:
+            return
+
+        # rank of every fragment among the fragments on the same pixel
+        keys = xs * buff.height + ys
+        order = np.argsort(keys, kind="stable")
+        sorted_keys = keys[order]
+        group_start = np.r_[0, np.flatnonzero(sorted_keys[1:] != sorted_keys[:-1]) + 1]
+        group_size = np.diff(np.r_[group_start, sorted_keys.size])
+        rank = np.empty(keys.size, dtype=np.int64)
+        rank[order] = np.arange(keys.size) - np.repeat(group_start, group_size)
+
+        src = rgb * 255
+        for r in range(int(rank.max()) + 1):
+            index = np.flatnonzero(rank == r)
+            x, y, a = xs[index], ys[index], coverage[index, None]
+            dst = buff.buff[x, y, :].astype(np.float64)
+            if buff.alpha is not None:
+                # straight alpha "over": the content below counts with its own alpha
+                dst_a = buff.alpha[y, x, None].astype(np.float64)
+                out_a = a + dst_a * (1 - a)
+                out = (src[index] * a + dst * dst_a * (1 - a)) / np.maximum(out_a, 1e-12)
+                buff.alpha[y, x] = out_a[:, 0]
+            else:
+                out = Layer.blend(dst, src[index], a, blendMode)
+            buff.buff[x, y, :] = np.clip(np.round(out), 0, 255).astype(np.uint8)
+        buff.markDirtyPixels(xs, ys, xs.size)
+
+    @staticmethod
+    def drawLines(buff, starts, ends, colors, endColors=None, doSmooth=True, doAA=False, doAAlevel=4, clip=None,
+                  depths=None, owner=None, order=None, blendMode=Layer.OVER):
+        """
+        Draw a list of line segments to buff with one write. The result is the same as calling Sketch.drawLine on
+        every segment in order. Anti-aliased segments are blended over the buff content with analytic coverage.
+
+        :param buff: The buff to edit
+        :type buff: Buff
+        :param starts: segment start coordinates, shape (n, 2)
+        :type starts: numpy.ndarray[int]
+        :param ends: segment end coordinates, shape (n, 2)
+        :type ends: numpy.ndarray[int]
+        :param colors: colors at segment starts in [0, 1], shape (n, 3)
+        :type colors: numpy.ndarray[float]
+        :param endColors: colors at segment ends in [0, 1], shape (n, 3). Use colors if not given
+        :type endColors: numpy.ndarray[float]
+        :param doSmooth: Control flag of color smooth interpolation
+        :type doSmooth: bool
+        :param doAA: Control flag of doing anti-aliasing
+        :type doAA: bool
+        :param doAAlevel: kept for compatibility, coverage anti-aliasing has no super sampling level
+        :type doAAlevel: int
+        :param clip: only draw inside rectangle (x_min, y_min, x_max, y_max), max values are exclusive
+        :type clip: tuple[int]
+        :param depths: depth at segment starts and ends, shape (n, 2). If given and buff has a depth plane, fragments
+                       are depth tested. Anti-aliased fragments are blended but don't write depth
+        :type depths: numpy.ndarray[float]
+        :param owner: index of the last triangle filled on every pixel, shape (height, width), see drawTriangleSpans.
+                      If given, fragments of segment i are dropped on pixels filled by a triangle after order[i], as
+                      that fill would have covered them when drawing one triangle after another
+        :type owner: numpy.ndarray[int]
+        :param order: index of the triangle every segment belongs to, shape (n,). Required with owner
+        :type order: numpy.ndarray[int]
+        :param blendMode: Layer.OVER, Layer.ADD or Layer.MULTIPLY. Anti-aliased fragments are blended with it and
+                          their coverage, other fragments are written for Layer.OVER and blended with full coverage
+                          otherwise
+        :type blendMode: str
+        :rtype: None
+        """
+        if endColors is None:
+            endColors = colors
+        doDepth = depths is not None and buff.depth is not None
+        if doAA:
+            xs, ys, rgb, coverage, segment = Rasterizer.coverageLineFragments(starts, ends, colors, endColors,
+                                                                              doSmooth, clip)
+            if owner is not None:
+                keep = Rasterizer.__notCovered(buff, xs, ys, np.asarray(order)[segment], owner)
+                xs, ys, rgb, coverage, segment = xs[keep], ys[keep], rgb[keep], coverage[keep], segment[keep]
+            if doDepth:
+                keep = Rasterizer.depthTestFragments(buff, xs, ys, Rasterizer.__lineDepths(
+                    starts, ends, depths, xs, ys, segment), False)
+                xs, ys, rgb, coverage = xs[keep], ys[keep], rgb[keep], coverage[keep]
+            Rasterizer.blendFragments(buff, xs, ys, rgb, coverage, blendMode)
+        else:
+            xs, ys, rgb, segment = Rasterizer.lineFragments(starts, ends, colors, endColors, doSmooth, clip)
+            if owner is not None:
+                keep = Rasterizer.__notCovered(buff, xs, ys, np.asarray(order)[segment], owner)
+                xs, ys, rgb, segment = xs[keep], ys[keep], rgb[keep], segment[keep]
+            if doDepth:
+                keep = Rasterizer.depthTestFragments(buff, xs, ys, Rasterizer.__lineDepths(
+                    starts, ends, depths, xs, ys, segment))
+                xs, ys, rgb = xs[keep], ys[keep], rgb[keep]
+            Rasterizer.putFragments(buff, xs, ys, rgb, blendMode)
+
+    @staticmethod
+    def __notCovered(buff, xs, ys, triangle, owner):
+        """
+        Mask of fragments which are not covered by a later triangle fill, fragments outside of buff are dropped
+        """
+        inside = (xs >= 0) & (xs < buff.width) & (ys >= 0) & (ys < buff.height)
+        keep = np.zeros(xs.size, dtype=bool)
+        keep[inside] = triangle[inside] >= owner[ys[inside], xs[inside]]
+        return keep
+
+    @staticmethod
+    def __lineDepths(starts, ends, depths, xs, ys, segment):
+        """
+        Depth of line fragments, interpolated by the fragment position along the major axis of its segment
+        """
+        starts = np.asarray(starts, dtype=np.int64).reshape(-1, 2)
+        ends = np.asarray(ends, dtype=np.int64).reshape(-1, 2)
+        depths = np.asarray(depths, dtype=np.float64).reshape(-1, 2)
+        length = np.abs(ends - starts).max(axis=1)[segment]
+        s = starts[segment]
+        progress = np.maximum(np.abs(xs - s[:, 0]), np.abs(ys - s[:, 1])) / np.maximum(length, 1)
+        z = depths[segment]
+        return z[:, 0] + (z[:, 1] - z[:, 0]) * np.minimum(progress, 1)
+
+    @staticmethod
+    def depthTestFragments(buff, xs, ys, zs, writeDepth=True):
+        """
+        Depth test fragments against buff.depth in bulk, a fragment passes if it is nearer (smaller) than or as near as
+        the stored depth, like GL_LEQUAL. The result is the same as testing and storing fragments one by one in order:
+        on a pixel hit by several fragments only the nearest one, the last one of equal depths, is kept, because it
+        covers the others.
+        If writeDepth is False, every fragment passing the stored depth is kept and nothing is stored, which is what
+        blended fragments need.
+
+        :param buff: The buff with a depth plane
+        :type buff: Buff
+        :param xs: x coordinates of fragments
+        :type xs: numpy.ndarray[int]
+        :param ys: y coordinates of fragments
+        :type ys: numpy.ndarray[int]
+        :param zs: depth of fragments
+        :type zs: numpy.ndarray[float]
+        :param writeDepth: store depth of passed fragments
+        :type writeDepth: bool
+        :return: mask of passed fragments
+        :rtype: numpy.ndarray[bool]
+        """
+        keep = (xs >= 0) & (xs < buff.width) & (ys >= 0) & (ys < buff.height)
+        index = np.flatnonzero(keep)
+        index = index[zs[index] <= buff.depth[ys[index], xs[index]]]
+        if writeDepth and index.size > 0:
+            # nearest fragment of every pixel, ties go to the latest one
+            keys = ys[index] * buff.width + xs[index]
+            order = np.lexsort((-index, zs[index], keys))
+            sorted_keys = keys[order]
+            first = np.r_[True, sorted_keys[1:] != sorted_keys[:-1]]
+            index = index[order[first]]
+            buff.depth[ys[index], xs[index]] = zs[index]
+        keep = np.zeros(xs.shape, dtype=bool)
+        keep[index] = True
+        return keep
+
+    @staticmethod
+    def __lastPerPixel(buff, xs, ys):
+        """
+        Index of the last fragment on every covered pixel, the first occurrence in reversed order
+        """
+        _, last = np.unique((ys * buff.width + xs)[::-1], return_index=True)
+        return xs.size - 1 - last
+
+    @staticmethod
+    def putFragments(buff, xs, ys, rgb, blendMode=Layer.OVER):
+        """
+        Put opaque fragments on buff with a blend mode: write them for Layer.OVER, which is the same as blending with
+        full coverage, and blend them with full coverage for Layer.ADD and Layer.MULTIPLY. The batch is blended like
+        one image: a pixel covered by several fragments is blended once, with the last of them
+
+        :param buff: The buff to edit
+        :type buff: Buff
+        :param xs: x coordinates of fragments
+        :type xs: numpy.ndarray[int]
+        :param ys: y coordinates of fragments
+        :type ys: numpy.ndarray[int]
+        :param rgb: fragment colors in [0, 1], shape (n, 3)
+        :type rgb: numpy.ndarray[float]
+        :param blendMode: Layer.OVER, Layer.ADD or Layer.MULTIPLY
+        :type blendMode: str
+        :rtype: None
+        """
+        if blendMode == Layer.OVER:
+            Rasterizer.writeFragments(buff, xs, ys, rgb)
+            return
+        inside = (xs >= 0) & (xs < buff.width) & (ys >= 0) & (ys < buff.height)
+        last = Rasterizer.__lastPerPixel(buff, xs[inside], ys[inside])
+        Rasterizer.blendFragments(buff, xs[inside][last], ys[inside][last], rgb[inside][last], np.ones(last.size),
+                                  blendMode)
+
+    @staticmethod
+    def writeFragments(buff, xs, ys, rgb):
+        """
+        Write fragments to buff with one fancy-indexed assignment. Fragments outside of buff are dropped.
+        When several fragments cover the same pixel, the last one wins, same as drawing them one by one.
+        On a layer, written pixels become opaque.
+
+        :param buff: The buff to edit
+        :type buff: Buff
+        :param xs: x coordinates of fragments
+        :type xs: numpy.ndarray[int]
+        :param ys: y coordinates of fragments
+        :type ys: numpy.ndarray[int]
+        :param rgb: fragment colors in [0, 1], shape (n, 3)
+        :type rgb: numpy.ndarray[float]
+        :rtype: None
+        """
+        inside = (xs >= 0) & (xs < buff.width) & (ys >= 0) & (ys < buff.height)
+        xs, ys, rgb = xs[inside], ys[inside], rgb[inside]
+        if xs.size == 0:
+            return
+        # numpy leaves the order of duplicate indices in an assignment undefined, so keep the last fragment of every
+        # pixel explicitly
+        last = Rasterizer.__lastPerPixel(buff, xs, ys)
+        xs, ys, rgb = xs[last], ys[last], rgb[last]
+        # cast to uint8 in the same way as Sketch.drawPoint does
+        buff.buff[xs, ys, :] = (rgb * 255).astype(np.uint8)
+        if buff.alpha is not None:
+            buff.alpha[ys, xs] = 1
+        buff.markDirtyPixels(xs, ys, xs.size)
+
+    @staticmethod
+    def drawTriangles(buff, coords, colors, doSmooth=True, uvs=None, texture=None,
+                      textureFilter=TextureSampler.NEAREST, clip=None, ws=None, depths=None, owner=None,
+                      blendMode=Layer.OVER):
+        """
+        Draw a list of triangles to buff with one write. If uvs and texture are given, the triangles are texture
+        mapped, otherwise they are filled with vertex colors.
+
+        :param buff: The buff to edit
+        :type buff: Buff
+        :param coords: triangle vertex coordinates, shape (n, 3, 2)
+        :type coords: numpy.ndarray[int]
+        :param colors: triangle vertex colors in [0, 1], shape (n, 3, 3)
+        :type colors: numpy.ndarray[float]
+        :param doSmooth: interpolate vertex colors or not
+        :type doSmooth: bool
+        :param uvs: texture coordinates in [0, 1], shape (n, 3, 2)
+        :type uvs: numpy.ndarray[float]
+        :param texture: The texture to sample from, pass a TextureSampler with mipmaps for mipmapped filters
+        :type texture: Buff or TextureSampler
+        :param textureFilter: TextureSampler.NEAREST, BILINEAR, NEAREST_MIPMAP or TRILINEAR
+        :type textureFilter: str
+        :param clip: only draw inside rectangle (x_min, y_min, x_max, y_max), max values are exclusive
+        :type clip: tuple[int]
+        :param ws: clip space w of every vertex, shape (n, 3). If given, texture coordinates are interpolated
+                   perspective correct, by interpolating uv / w and 1 / w linearly in screen space
+        :type ws: numpy.ndarray[float]
+        :param depths: depth of every vertex, shape (n, 3). If given and buff has a depth plane, depth is interpolated
+                       and fragments are depth tested, so triangles don't need to be sorted
+        :type depths: numpy.ndarray[float]
+        :param owner: see drawTriangleSpans
+        :type owner: numpy.ndarray[int]
+        :param blendMode: Layer.OVER writes fragments, Layer.ADD or Layer.MULTIPLY blends the whole batch onto buff
+                          with full coverage, see blendFragments
+        :type blendMode: str
+        :rtype: None
+        """
+        spans, shading = Rasterizer.setupTriangles(coords, colors, doSmooth, uvs, texture, textureFilter, ws,
+                                                   depths if buff.depth is not None else None)
+        Rasterizer.drawTriangleSpans(buff, spans, shading, clip, owner, blendMode)
+
+    @staticmethod
+    def setupTriangles(coords, colors, doSmooth=True, uvs=None, texture=None, textureFilter=TextureSampler.NEAREST,
+                       ws=None, depths=None):
+        """
+        Set up a list of triangles once for drawTriangleSpans: gather the vertex attributes to interpolate and turn
+        all triangles into spans, see triangleSpans. Parameters are the same as drawTriangles, depths are used
+        whenever they are given.
+
+        :return: spans, and the shading of their fragments (sampler, textureFilter, perspective, doDepth)
+        :rtype: tuple
+        """
+        colors = np.asarray(colors, dtype=np.float64).reshape(-1, 3, 3)
+        doTexture = uvs is not None and texture is not None
+        doDepth = depths is not None
+        if not doTexture and not doDepth:
+            return Rasterizer.triangleSpans(coords, colors, doSmooth), (None, textureFilter, False, False)
+
+        # other attributes are always interpolated, so a flat color is interpolated between equal values
+        if not doSmooth:
+            colors = np.repeat(colors[:, 2:3], 3, axis=1)
+        attrs = [colors]
+        sampler = None
+        if doTexture:
+            sampler = texture if isinstance(texture, TextureSampler) else \
+                TextureSampler(texture, textureFilter in TextureSampler.MIPMAP_FILTERS)
+            uvs = np.asarray(uvs, dtype=np.float64).reshape(-1, 3, 2)
+            if ws is not None:
+                inverse_w = 1 / np.asarray(ws, dtype=np.float64).reshape(-1, 3, 1)
+                attrs += [uvs * inverse_w, inverse_w]
+            else:
+                attrs.append(uvs)
+            if textureFilter in TextureSampler.MIPMAP_FILTERS:
+                # one lod for every triangle, carried to its fragments as a constant attribute
+                lod = sampler.triangleLod(coords, uvs)
+                attrs.append(np.repeat(lod[:, None, None], 3, axis=1))
+        if doDepth:
+            attrs.append(np.asarray(depths, dtype=np.float64).reshape(-1, 3, 1))
+        spans = Rasterizer.triangleSpans(coords, np.concatenate(attrs, axis=2), True)
+        return spans, (sampler, textureFilter, ws is not None, doDepth)
+
+    @staticmethod
+    def drawTriangleSpans(buff, spans, shading, clip=None, owner=None, blendMode=Layer.OVER):
+        """
+        Expand spans set up by setupTriangles, shade their fragments and write them to buff. Any subset of the spans
+        can be drawn, as long as it keeps their order
+
+        :param buff: The buff to edit
+        :type buff: Buff
+        :param spans: spans from setupTriangles
+        :type spans: tuple[numpy.ndarray]
+        :param shading: shading from setupTriangles
+        :type shading: tuple
+        :param clip: only draw inside rectangle (x_min, y_min, x_max, y_max), max values are exclusive
+        :type clip: tuple[int]
+        :param owner: if given, the index of the last triangle written on every pixel is stored into it,
+                      shape (height, width)
+        :type owner: numpy.ndarray[int]
+        :param blendMode: Layer.OVER writes fragments, Layer.ADD or Layer.MULTIPLY blends the whole batch onto buff
+                          with full coverage, see blendFragments
+        :type blendMode: str
+        :rtype: None
+        """
+        sampler, textureFilter, perspective, doDepth = shading
+        if owner is None:
+            xs, ys, values = Rasterizer.expandSpans(*spans[:5], clip)
+        else:
+            # carry the triangle index as one more attribute, interpolating between equal values keeps it exact
+            triangle = spans[5][:, None].astype(np.float64)
+            xs, ys, values = Rasterizer.expandSpans(*spans[:3], np.hstack([triangle, spans[3]]),
+                                                    np.hstack([triangle, spans[4]]), clip)
+            triangle, values = values[:, 0].astype(np.int64), values[:, 1:]
+        if doDepth:
+            keep = Rasterizer.depthTestFragments(buff, xs, ys, values[:, -1])
+            xs, ys, values = xs[keep], ys[keep], values[keep]
+            if owner is not None:
+                triangle = triangle[keep]
+        if owner is not None:
+            # spans are in triangle order, so the last triangle on a pixel is the largest index
+            inside = (xs >= 0) & (xs < buff.width) & (ys >= 0) & (ys < buff.height)
+            np.maximum.at(owner, (ys[inside], xs[inside]), triangle[inside])
+        if sampler is not None:
+            u, v = values[:, 3], values[:, 4]
+            if perspective:
+                u, v = u / values[:, 5], v / values[:, 5]
+            lod = values[:, 6 if perspective else 5] if textureFilter in TextureSampler.MIPMAP_FILTERS else None
+            rgb = sampler.sample(u, v, textureFilter, lod)
+        else:
+            rgb = values[:, :3]
+        Rasterizer.putFragments(buff, xs, ys, rgb, blendMode)
+
+    @staticmethod
+    def drawPolygon(buff, coords, colors, doSmooth=True, clip=None, evenOdd=True, blendMode=Layer.OVER):
+        """
+        Fill one closed polygon to buff with one write, see polygonFragments
+
+        :param buff: The buff to edit
+        :type buff: Buff
+        :param coords: polygon vertex coordinates in order, shape (n, 2)
+        :type coords: numpy.ndarray[int]
+        :param colors: vertex colors in [0, 1], shape (n, 3)
+        :type colors: numpy.ndarray[float]
+        :param doSmooth: interpolate vertex colors, otherwise fill with the color of the first vertex
+        :type doSmooth: bool
+        :param clip: only draw inside rectangle (x_min, y_min, x_max, y_max), max values are exclusive
+        :type clip: tuple[int]
+        :param evenOdd: use even-odd fill rule, otherwise non-zero winding rule
+        :type evenOdd: bool
+        :param blendMode: Layer.OVER writes fragments, Layer.ADD or Layer.MULTIPLY blends the whole batch onto buff
+                          with full coverage, see blendFragments
+        :type blendMode: str
+        :rtype: None
+        """
+        xs, ys, rgb = Rasterizer.polygonFragments(coords, colors, doSmooth, clip, evenOdd)
+        Rasterizer.putFragments(buff, xs, ys, rgb, blendMode)
@@ -0,0 +1,274 @@
+"""
+Framebuffer export for viewers in other processes. SharedBuff is a Buff whose pixel storage lives in a memory-mapped
+file, so a recorder or a preview server can attach to the file and read frames without any copy, while the sketch
+keeps drawing into the same memory. Put the file in a RAM backed directory (e.g. /dev/shm on Linux) to keep it off
+disk.
+
+The file starts with a fixed 64 bytes header, followed by the pixels in the same row-major layout as Buff.data:
+
+    offset  0: magic b"PA1B"
+    offset  4: uint32 version
+    offset  8: uint32 width
+    offset 12: uint32 height
+    offset 16: uint64 capacity, bytes reserved for pixels
+    offset 24: uint64 sequence, odd while a frame is being written
+    offset 32: uint64 frame counter, increased after every finished frame
+
+The sequence works as a seqlock. Writes are grouped by Buff.writing: the sequence becomes odd when the outermost group
+starts and even again when it ends. A reader takes the sequence before reading (waiting while it is odd) and checks it
+is unchanged afterwards, otherwise the frame was torn and has to be read again. Readers never block the writer.
+Layers are not exported, readers see the base colors.
+"""
+
+import os
+import mmap
+import time
+import struct
+from contextlib import contextmanager
+
+import numpy as np
+
+from Buff import Buff
+
+MAGIC = b"PA1B"
+VERSION = 1
+HEADER = struct.Struct("<4sIIIQ")  # magic, version, width, height, capacity
+HEADER_SIZE = 64
+SEQUENCE_OFFSET = 24  # the frame counter follows the sequence
+
+
+class SharedBuff(Buff):
+    """
+    Buff backed by a memory-mapped file which other processes can read with SharedBuffReader
+    """
+    path = None
+    growth = 1.5  # pixel capacity grows by this factor when buff outgrows it
+
+    def __init__(self, path, width=0, height=0, color=None):
+        """
+        :param path: file to export frames to, created or overwritten
+        :type path: str
+        :param width: the buff width
+        :type width: int
+        :param height: the buff height
+        :type height: int
+        :param color: the default color you want to set the buff to
+        :type color: ColorType
+        :rtype: None
+        """
+        self.path = path
+        self.__file = open(path, "w+b")
+        self.__map = None
+        self.__counters = None
+        self.__capacity = 0
+        self.__writeDepth = 0
+        super(SharedBuff, self).__init__(width, height, color)
+
+    def __mapFile(self, capacity):
+        """
+        Grow the file to hold capacity bytes of pixels and map it again. The old mapping is left to the garbage
+        collector, since arrays created on it may still be alive
+        """
+        self.__file.truncate(HEADER_SIZE + capacity)
+        self.__map = mmap.mmap(self.__file.fileno(), HEADER_SIZE + capacity)
+        self.__counters = np.ndarray((2,), dtype=np.uint64, buffer=self.__map, offset=SEQUENCE_OFFSET)
+        if self.__capacity == 0:
+            self.__counters[:] = 0
+        self.__capacity = capacity
+
+    def _setData(self, data):
+        """
+        In class usage only. Copy new pixel storage into the mapped file and rebuild the buff view on it
+        """
+        if data.nbytes > self.__capacity:
+            self.__mapFile(max(data.nbytes, int(self.__capacity * self.growth)))
+        with self.writing():
+            shared = np.ndarray(data.shape, dtype=np.uint8, buffer=self.__map, offset=HEADER_SIZE)
+            shared[...] = data
+            HEADER.pack_into(self.__map, 0, MAGIC, VERSION, data.shape[1], data.shape[0], self.__capacity)
+            super(SharedBuff, self)._setData(shared)
+
+    @contextmanager
+    def writing(self):
+        """
+        Group writes into one frame. Readers see the frame only after the outermost group ends, and reject
+        anything they read while a group is open. Groups can be nested and are not thread safe, open them on the
+        thread which owns the buff. Writes outside of any group are seen by readers right away, without consistency.
+        """
+        if self.__counters is None:
+            # closed, nobody is reading
+            yield self
+            return
+        self.__writeDepth += 1
+        if self.__writeDepth == 1:
+            self.__counters[0] += np.uint64(1)
+        try:
+            yield self
+        finally:
+            self.__writeDepth -= 1
+            if self.__writeDepth == 0:
+                self.__counters[1] += np.uint64(1)
+                self.__counters[0] += np.uint64(1)
+
+    def frameCount(self):
+        """
+        Number of finished frames
+
+        :rtype: int
+        """
+        return int(self.__counters[1])
+
+    def close(self, unlink=False):
+        """
+        Stop exporting. The pixels are copied back to private memory, so the buff can still be used
+
+        :param unlink: also delete the file
+        :type unlink: bool
+        :rtype: None
+        """
+        if self.__map is None:
+            return
+        Buff._setData(self, self.data.copy())
+        self.__counters = None
+        self.__map = None
+        self.__file.close()
+        if unlink:
+            os.remove(self.path)
+
+
+class SharedBuffReader:
+    """
+    Read frames exported by a SharedBuff in another process. Usage, zero-copy:
+
+        reader = SharedBuffReader(path)
+        while True:
+            sequence = reader.beginRead()
+            image = reader.image()
+            ... use image ...
+            if not reader.retryRead(sequence):
+                break
+
+    or readFrame, which returns a copy.
+    """
+    path = None
+
+    def __init__(self, path):
+        """
+        :param path: file written by a SharedBuff
+        :type path: str
+        :rtype: None
+        """
+        self.path = path
+        self.__file = open(path, "rb")
+        self.__map = None
+        self.__size = 0
+        self.__mapFile()
+        if self.__map[:4] != MAGIC:
+            raise ValueError("Not a shared buff file: " + path)
+
+    def __mapFile(self):
+        """
+        Map the file again if the writer has grown it
+        """
+        size = os.fstat(self.__file.fileno()).st_size
+        if size != self.__size:
+            self.__map = mmap.mmap(self.__file.fileno(), size, access=mmap.ACCESS_READ)
+            self.__counters = np.ndarray((2,), dtype=np.uint64, buffer=self.__map, offset=SEQUENCE_OFFSET)
+            self.__size = size
+
+    def beginRead(self, timeout=None):
+        """
+        Wait until no frame is being written and return the sequence to check with retryRead
+
+        :param timeout: give up after this many seconds, wait forever if not given
+        :type timeout: float
+        :rtype: int
+        """
+        start = time.perf_counter()
+        while True:
+            sequence = int(self.__counters[0])
+            if sequence % 2 == 0:
+                self.__mapFile()
+                return sequence
+            if timeout is not None and time.perf_counter() - start > timeout:
+                raise TimeoutError("Shared buff is being written")
+            time.sleep(0)
+
+    def retryRead(self, sequence):
+        """
+        Whether the writer touched the frame since beginRead returned sequence, so what was read must be discarded
+
+        :rtype: bool
+        """
+        return int(self.__counters[0]) != sequence
+
+    def size(self):
+        """
+        Current (width, height) of the frame
+
+        :rtype: tuple[int]
+        """
+        _, _, width, height, _ = HEADER.unpack_from(self.__map, 0)
+        return width, height
+
+    def frameCount(self):
+        """
+        Number of frames finished by the writer
+
+        :rtype: int
+        """
+        return int(self.__counters[1])
+
+    def image(self):
+        """
+        Zero-copy view of the frame with shape (height, width, 3), rows from bottom to top like Buff.data.
+        Only valid between beginRead and a successful retryRead
+
+        :rtype: numpy.ndarray[uint8]
+        """
+        width, height = self.size()
+        return np.ndarray((height, width, 3), dtype=np.uint8, buffer=self.__map, offset=HEADER_SIZE)
+
+    def readFrame(self, timeout=None):
+        """
+        Copy a consistent frame
+
+        :param timeout: give up after this many seconds of waiting for the writer, wait forever if not given
+        :type timeout: float
+        :return: frame counter and the image with shape (height, width, 3)
+        :rtype: tuple
+        """
+        while True:
+            sequence = self.beginRead(timeout)
+            frame = self.frameCount()
+            image = self.image().copy()
+            if not self.retryRead(sequence):
+                return frame, image
+
+    def close(self):
+        """
+        Detach from the file
+        """
+        self.__counters = None
+        self.__map = None
+        self.__file.close()
+
+
+if __name__ == "__main__":
+    import tempfile
+    from ColorType import ColorType
+
+    filePath = os.path.join(tempfile.gettempdir(), "pa1_shared_buff_demo")
+    writer = SharedBuff(filePath, 4, 3, ColorType(0.2, 0.4, 0.6))
+    reader = SharedBuffReader(filePath)
+    print(reader.size(), reader.readFrame()[0], reader.readFrame()[1][0, 0])
+    with writer.writing():
+        writer.setPixel(0, 0, 255, 0, 0)
+        try:
+            reader.beginRead(timeout=0)
+        except TimeoutError:
+            print("reader waits while a frame is written")
+    print(reader.readFrame()[1][0, 0])
+    writer.resize(40, 30)
+    print(reader.size(), reader.readFrame()[1].shape)
+    writer.close(unlink=True)
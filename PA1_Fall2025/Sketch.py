@@ -1,6 +1,6 @@
 """
-This is the main entry of your program. Almost all things you need to implement is in this file.
-The main class Sketch inherit from CanvasBase. For the parts you need to implement, they all marked TODO.
+This is the main entry of your program. The main class Sketch inherit from CanvasBase and SketchBase.
+Drawing methods and test cases are in SketchBase.py. For the parts you need to implement, they all marked TODO.
 First version Created on 09/28/2018
 
 :author: micou(Zezhou Sun)
@@ -10,86 +10,49 @@ completed by: Austin Bu (U96219698)
 - Completed drawLine and drawTriangle functions, with color smoothing
 """
 
-import os
-
 import wx
-import math
-import random
-import numpy as np
 
-from Buff import Buff
 from Point import Point
 from ColorType import ColorType
 from CanvasBase import CanvasBase
-from collections import defaultdict
-
-try:
-    # From pip package "Pillow"
-    from PIL import Image
-except Exception:
-    print("Need to install PIL package. Pip package name is Pillow")
-    raise ImportError
+from SketchBase import SketchBase
+from VertexBatch import VertexBatch
 
 
-class Sketch(CanvasBase):
+class Sketch(CanvasBase, SketchBase):
     """
     Please don't forget to override interrupt methods, otherwise NotImplementedError will throw out
-    
+    All drawing methods, control flags and test cases are in SketchBase, this class deals with window interruptions.
+
     Class Variable Explanation:
 
-    * debug(int): Define debug level for log printing
-
-        * 0 for stable version, minimum log is printed
-        * 1 will print general logs for lines and triangles
-        * 2 will print more details and do some type checking, which might be helpful in debugging
-    
-    * texture(Buff): loaded texture in Buff instance
-    * random_color(bool): Control flag of random color generation of point.
-    * doTexture(bool): Control flag of doing texture mapping
-    * doSmooth(bool): Control flag of doing smooth
-    * doAA(bool): Control flag of doing anti-aliasing
-    * doAAlevel(int): anti-alising super sampling level
-        
+    * random_color(bool): Control flag of random color generation of point. Colors are handed out by palette, which
+      starts from its first color again after every clear, so the same clicks get the same colors
+
     Method Instruction:
 
     * Interrupt_MouseL(R): Used to deal with mouse click interruption. Canvas will be refreshed with updated buff
     * Interrupt_Keyboard: Used to deal with key board press interruption. Use this to add new keys or new methods
-    * drawPoint: method to draw a point
-    * drawLine: method to draw a line
-    * drawTriangle: method to draw a triangle with filling and smoothing
-    
+    * Interrupt_Resize: re-rasterize submitted primitives in regions exposed by window resize
+
     List of methods to override the ones in CanvasBase:
 
     * Interrupt_MouseL
     * Interrupt_MouseR
     * Interrupt_Keyboard
-        
+    * Interrupt_Resize
+
     Here are some public variables in parent class you might need:
 
     * points_r: list<Point>. to store all Points from Mouse Right Button
     * points_l: list<Point>. to store all Points from Mouse Left Button
     * buff    : Buff. buff of current frame. Change on it will change display on screen
     * buff_last: Buff. Last frame buffer
-        
-    """
 
-    debug = 0
-    texture_file_path = "./pattern.jpg"
-    texture = None
+    """
 
     # control flags
     randomColor = False
-    doTexture = False
-    doSmooth = False
-    doAA = False
-    doAAlevel = 4
-
-    # test case status
-    MIN_N_STEPS = 6
-    MAX_N_STEPS = 192
-    n_steps = 12  # For test case only
-    test_case_index = 0
-    test_case_list = []  # If you need more test case, write them as a method and add it to list
 
     def __init__(self, parent):
         """
@@ -99,31 +62,19 @@ class Sketch(CanvasBase):
         :type parent: wx.Frame
         """
         super(Sketch, self).__init__(parent)
-        self.test_case_list = [lambda _: self.clear(),
-                               self.testCaseLine01,
-                               self.testCaseLine02,
-                               self.testCaseTri01,
-                               self.testCaseTri02,
-                               self.testCaseTriTexture01]  # method at here must accept one argument, n_steps
-        # Try to read texture file
-        if os.path.isfile(self.texture_file_path):
-            # Read image and make it to an ndarray
-            texture_image = Image.open(self.texture_file_path)
-            texture_array = np.array(texture_image).astype(np.uint8)
-            # Because imported image is upside down, reverse it
-            texture_array = np.flip(texture_array, axis=0)
-            # Store texture image in our Buff format
-            self.texture = Buff(texture_array.shape[1], texture_array.shape[0])
-            self.texture.setStaticBuffArray(np.transpose(texture_array, (1, 0, 2)))
-            if self.debug > 0:
-                print("Texture Loaded with shape: ", texture_array.shape)
-                print("Texture Buff have size: ", self.texture.size)
-        else:
-            raise ImportError("Cannot import texture file")
+        SketchBase.__init__(self)
+
+    def clear(self):
+        """
+        clear buff and clicked points like CanvasBase does, and forget submitted primitives and restart palette like
+        SketchBase does. CanvasBase comes first in the bases, so its clear would hide the one of SketchBase
+        """
+        CanvasBase.clear(self)
+        SketchBase.clear(self)
 
     def __addPoint2Pointlist(self, pointlist, x, y):
         if self.randomColor:
-            p = Point((x, y), ColorType(random.random(), random.random(), random.random()))
+            p = Point((x, y), self.palette.next())
         else:
             p = Point((x, y), ColorType(1, 0, 0))
         pointlist.append(p)
@@ -135,48 +86,47 @@ class Sketch(CanvasBase):
         if len(self.points_l) % 2 == 1:
             if self.debug > 0:
                 print("draw a point", self.points_l[-1])
-            self.drawPoint(self.buff, self.points_l[-1])
+            self.submitPoints(VertexBatch.fromPoints(self.points_l[-1:]))
         elif len(self.points_l) % 2 == 0 and len(self.points_l) > 0:
             if self.debug > 0:
                 print("draw a line from ", self.points_l[-1], " -> ", self.points_l[-2])
             # TODO 0: uncomment this and comment out drawPoint when you finished the drawLine function 
-            self.drawLine(self.buff, self.points_l[-2], self.points_l[-1], self.doSmooth, self.doAA, self.doAAlevel)
+            # flags follow the sketch, so the line is drawn again when they are toggled
+            self.submitLines(VertexBatch.fromPoints(self.points_l[-2:]))
             # self.drawRectangle(self.buff, self.points_l[-2], self.points_l[-1])
             # self.drawPoint(self.buff, self.points_l[-1]) 
             self.points_l.clear()
 
-    def drawRectangle(self, buff: Buff, p1: Point, p2: Point):
-        x1, y1 = p1.getCoords()
-        x2, y2 = p2.getCoords()
-
-        x_list = sorted(x1, x2)
-        y_list = sorted(y1, y2)
-
-        for i in range(x_list[0], x_list[1] + 1):
-            for j in range(y_list[0], y_list[1] + 1):
-                self.drawPoint(buff, Point([i, j], p1.getColor()))
-
     # Deal with Mouse Right Button Pressed Interruption
     def Interrupt_MouseR(self, x, y):
         self.__addPoint2Pointlist(self.points_r, x, y)
         if len(self.points_r) % 3 == 1:
             if self.debug > 0:
                 print("draw a point", self.points_r[-1])
-            self.drawPoint(self.buff, self.points_r[-1])
+            self.submitPoints(VertexBatch.fromPoints(self.points_r[-1:]))
         elif len(self.points_r) % 3 == 2:
             if self.debug > 0:
                 print("draw a line from ", self.points_r[-1], " -> ", self.points_r[-2])
             # TODO 0: uncomment this and comment out drawPoint when you finished the drawLine function 
             # self.drawLine(self.buff, self.points_l[-2], self.points_l[-1], self.doSmooth, self.doAA, self.doAAlevel)
-            self.drawPoint(self.buff, self.points_r[-1])
+            self.submitPoints(VertexBatch.fromPoints(self.points_r[-1:]))
         elif len(self.points_r) % 3 == 0 and len(self.points_r) > 0:
             if self.debug > 0:
                 print("draw a triangle {} -> {} -> {}".format(self.points_r[-3], self.points_r[-2], self.points_r[-1]))
             # TODO 0: uncomment drawTriangle and comment out drawPoint when you finished the drawTriangle function 
-            self.drawTriangle(self.buff, self.points_r[-3], self.points_r[-2], self.points_r[-1], self.doSmooth, self.doAA, self.doAAlevel, self.doTexture)            
+            self.submitTriangles(VertexBatch.fromPoints(self.points_r[-3:]))
             # self.drawPoint(self.buff, self.points_r[-1])
             self.points_r.clear()
 
+    def Interrupt_Resize(self, exposedRects):
+        """
+        Draw submitted primitives again in newly exposed regions, so ones cut off by a smaller window come back
+        """
+        if self.displayList is None:
+            return
+        for rect in exposedRects:
+            self.redraw(rect=rect)
+
     def Interrupt_Keyboard(self, keycode):
         """
         keycode Reference: https://docs.wxpython.org/wx.KeyCode.enumeration.html#wx-keycode
@@ -185,6 +135,8 @@ class Sketch(CanvasBase):
         * c, C: clear buff and screen
         * LEFT, UP: Last Test case
         * t, T, RIGHT, DOWN: Next Test case
+        * s, S / a, A / m, M: toggle smooth / anti-aliasing / texture mapping, primitives following them are redrawn
+        * w, W: save display list to displaylist.json
         """
         # Trigger for test cases
         if keycode in [wx.WXK_LEFT, wx.WXK_UP]:  # Last Test Case
@@ -219,388 +171,19 @@ class Sketch(CanvasBase):
             print("clear Buff")
         if chr(keycode) in "sS":
             self.doSmooth = not self.doSmooth
+            self.redraw(["doSmooth"])
             print("Do Smooth: ", self.doSmooth)
         if chr(keycode) in "aA":
             self.doAA = not self.doAA
+            self.redraw(["doAA"])
             print("Do Anti-Aliasing: ", self.doAA)
         if chr(keycode) in "mM":
             self.doTexture = not self.doTexture
+            self.redraw(["doTexture"])
             print("texture mapping: ", self.doTexture)
-
-    def queryTextureBuffPoint(self, texture: Buff, x: int, y: int) -> Point:
-        """
-        Query a point at texture buff, should only be used in texture buff query
-
-        :param texture: The texture buff you want to query from
-        :type texture: Buff
-        :param x: The query point x coordinate
-        :type x: int
-        :param y: The query point y coordinate
-        :type y: int
-        :rtype: Point
-        """
-        if self.debug > 1:
-            if x != min(max(0, int(x)), texture.width - 1):
-                print("Warning: Texture Query x coordinate outbound")
-            if y != min(max(0, int(y)), texture.height - 1):
-                print("Warning: Texture Query y coordinate outbound")
-        return texture.getPointFromPointArray(x, y)
-
-    @staticmethod
-    def drawPoint(buff, point):
-        """
-        Draw a point on buff
-
-        :param buff: The buff to draw point on
-        :type buff: Buff
-        :param point: A point to draw on buff
-        :type point: Point
-        :rtype: None
-        """
-        x, y = point.coords
-        c = point.color
-        # because we have already specified buff.buff has data type uint8, type conversion will be done in numpy
-        buff.buff[x, y, 0] = c.r * 255
-        buff.buff[x, y, 1] = c.g * 255
-        buff.buff[x, y, 2] = c.b * 255
-
-    def drawLine(self, buff: Buff, p1: Point, p2: Point, doSmooth=True, doAA=False, doAAlevel=4):
-        """
-        Draw a line between p1 and p2 on buff
-
-        :param buff: The buff to edit
-        :type buff: Buff
-        :param p1: One end point of the line
-        :type p1: Point
-        :param p2: Another end point of the line
-        :type p2: Point
-        :param doSmooth: Control flag of color smooth interpolation
-        :type doSmooth: bool
-        :param doAA: Control flag of doing anti-aliasing
-        :type doAA: bool
-        :param doAAlevel: anti-aliasing super sampling level
-        :type doAAlevel: int
-        :rtype: None
-        """
-        ##### TODO 1: Use Bresenham algorithm to draw a line between p1 and p2 on buff.
-        # Requirements:
-        #   1. Only integer is allowed in interpolate point coordinates between p1 and p2
-        #   2. Float number is allowed in interpolate point color
-
-        def bresenham(x1, x2, y1, y2, swap, buff):
-            dx = abs(x2 - x1)
-            dy = abs(y2 - y1)
-            error = (2 * dy) - dx
-            y = y1
-            x_step = 1 if x2 > x1 else -1
-            y_step = 1 if y2 > y1 else -1
-
-            # for AA, use one dict to keep track of opacity, another for colo
-            dpoint = defaultdict(int)
-            dcolor = {}
-            i = x1
-            while True:
-                r, g, b = p1.getColor().getRGB()
-                if doSmooth:
-                    r2, g2, b2 = p2.getColor().getRGB()
-                    progress = abs(i - x1) / dx
-                    r += (r2 - r) * progress
-                    g += (g2 - g) * progress
-                    b += (b2 - b) * progress
-                if swap:
-                    if doAA:
-                        dpoint[(y // doAAlevel, i // doAAlevel)] += 1
-                        dcolor[(y // doAAlevel, i // doAAlevel)] = (r, g, b)
-                    else:
-                        self.drawPoint(buff, Point([y, i], ColorType(r, g, b)))
-                else:
-                    if doAA:
-                        dpoint[(i // doAAlevel, y // doAAlevel)] += 1
-                        dcolor[(i // doAAlevel, y // doAAlevel)] = (r, g, b)
-                    else:
-                        self.drawPoint(buff, Point([i, y], ColorType(r, g, b)))
-                if error >= 0:
-                    y += y_step
-                    error -= (2 * dx)
-                if i == x2:
-                    break
-                i += x_step
-                error += (2 * dy)
-            return dpoint, dcolor
-
-        point1 = p1
-        point2 = p2
-        # run bresenham on bigger line if AA
-        if doAA:
-            point1 = Point([p1.getCoords()[0] * doAAlevel, p1.getCoords()[1] * doAAlevel], p1.getColor())
-            point2 = Point([p2.getCoords()[0] * doAAlevel, p2.getCoords()[1] * doAAlevel], p2.getColor())
-
-        x1, y1 = point1.getCoords()
-        x2, y2 = point2.getCoords()
-
-        # swap x and y based on slope
-        dp, dc = None, None
-        if abs(x2 - x1) < abs(y2 - y1):
-            dp, dc = bresenham(y1, y2, x1, x2, True, buff)
-        else:
-            dp, dc = bresenham(x1, x2, y1, y2, False, buff)
-
-        if doAA:
-            for key in dp:
-                x, y = key
-                opacity = dp[key] / doAAlevel
-                r, g, b = dc[key]
-                r = r * opacity
-                g = g * opacity
-                b = b * opacity
-                self.drawPoint(buff, Point([x, y], ColorType(r, g, b)))
-        return
-
-    def drawTriangle(self, buff: Buff, p1: Point, p2: Point, p3: Point, doSmooth=True, doAA=False, doAAlevel=4, doTexture=False):
-        """
-        draw Triangle to buff. apply smooth color filling if doSmooth set to true, otherwise fill with first point color
-        if doAA is true, apply anti-aliasing to triangle based on doAAlevel given.
-
-        :param buff: The buff to edit
-        :type buff: Buff
-        :param p1: First triangle vertex
-        :param p2: Second triangle vertex
-        :param p3: Third triangle vertex
-        :type p1: Point
-        :type p2: Point
-        :type p3: Point
-        :param doSmooth: Color smooth filling control flag
-        :type doSmooth: bool
-        :param doAA: Anti-aliasing control flag
-        :type doAA: bool
-        :param doAAlevel: Anti-aliasing super sampling level
-        :type doAAlevel: int
-        :param doTexture: Draw triangle with texture control flag
-        :type doTexture: bool
-        :rtype: None
-        """
-        ##### TODO 2: Write a triangle rendering function, which support smooth bilinear interpolation of the vertex color
-        ##### TODO 3(For CS680 Students): Implement texture-mapped fill of triangle. Texture is stored in self.texture
-        # Requirements:
-        #   1. For flat shading of the triangle, use the first vertex color.
-        #   2. Polygon scan fill algorithm and the use of barycentric coordinate are not allowed in this function
-        #   3. You should be able to support both flat shading and smooth shading, which is controlled by doSmooth
-        #   4. For texture-mapped fill of triangles, it should be controlled by doTexture flag.
-
-        # sort points by y coordinate, ascending
-        arr = sorted([p1, p2, p3], key=lambda p: p.getCoords()[1])
-        x1, y1 = arr[0].getCoords()
-        x2, y2 = arr[1].getCoords()
-        x3, y3 = arr[2].getCoords()
-        color = p3.getColor()
-        if y1 == y2:
-            # bottom to top
-            step = 1
-            if not doSmooth:
-                self.drawLine(buff, Point(arr[0].getCoords(), color), arr[1], doSmooth)
-                self.drawPoint(buff, Point(arr[2].getCoords(), color))
-            else:
-                self.drawLine(buff, arr[0], arr[1], doSmooth)
-                self.drawPoint(buff, arr[2])
-        elif y2 == y3:
-            # top to bottom, swap p1 and p3
-            arr.reverse()
-            x1, y1 = arr[0].getCoords()
-            x3, y3 = arr[2].getCoords()
-            step = -1
-            if not doSmooth:
-                self.drawLine(buff, Point(arr[0].getCoords(), color), arr[1], doSmooth)
-                self.drawPoint(buff, Point(arr[2].getCoords(), color))
-            else:
-                self.drawLine(buff, arr[0], arr[1], doSmooth)
-                self.drawPoint(buff, arr[2])
-        else:
-            # color smoothing
-            if doSmooth:
-                progress = (y2 - y1) / (y3 - y1)
-                r, g, b = tuple(
-                    np.add(
-                        np.subtract(
-                            arr[2].getColor().getRGB(), arr[0].getColor().getRGB()
-                        ) * progress, 
-                        arr[0].getColor().getRGB()
-                    )
-                )
-                color = ColorType(r, g, b)
-
-            # split triangle and call function again
-            x_mid = round((y2 - y1) * (x3 - x1) / (y3 - y1) + x1)
-            p_mid = Point([x_mid, y2], color)
-            self.drawTriangle(buff, arr[0], arr[1], p_mid, doSmooth)
-            self.drawTriangle(buff, arr[1], arr[2], p_mid, doSmooth)
-            
-            # redraw perimeter with anti aliasing
-            if doAA:
-                if not doSmooth:
-                    color = p3.getColor()
-                    self.drawLine(buff, Point(p1.getCoords(), color), Point(p2.getCoords(), color), False, True, doAAlevel)
-                    self.drawLine(buff, Point(p2.getCoords(), color), Point(p3.getCoords(), color), False, True, doAAlevel)
-                    self.drawLine(buff, Point(p3.getCoords(), color), Point(p1.getCoords(), color), False, True, doAAlevel)
-                else:
-                    self.drawLine(buff, p1, p2, True, True, doAAlevel)
-                    self.drawLine(buff, p2, p3, True, True, doAAlevel)
-                    self.drawLine(buff, p3, p1, True, True, doAAlevel)
-
-            return
-        slope_1 = (x3 - x1) / (y3 - y1)
-        slope_2 = (x3 - x2) / (y3 - y2)
-        for i in range(y1, y3, step):
-            # color smoothing
-            color1 = p3.getColor()
-            color2 = p3.getColor()
-            if doSmooth:
-                progress1 = (i - y1) / (y3 - y1)
-                r1, g1, b1 = tuple(
-                    np.add(
-                        np.subtract(
-                            arr[2].getColor().getRGB(), arr[0].getColor().getRGB()
-                        ) * progress1, 
-                        arr[0].getColor().getRGB()
-                    )
-                )
-                color1 = ColorType(r1, g1, b1)
-                progress2 = (i - y2) / (y3 - y2)
-                r2, g2, b2 = tuple(
-                    np.add(
-                        np.subtract(
-                            arr[2].getColor().getRGB(), arr[1].getColor().getRGB()
-                        ) * progress2, 
-                        arr[1].getColor().getRGB()
-                    )
-                )
-                color2 = ColorType(r2, g2, b2)
-
-            x_left = round((i - y1) * slope_1 + x1)
-            x_right = round((i - y2) * slope_2 + x2)
-            if x_left == x_right:
-                self.drawPoint(buff, Point([x_left, i], color1))
-            else:
-                self.drawLine(buff, Point([x_left, i], color1), Point([x_right, i], color2), doSmooth)
-        return
-
-    # test for lines lines in all directions
-    def testCaseLine01(self, n_steps):
-        center_x = int(self.buff.width / 2)
-        center_y = int(self.buff.height / 2)
-        radius = int(min(self.buff.width, self.buff.height) * 0.45)
-
-        v0 = Point([center_x, center_y], ColorType(1, 1, 0))
-        for step in range(0, n_steps):
-            theta = math.pi * step / n_steps
-            v1 = Point([center_x + int(math.sin(theta) * radius), center_y + int(math.cos(theta) * radius)],
-                       ColorType(0, 0, (1 - step / n_steps)))
-            v2 = Point([center_x - int(math.sin(theta) * radius), center_y - int(math.cos(theta) * radius)],
-                       ColorType(0, (1 - step / n_steps), 0))
-            self.drawLine(self.buff, v2, v0, doSmooth=True)
-            self.drawLine(self.buff, v0, v1, doSmooth=True)
-
-    # test for lines: drawing circle and petal 
-    def testCaseLine02(self, n_steps):
-        n_steps = 2 * n_steps
-        d_theta = 2 * math.pi / n_steps
-        d_petal = 12 * math.pi / n_steps
-        cx = int(self.buff.width / 2)
-        cy = int(self.buff.height / 2)
-        radius = (0.75 * min(cx, cy))
-        p = radius * 0.25
-
-        # Outer petals
-        for i in range(n_steps + 2):
-            self.drawLine(self.buff,
-                          Point((math.floor(0.5 + radius * math.sin(d_theta * i) + p * math.sin(d_petal * i)) + cx,
-                                 math.floor(0.5 + radius * math.cos(d_theta * i) + p * math.cos(d_petal * i)) + cy),
-                                ColorType(1, (128 + math.sin(d_theta * i * 5) * 127) / 255,
-                                          (128 + math.cos(d_theta * i * 5) * 127) / 255)),
-                          Point((math.floor(
-                              0.5 + radius * math.sin(d_theta * (i + 1)) + p * math.sin(d_petal * (i + 1))) + cx,
-                                 math.floor(0.5 + radius * math.cos(d_theta * (i + 1)) + p * math.cos(
-                                     d_petal * (i + 1))) + cy),
-                                ColorType(1, (128 + math.sin(d_theta * 5 * (i + 1)) * 127) / 255,
-                                          (128 + math.cos(d_theta * 5 * (i + 1)) * 127) / 255)),
-                          doSmooth=True, doAA=self.doAA, doAAlevel=self.doAAlevel)
-
-        # Draw circle
-        for i in range(n_steps + 1):
-            v0 = Point((math.floor(0.5 * radius * math.sin(d_theta * i)) + cx,
-                        math.floor(0.5 * radius * math.cos(d_theta * i)) + cy), ColorType(1, 97. / 255, 0))
-            v1 = Point((math.floor(0.5 * radius * math.sin(d_theta * (i + 1))) + cx,
-                        math.floor(0.5 * radius * math.cos(d_theta * (i + 1))) + cy), ColorType(1, 97. / 255, 0))
-            self.drawLine(self.buff, v0, v1, doSmooth=True, doAA=self.doAA, doAAlevel=self.doAAlevel)
-
-    # test for smooth filling triangle
-    def testCaseTri01(self, n_steps):
-        n_steps = int(n_steps / 2)
-        delta = 2 * math.pi / n_steps
-        radius = int(min(self.buff.width, self.buff.height) * 0.45)
-        cx = int(self.buff.width / 2)
-        cy = int(self.buff.height / 2)
-        theta = 0
-
-        for _ in range(n_steps):
-            theta += delta
-            v0 = Point((cx, cy), ColorType(1, 1, 1))
-            v1 = Point((int(cx + math.sin(theta) * radius), int(cy + math.cos(theta) * radius)),
-                       ColorType((127. + 127. * math.sin(theta)) / 255,
-                                 (127. + 127. * math.sin(theta + 2 * math.pi / 3)) / 255,
-                                 (127. + 127. * math.sin(theta + 4 * math.pi / 3)) / 255))
-            v2 = Point((int(cx + math.sin(theta + delta) * radius), int(cy + math.cos(theta + delta) * radius)),
-                       ColorType((127. + 127. * math.sin(theta + delta)) / 255,
-                                 (127. + 127. * math.sin(theta + delta + 2 * math.pi / 3)) / 255,
-                                 (127. + 127. * math.sin(theta + delta + 4 * math.pi / 3)) / 255))
-            self.drawTriangle(self.buff, v1, v0, v2, False, self.doAA, self.doAAlevel)
-
-    def testCaseTri02(self, n_steps):
-        # Test case for no smooth color filling triangle
-        n_steps = int(n_steps / 2)
-        delta = 2 * math.pi / n_steps
-        radius = int(min(self.buff.width, self.buff.height) * 0.45)
-        cx = int(self.buff.width / 2)
-        cy = int(self.buff.height / 2)
-        theta = 0
-
-        for _ in range(n_steps):
-            theta += delta
-            v0 = Point((cx, cy), ColorType(1, 1, 1))
-            v1 = Point((int(cx + math.sin(theta) * radius), int(cy + math.cos(theta) * radius)),
-                       ColorType((127. + 127. * math.sin(theta)) / 255,
-                                 (127. + 127. * math.sin(theta + 2 * math.pi / 3)) / 255,
-                                 (127. + 127. * math.sin(theta + 4 * math.pi / 3)) / 255))
-            v2 = Point((int(cx + math.sin(theta + delta) * radius), int(cy + math.cos(theta + delta) * radius)),
-                       ColorType((127. + 127. * math.sin(theta + delta)) / 255,
-                                 (127. + 127. * math.sin(theta + delta + 2 * math.pi / 3)) / 255,
-                                 (127. + 127. * math.sin(theta + delta + 4 * math.pi / 3)) / 255))
-            self.drawTriangle(self.buff, v0, v1, v2, True, self.doAA, self.doAAlevel)
-
-    def testCaseTriTexture01(self, n_steps):
-        # Test case for no smooth color filling triangle
-        n_steps = int(n_steps / 2)
-        delta = 2 * math.pi / n_steps
-        radius = int(min(self.buff.width, self.buff.height) * 0.45)
-        cx = int(self.buff.width / 2)
-        cy = int(self.buff.height / 2)
-        theta = 0
-
-        triangleList = []
-        for _ in range(n_steps):
-            theta += delta
-            v0 = Point((cx, cy), ColorType(1, 1, 1))
-            v1 = Point((int(cx + math.sin(theta) * radius), int(cy + math.cos(theta) * radius)),
-                       ColorType((127. + 127. * math.sin(theta)) / 255,
-                                 (127. + 127. * math.sin(theta + 2 * math.pi / 3)) / 255,
-                                 (127. + 127. * math.sin(theta + 4 * math.pi / 3)) / 255))
-            v2 = Point((int(cx + math.sin(theta + delta) * radius), int(cy + math.cos(theta + delta) * radius)),
-                       ColorType((127. + 127. * math.sin(theta + delta)) / 255,
-                                 (127. + 127. * math.sin(theta + delta + 2 * math.pi / 3)) / 255,
-                                 (127. + 127. * math.sin(theta + delta + 4 * math.pi / 3)) / 255))
-            triangleList.append([v0, v1, v2])
-
-        for t in triangleList:
-            self.drawTriangle(self.buff, *t, doTexture=True)
+        if chr(keycode) in "wW":
+            self.displayList.save("displaylist.json")
+            print("Saved display list: ", len(self.displayList), "commands")
 
 
 if __name__ == "__main__":
@@ -614,6 +197,8 @@ if __name__ == "__main__":
 
         canvas = Sketch(frame)
         canvas.debug = 0
+        # uncomment to let other processes watch the canvas with SharedBuffReader, see SharedBuff.py
+        # canvas.sharedBuffPath = "pa1_canvas.buff"
 
         frame.Show()
         app.MainLoop()
@@ -0,0 +1,986 @@
+"""
+Drawing part of the PA1 Sketch, which doesn't depend on wxPython or OpenGL. SketchBase holds the control flags, the
+loaded texture, all drawing methods and the test cases. Sketch combines it with CanvasBase to display on a window,
+and HeadlessSketch combines it with a plain Buff to render without any display.
+First version Created on 09/28/2018
+
+:author: micou(Zezhou Sun)
+:version: 2021.2.1
+
+completed by: Austin Bu (U96219698)
+- Completed drawLine and drawTriangle functions, with color smoothing
+"""
+
+import os
+
+import math
+import numpy as np
+
+from Buff import Buff
+from Layer import Layer
+from Point import Point
+from ColorType import ColorType
+from Rasterizer import Rasterizer
+from TextureSampler import TextureSampler
+from VertexBatch import VertexBatch
+from DisplayList import DisplayList, DisplayCommand
+from Palette import Palette
+
+try:
+    # From pip package "Pillow"
+    from PIL import Image
+except Exception:
+    print("Need to install PIL package. Pip package name is Pillow")
+    raise ImportError
+
+
+class SketchBase:
+    """
+    Drawing methods and test cases shared by Sketch and HeadlessSketch. Subclass must provide buff, the Buff to draw on.
+
+    Class Variable Explanation:
+
+    * debug(int): Define debug level for log printing
+
+        * 0 for stable version, minimum log is printed
+        * 1 will print general logs for lines and triangles
+        * 2 will print more details and do some type checking, which might be helpful in debugging
+
+    * texture(Buff): loaded texture in Buff instance
+    * textureSampler(TextureSampler): sampler of texture, its mip pyramid is built once a mipmapped filter is set
+    * doTexture(bool): Control flag of doing texture mapping
+    * doSmooth(bool): Control flag of doing smooth
+    * doAA(bool): Control flag of doing anti-aliasing
+    * doAAlevel(int): anti-alising level, kept for compatibility since anti-aliasing is coverage based
+    * textureFilter(str): texture filtering of batch rasterizer, TextureSampler.NEAREST, BILINEAR, NEAREST_MIPMAP \
+    or TRILINEAR. NEAREST by default, the same texel lookup as drawTriangle. Change it with setTextureFilter
+    * tiledRaster(TiledRasterizer): if set, batch drawing fills buff tiles in parallel with this backend
+    * useBatchRaster(bool): Draw test case lines and triangles with the vectorized batch rasterizer instead of \
+    drawLine and drawTriangle
+    * displayList(DisplayList): primitives submitted since the last clear, used to re-rasterize buff
+    * paletteSeed(int): seed of palette
+    * palette(Palette): seeded random colors, handed out from the first one again after every clear
+
+    Method Instruction:
+
+    * drawPoint: method to draw a point
+    * drawLine: method to draw a line
+    * drawLines: method to draw a list of line segments in batch
+    * drawTriangle: method to draw a triangle with filling and smoothing
+    * drawTriangles: method to draw a list of triangles in batch
+    * drawTriangleStrip, drawTriangleFan: methods to draw triangles sharing vertices
+    * drawPolygon: method to fill a convex or concave polygon
+    * drawRectangle: method to fill a rectangle
+    * submitPoints, submitLines, submitTriangles, submitTriangleStrip, submitTriangleFan, submitPolygon: record \
+    primitives in displayList and draw them
+    * redraw: re-rasterize buff from displayList
+    * testCase*: test cases, all of them accept one argument n_steps and draw on buff
+    """
+
+    debug = 0
+    texture_file_path = "./pattern.jpg"
+    texture = None
+    textureSampler = None
+
+    # control flags
+    doTexture = False
+    doSmooth = False
+    doAA = False
+    doAAlevel = 4
+    useBatchRaster = True
+    tiledRaster = None
+    textureFilter = TextureSampler.NEAREST
+    displayList = None
+    paletteSeed = 0
+    palette = None
+
+    # test case status
+    MIN_N_STEPS = 6
+    MAX_N_STEPS = 192
+    n_steps = 12  # For test case only
+    test_case_index = 0
+    test_case_list = []  # If you need more test case, write them as a method and add it to list
+
+    def __init__(self):
+        """
+        Load texture file to Buff, and load test cases.
+        """
+        self.test_case_list = [lambda _: self.clear(),
+                               self.testCaseLine01,
+                               self.testCaseLine02,
+                               self.testCaseTri01,
+                               self.testCaseTri02,
+                               self.testCaseTriTexture01,
+                               self.testCasePalette01,
+                               self.testCaseTriTexture02]  # method at here must accept one argument, n_steps
+        self.displayList = DisplayList()
+        self.palette = Palette(self.paletteSeed)
+        # Try to read texture file
+        if os.path.isfile(self.texture_file_path):
+            # Read image and make it to an ndarray
+            texture_image = Image.open(self.texture_file_path)
+            texture_array = np.array(texture_image).astype(np.uint8)
+            # Because imported image is upside down, reverse it
+            texture_array = np.flip(texture_array, axis=0)
+            # Store texture image in our Buff format, Buff keeps rows in the same order as image array
+            self.texture = Buff(texture_array.shape[1], texture_array.shape[0])
+            self.texture.setStaticBuffArray(texture_array, rowMajor=True)
+            self.textureSampler = TextureSampler(self.texture, self.textureFilter in TextureSampler.MIPMAP_FILTERS)
+            if self.debug > 0:
+                print("Texture Loaded with shape: ", texture_array.shape)
+                print("Texture Buff have size: ", self.texture.size)
+        else:
+            raise ImportError("Cannot import texture file")
+
+    def setTextureFilter(self, textureFilter):
+        """
+        Set texture filtering of the batch rasterizer, the mip pyramid is built the first time a mipmapped filter is set
+
+        :param textureFilter: TextureSampler.NEAREST, BILINEAR, NEAREST_MIPMAP or TRILINEAR
+        :type textureFilter: str
+        :rtype: None
+        """
+        if textureFilter not in TextureSampler.FILTERS:
+            raise ValueError("Unknown texture filter: " + str(textureFilter))
+        if textureFilter in TextureSampler.MIPMAP_FILTERS and self.textureSampler.levelCount == 1:
+            self.textureSampler.buildMipmaps()
+        self.textureFilter = textureFilter
+
+    def clear(self):
+        """
+        clear buff to its background color, forget all submitted primitives and restart palette
+        """
+        self.buff.clear()
+        self.displayList.clear()
+        self.palette.reset()
+
+    def queryTextureBuffPoint(self, texture: Buff, x: int, y: int) -> Point:
+        """
+        Query a point at texture buff, should only be used in texture buff query
+
+        :param texture: The texture buff you want to query from
+        :type texture: Buff
+        :param x: The query point x coordinate
+        :type x: int
+        :param y: The query point y coordinate
+        :type y: int
+        :rtype: Point
+        """
+        if self.debug > 1:
+            if x != min(max(0, int(x)), texture.width - 1):
+                print("Warning: Texture Query x coordinate outbound")
+            if y != min(max(0, int(y)), texture.height - 1):
+                print("Warning: Texture Query y coordinate outbound")
+        r, g, b = (TextureSampler(texture).texel(x, y) / 255).tolist()
+        return Point((x, y), ColorType(r, g, b))
+
+    @staticmethod
+    def drawPoint(buff, point):
+        """
+        Draw a point on buff
+
+        :param buff: The buff to draw point on
+        :type buff: Buff
+        :param point: A point to draw on buff
+        :type point: Point
+        :rtype: None
+        """
+        x, y = point.coords
+        c = point.color
+        # because we have already specified buff.buff has data type uint8, type conversion will be done in numpy
+        buff.buff[x, y, 0] = c.r * 255
+        buff.buff[x, y, 1] = c.g * 255
+        buff.buff[x, y, 2] = c.b * 255
+        if buff.alpha is not None:
+            buff.alpha[y, x] = 1
+        buff.markDirty(x, y, x + 1, y + 1, 1)
+
+    @staticmethod
+    def drawPoints(buff, batch, clip=None):
+        """
+        Draw every vertex of batch as a point on buff, same as calling drawPoint on them in order
+
+        :param buff: The buff to draw points on
+        :type buff: Buff
+        :param batch: points to draw
+        :type batch: VertexBatch
+        :param clip: only draw inside this rectangle (x_min, y_min, x_max, y_max), max values are exclusive
+        :type clip: tuple[int]
+        :rtype: None
+        """
+        xs, ys = batch.coords[:, 0], batch.coords[:, 1]
+        inside = np.ones(len(batch), dtype=bool)
+        if clip is not None:
+            inside = (xs >= clip[0]) & (xs < clip[2]) & (ys >= clip[1]) & (ys < clip[3])
+        Rasterizer.writeFragments(buff, xs[inside], ys[inside], batch.colors[inside])
+
+    def drawLine(self, buff: Buff, p1: Point, p2: Point, doSmooth=True, doAA=False, doAAlevel=4):
+        """
+        Draw a line between p1 and p2 on buff
+
+        :param buff: The buff to edit
+        :type buff: Buff
+        :param p1: One end point of the line
+        :type p1: Point
+        :param p2: Another end point of the line
+        :type p2: Point
+        :param doSmooth: Control flag of color smooth interpolation
+        :type doSmooth: bool
+        :param doAA: Control flag of doing anti-aliasing. Anti-aliased lines are blended over the buff content
+        :type doAA: bool
+        :param doAAlevel: anti-aliasing level, kept for compatibility. Coverage anti-aliasing doesn't super sample
+        :type doAAlevel: int
+        :rtype: None
+        """
+        ##### TODO 1: Use Bresenham algorithm to draw a line between p1 and p2 on buff.
+        # Requirements:
+        #   1. Only integer is allowed in interpolate point coordinates between p1 and p2
+        #   2. Float number is allowed in interpolate point color
+
+        if doAA:
+            # coverage based anti-aliasing, blended over the current buff content
+            Rasterizer.drawLines(buff, [p1.getCoords()], [p2.getCoords()], [p1.getColor().getRGB()],
+                                 [p2.getColor().getRGB()], doSmooth, True)
+            return
+
+        def bresenham(x1, x2, y1, y2, swap, buff):
+            dx = abs(x2 - x1)
+            dy = abs(y2 - y1)
+            error = (2 * dy) - dx
+            y = y1
+            x_step = 1 if x2 > x1 else -1
+            y_step = 1 if y2 > y1 else -1
+
+            i = x1
+            while True:
+                r, g, b = p1.getColor().getRGB()
+                if doSmooth:
+                    r2, g2, b2 = p2.getColor().getRGB()
+                    progress = abs(i - x1) / dx
+                    r += (r2 - r) * progress
+                    g += (g2 - g) * progress
+                    b += (b2 - b) * progress
+                if swap:
+                    self.drawPoint(buff, Point([y, i], ColorType(r, g, b)))
+                else:
+                    self.drawPoint(buff, Point([i, y], ColorType(r, g, b)))
+                if error >= 0:
+                    y += y_step
+                    error -= (2 * dx)
+                if i == x2:
+                    break
+                i += x_step
+                error += (2 * dy)
+
+        x1, y1 = p1.getCoords()
+        x2, y2 = p2.getCoords()
+
+        # swap x and y based on slope
+        if abs(x2 - x1) < abs(y2 - y1):
+            bresenham(y1, y2, x1, x2, True, buff)
+        else:
+            bresenham(x1, x2, y1, y2, False, buff)
+        return
+
+    def drawLines(self, buff: Buff, starts, ends=None, colors=None, endColors=None, doSmooth=True, doAA=False,
+                  doAAlevel=4, clip=None, depths=None, blendMode=Layer.OVER):
+        """
+        Draw a list of line segments on buff in batch. All segments are rasterized in vectorized form and written with
+        one assignment, the result is the same as calling drawLine on every segment in order.
+        If useBatchRaster is False, fall back to drawLine.
+
+        :param buff: The buff to edit
+        :type buff: Buff
+        :param starts: segment start coordinates, shape (n, 2), or a VertexBatch whose every 2 vertices are a segment.
+                       ends, colors, endColors and depths are taken from the VertexBatch and ignored
+        :type starts: numpy.ndarray[int] or VertexBatch
+        :param ends: segment end coordinates, shape (n, 2)
+        :type ends: numpy.ndarray[int]
+        :param colors: colors at segment starts in [0, 1], shape (n, 3)
+        :type colors: numpy.ndarray[float]
+        :param endColors: colors at segment ends in [0, 1], shape (n, 3). Use colors if not given
+        :type endColors: numpy.ndarray[float]
+        :param doSmooth: Control flag of color smooth interpolation
+        :type doSmooth: bool
+        :param doAA: Control flag of doing anti-aliasing
+        :type doAA: bool
+        :param doAAlevel: anti-aliasing level, kept for compatibility
+        :type doAAlevel: int
+        :param clip: only draw inside this rectangle (x_min, y_min, x_max, y_max), max values are exclusive.
+                     Clipped drawing always uses the batch rasterizer
+        :type clip: tuple[int]
+        :param depths: depth at segment starts and ends, shape (n, 2). Segments are depth tested if buff has a depth
+                       plane, which always uses the batch rasterizer
+        :type depths: numpy.ndarray[float]
+        :param blendMode: Layer.OVER, Layer.ADD or Layer.MULTIPLY, how the batch is put on buff, see
+                          Rasterizer.putFragments. Other modes than Layer.OVER always use the batch rasterizer
+        :type blendMode: str
+        :rtype: None
+        """
+        if isinstance(starts, VertexBatch):
+            depths = None if starts.depths is None else starts.depths.reshape(-1, 2)
+            starts, ends, colors, endColors = starts.segments()
+        if endColors is None:
+            endColors = colors
+        if buff.depth is None:
+            depths = None
+        if not self.useBatchRaster and clip is None and depths is None and blendMode == Layer.OVER:
+            for i in range(len(starts)):
+                self.drawLine(buff,
+                              Point(tuple(int(c) for c in starts[i]), ColorType(*(float(c) for c in colors[i]))),
+                              Point(tuple(int(c) for c in ends[i]), ColorType(*(float(c) for c in endColors[i]))),
+                              doSmooth, doAA, doAAlevel)
+            return
+        if self.tiledRaster is not None and clip is None:
+            self.tiledRaster.drawLines(buff, starts, ends, colors, endColors, doSmooth, doAA, doAAlevel, depths,
+                                       blendMode=blendMode)
+        else:
+            Rasterizer.drawLines(buff, starts, ends, colors, endColors, doSmooth, doAA, doAAlevel, clip, depths,
+                                 blendMode=blendMode)
+
+    def drawTriangle(self, buff: Buff, p1: Point, p2: Point, p3: Point, doSmooth=True, doAA=False, doAAlevel=4, doTexture=False):
+        """
+        draw Triangle to buff. apply smooth color filling if doSmooth set to true, otherwise fill with first point color
+        if doAA is true, apply anti-aliasing to triangle based on doAAlevel given.
+
+        :param buff: The buff to edit
+        :type buff: Buff
+        :param p1: First triangle vertex
+        :param p2: Second triangle vertex
+        :param p3: Third triangle vertex
+        :type p1: Point
+        :type p2: Point
+        :type p3: Point
+        :param doSmooth: Color smooth filling control flag
+        :type doSmooth: bool
+        :param doAA: Anti-aliasing control flag
+        :type doAA: bool
+        :param doAAlevel: Anti-aliasing super sampling level
+        :type doAAlevel: int
+        :param doTexture: Draw triangle with texture control flag
+        :type doTexture: bool
+        :rtype: None
+        """
+        ##### TODO 2: Write a triangle rendering function, which support smooth bilinear interpolation of the vertex color
+        ##### TODO 3(For CS680 Students): Implement texture-mapped fill of triangle. Texture is stored in self.texture
+        # Requirements:
+        #   1. For flat shading of the triangle, use the first vertex color.
+        #   2. Polygon scan fill algorithm and the use of barycentric coordinate are not allowed in this function
+        #   3. You should be able to support both flat shading and smooth shading, which is controlled by doSmooth
+        #   4. For texture-mapped fill of triangles, it should be controlled by doTexture flag.
+
+        # sort points by y coordinate, ascending
+        arr = sorted([p1, p2, p3], key=lambda p: p.getCoords()[1])
+        x1, y1 = arr[0].getCoords()
+        x2, y2 = arr[1].getCoords()
+        x3, y3 = arr[2].getCoords()
+        color = p3.getColor()
+        if y1 == y2:
+            # bottom to top
+            step = 1
+            if not doSmooth:
+                self.drawLine(buff, Point(arr[0].getCoords(), color), arr[1], doSmooth)
+                self.drawPoint(buff, Point(arr[2].getCoords(), color))
+            else:
+                self.drawLine(buff, arr[0], arr[1], doSmooth)
+                self.drawPoint(buff, arr[2])
+        elif y2 == y3:
+            # top to bottom, swap p1 and p3
+            arr.reverse()
+            x1, y1 = arr[0].getCoords()
+            x3, y3 = arr[2].getCoords()
+            step = -1
+            if not doSmooth:
+                self.drawLine(buff, Point(arr[0].getCoords(), color), arr[1], doSmooth)
+                self.drawPoint(buff, Point(arr[2].getCoords(), color))
+            else:
+                self.drawLine(buff, arr[0], arr[1], doSmooth)
+                self.drawPoint(buff, arr[2])
+        else:
+            # color smoothing
+            if doSmooth:
+                progress = (y2 - y1) / (y3 - y1)
+                r, g, b = tuple(
+                    np.add(
+                        np.subtract(
+                            arr[2].getColor().getRGB(), arr[0].getColor().getRGB()
+                        ) * progress, 
+                        arr[0].getColor().getRGB()
+                    )
+                )
+                color = ColorType(r, g, b)
+
+            # split triangle and call function again
+            x_mid = round((y2 - y1) * (x3 - x1) / (y3 - y1) + x1)
+            p_mid = Point([x_mid, y2], color)
+            self.drawTriangle(buff, arr[0], arr[1], p_mid, doSmooth)
+            self.drawTriangle(buff, arr[1], arr[2], p_mid, doSmooth)
+            
+            # redraw perimeter with anti aliasing
+            if doAA:
+                if not doSmooth:
+                    color = p3.getColor()
+                    self.drawLine(buff, Point(p1.getCoords(), color), Point(p2.getCoords(), color), False, True, doAAlevel)
+                    self.drawLine(buff, Point(p2.getCoords(), color), Point(p3.getCoords(), color), False, True, doAAlevel)
+                    self.drawLine(buff, Point(p3.getCoords(), color), Point(p1.getCoords(), color), False, True, doAAlevel)
+                else:
+                    self.drawLine(buff, p1, p2, True, True, doAAlevel)
+                    self.drawLine(buff, p2, p3, True, True, doAAlevel)
+                    self.drawLine(buff, p3, p1, True, True, doAAlevel)
+
+            return
+        slope_1 = (x3 - x1) / (y3 - y1)
+        slope_2 = (x3 - x2) / (y3 - y2)
+        for i in range(y1, y3, step):
+            # color smoothing
+            color1 = p3.getColor()
+            color2 = p3.getColor()
+            if doSmooth:
+                progress1 = (i - y1) / (y3 - y1)
+                r1, g1, b1 = tuple(
+                    np.add(
+                        np.subtract(
+                            arr[2].getColor().getRGB(), arr[0].getColor().getRGB()
+                        ) * progress1, 
+                        arr[0].getColor().getRGB()
+                    )
+                )
+                color1 = ColorType(r1, g1, b1)
+                progress2 = (i - y2) / (y3 - y2)
+                r2, g2, b2 = tuple(
+                    np.add(
+                        np.subtract(
+                            arr[2].getColor().getRGB(), arr[1].getColor().getRGB()
+                        ) * progress2, 
+                        arr[1].getColor().getRGB()
+                    )
+                )
+                color2 = ColorType(r2, g2, b2)
+
+            x_left = round((i - y1) * slope_1 + x1)
+            x_right = round((i - y2) * slope_2 + x2)
+            if x_left == x_right:
+                self.drawPoint(buff, Point([x_left, i], color1))
+            else:
+                self.drawLine(buff, Point([x_left, i], color1), Point([x_right, i], color2), doSmooth)
+        return
+
+    def drawTriangles(self, buff: Buff, triangleList, doSmooth=True, doAA=False, doAAlevel=4, doTexture=False,
+                      clip=None, blendMode=Layer.OVER):
+        """
+        draw a list of triangles to buff in batch. Covered pixels of all triangles are computed as NumPy arrays and
+        written with one assignment, the result is the same as calling drawTriangle on every triangle in order.
+        If useBatchRaster is False, fall back to drawTriangle, which is kept as the reference implementation.
+
+        :param buff: The buff to edit
+        :type buff: Buff
+        :param triangleList: triangles to draw, every triangle is a list of three vertices. Or a VertexBatch whose
+                             every 3 vertices are a triangle. If the VertexBatch has depths and buff has a depth
+                             plane, triangles are depth tested, which always uses the batch rasterizer
+        :type triangleList: list[list[Point]] or VertexBatch
+        :param doSmooth: Color smooth filling control flag
+        :type doSmooth: bool
+        :param doAA: Anti-aliasing control flag
+        :type doAA: bool
+        :param doAAlevel: Anti-aliasing super sampling level
+        :type doAAlevel: int
+        :param doTexture: Draw triangle with texture control flag
+        :type doTexture: bool
+        :param clip: only draw inside this rectangle (x_min, y_min, x_max, y_max), max values are exclusive.
+                     Clipped drawing always uses the batch rasterizer
+        :type clip: tuple[int]
+        :param blendMode: Layer.OVER, Layer.ADD or Layer.MULTIPLY, how the batch and its anti-aliased perimeter are put on buff, see
+                          Rasterizer.putFragments. Other modes than Layer.OVER always use the batch rasterizer
+        :type blendMode: str
+        :rtype: None
+        """
+        depthTest = buff.depth is not None and isinstance(triangleList, VertexBatch) and \
+            triangleList.depths is not None
+        if not self.useBatchRaster and clip is None and not depthTest and blendMode == Layer.OVER:
+            if isinstance(triangleList, VertexBatch):
+                points = triangleList.toPoints()
+                triangleList = [points[i:i + 3] for i in range(0, len(points), 3)]
+            for t in triangleList:
+                self.drawTriangle(buff, *t, doSmooth, doAA, doAAlevel, doTexture)
+            return
+        if len(triangleList) == 0:
+            return
+
+        if not isinstance(triangleList, VertexBatch):
+            triangleList = VertexBatch.fromPoints(triangleList)
+        coords, colors, uvs = triangleList.triangles()
+        depths = triangleList.depths.reshape(-1, 3) if depthTest else None
+        if not doTexture or self.texture is None:
+            uvs = None
+        # with anti-aliasing, remember which triangle filled every pixel last, drawTriangle blends the perimeter of a
+        # triangle before the next triangle is filled, so a later fill covers the perimeters before it
+        owner = np.full((buff.height, buff.width), -1, dtype=np.int64) if doAA else None
+        if self.tiledRaster is not None and clip is None:
+            self.tiledRaster.drawTriangles(buff, coords, colors, doSmooth, uvs, self.textureSampler, self.textureFilter,
+                                           depths=depths, owner=owner, blendMode=blendMode)
+        else:
+            Rasterizer.drawTriangles(buff, coords, colors, doSmooth, uvs, self.textureSampler, self.textureFilter,
+                                     clip, depths=depths, owner=owner, blendMode=blendMode)
+
+        # redraw perimeter with anti aliasing, only triangles which have been split get it in drawTriangle
+        if doAA:
+            y = coords[:, :, 1]
+            split = (y[:, 0] != y[:, 1]) & (y[:, 1] != y[:, 2]) & (y[:, 0] != y[:, 2])
+            order = np.repeat(np.flatnonzero(split), 3)
+            coords = coords[split]
+            colors = colors[split]
+            if not doSmooth:
+                colors = np.repeat(colors[:, 2:3], 3, axis=1)
+            if depths is not None:
+                depths = depths[split]
+                depths = np.stack([depths.reshape(-1), np.roll(depths, -1, axis=1).reshape(-1)], axis=1)
+            # edges p1p2, p2p3, p3p1 of every triangle in order
+            starts, ends = coords.reshape(-1, 2), np.roll(coords, -1, axis=1).reshape(-1, 2)
+            colors, endColors = colors.reshape(-1, 3), np.roll(colors, -1, axis=1).reshape(-1, 3)
+            if self.tiledRaster is not None and clip is None:
+                self.tiledRaster.drawLines(buff, starts, ends, colors, endColors, doSmooth, True, doAAlevel, depths,
+                                           owner, order, blendMode)
+            else:
+                Rasterizer.drawLines(buff, starts, ends, colors, endColors, doSmooth, True, doAAlevel, clip, depths,
+                                     owner, order, blendMode)
+
+    def drawTriangleStrip(self, buff: Buff, batch, doSmooth=True, doAA=False, doAAlevel=4, doTexture=False,
+                          clip=None, blendMode=Layer.OVER):
+        """
+        Draw a triangle strip on buff, triangle i is made of vertices i, i + 1 and i + 2 of batch, see
+        VertexBatch.stripIndices. Filling is the same as drawTriangles on the triangles of the strip, but with
+        anti-aliasing only the outline of the strip is blended, each edge once, so seams between neighbour triangles
+        don't get anti-aliased twice.
+
+        :param buff: The buff to edit
+        :type buff: Buff
+        :param batch: vertices of the strip
+        :type batch: VertexBatch
+        :param doSmooth: Color smooth filling control flag
+        :type doSmooth: bool
+        :param doAA: Anti-aliasing control flag
+        :type doAA: bool
+        :param doAAlevel: Anti-aliasing super sampling level
+        :type doAAlevel: int
+        :param doTexture: Draw triangle with texture control flag
+        :type doTexture: bool
+        :param clip: only draw inside this rectangle (x_min, y_min, x_max, y_max), max values are exclusive
+        :type clip: tuple[int]
+        :param blendMode: Layer.OVER, Layer.ADD or Layer.MULTIPLY, see drawTriangles
+        :type blendMode: str
+        :rtype: None
+        """
+        self.__drawIndexedTriangles(buff, batch, VertexBatch.stripIndices(len(batch)), doSmooth, doAA, doAAlevel,
+                                    doTexture, clip, blendMode)
+
+    def drawTriangleFan(self, buff: Buff, batch, doSmooth=True, doAA=False, doAAlevel=4, doTexture=False,
+                        clip=None, blendMode=Layer.OVER):
+        """
+        Draw a triangle fan on buff, triangle i is made of vertices 0, i + 1 and i + 2 of batch, see
+        VertexBatch.fanIndices. Same as drawTriangleStrip otherwise
+
+        :param buff: The buff to edit
+        :type buff: Buff
+        :param batch: vertices of the fan, the first one is the center
+        :type batch: VertexBatch
+        :param doSmooth: Color smooth filling control flag
+        :type doSmooth: bool
+        :param doAA: Anti-aliasing control flag
+        :type doAA: bool
+        :param doAAlevel: Anti-aliasing super sampling level
+        :type doAAlevel: int
+        :param doTexture: Draw triangle with texture control flag
+        :type doTexture: bool
+        :param clip: only draw inside this rectangle (x_min, y_min, x_max, y_max), max values are exclusive
+        :type clip: tuple[int]
+        :param blendMode: Layer.OVER, Layer.ADD or Layer.MULTIPLY, see drawTriangles
+        :type blendMode: str
+        :rtype: None
+        """
+        self.__drawIndexedTriangles(buff, batch, VertexBatch.fanIndices(len(batch)), doSmooth, doAA, doAAlevel,
+                                    doTexture, clip, blendMode)
+
+    def __drawIndexedTriangles(self, buff, batch, indices, doSmooth, doAA, doAAlevel, doTexture, clip, blendMode):
+        """
+        Fill the triangles given by vertex indices of batch, then anti-alias the edges used by only one triangle
+        """
+        if len(indices) == 0:
+            return
+        self.drawTriangles(buff, batch.take(indices), doSmooth, False, doAAlevel, doTexture, clip, blendMode)
+        if not doAA:
+            return
+        # edges p1p2, p2p3, p3p1 of every triangle, an edge shared by two triangles is a seam
+        edges = np.stack([indices, np.roll(indices, -1, axis=1)], axis=2).reshape(-1, 2)
+        _, first, counts = np.unique(np.sort(edges, axis=1), axis=0, return_index=True, return_counts=True)
+        outline = np.sort(first[counts == 1])
+        starts, ends = edges[outline, 0], edges[outline, 1]
+        if doSmooth:
+            colors, endColors = batch.colors[starts], batch.colors[ends]
+        else:
+            # a flat triangle takes the color of its third vertex
+            colors = endColors = batch.colors[indices[outline // 3, 2]]
+        depths = None
+        if batch.depths is not None:
+            depths = np.stack([batch.depths[starts], batch.depths[ends]], axis=1)
+        self.drawLines(buff, batch.coords[starts], batch.coords[ends], colors, endColors, doSmooth, True, doAAlevel,
+                       clip, depths, blendMode)
+
+    def drawPolygon(self, buff: Buff, batch, doSmooth=True, doAA=False, doAAlevel=4, clip=None, evenOdd=True,
+                    blendMode=Layer.OVER):
+        """
+        Fill a closed polygon on buff in one call, convex or concave, with any number of edges. See
+        Rasterizer.polygonFragments for the edge table fill. Polygons which share an edge don't both draw its pixels.
+
+        :param buff: The buff to edit
+        :type buff: Buff
+        :param batch: polygon vertices in order, the last one connects to the first
+        :type batch: VertexBatch
+        :param doSmooth: Color smooth filling control flag, fill with the color of the first vertex if False
+        :type doSmooth: bool
+        :param doAA: Anti-aliasing control flag, blends the outline of the polygon
+        :type doAA: bool
+        :param doAAlevel: Anti-aliasing super sampling level
+        :type doAAlevel: int
+        :param clip: only draw inside this rectangle (x_min, y_min, x_max, y_max), max values are exclusive
+        :type clip: tuple[int]
+        :param evenOdd: use even-odd fill rule, otherwise non-zero winding rule
+        :type evenOdd: bool
+        :param blendMode: Layer.OVER, Layer.ADD or Layer.MULTIPLY, see drawTriangles
+        :type blendMode: str
+        :rtype: None
+        """
+        if len(batch) < 3:
+            return
+        Rasterizer.drawPolygon(buff, batch.coords, batch.colors, doSmooth, clip, evenOdd, blendMode)
+        if doAA:
+            colors = batch.colors if doSmooth else np.broadcast_to(batch.colors[0], batch.colors.shape)
+            self.drawLines(buff, batch.coords, np.roll(batch.coords, -1, axis=0), colors,
+                           np.roll(colors, -1, axis=0), doSmooth, True, doAAlevel, clip, blendMode=blendMode)
+
+    def submitPoints(self, batch):
+        """
+        Record points in displayList and draw them on buff
+
+        :param batch: points to draw
+        :type batch: VertexBatch
+        :rtype: None
+        """
+        self.drawCommand(self.buff, self.displayList.append(DisplayCommand.POINTS, batch))
+
+    def submitLines(self, batch, doSmooth=None, doAA=None):
+        """
+        Record line segments in displayList and draw them on buff. A flag left as None follows the sketch flag of the
+        same name, so the segments are re-rasterized when that flag is toggled
+
+        :param batch: segments to draw, every 2 vertices are a segment
+        :type batch: VertexBatch
+        :param doSmooth: Control flag of color smooth interpolation
+        :type doSmooth: bool
+        :param doAA: Control flag of doing anti-aliasing
+        :type doAA: bool
+        :rtype: None
+        """
+        self.drawCommand(self.buff, self.displayList.append(DisplayCommand.LINES, batch,
+                                                            {"doSmooth": doSmooth, "doAA": doAA}))
+
+    def submitTriangles(self, batch, doSmooth=None, doAA=None, doTexture=None):
+        """
+        Record triangles in displayList and draw them on buff. A flag left as None follows the sketch flag of the
+        same name, so the triangles are re-rasterized when that flag is toggled
+
+        :param batch: triangles to draw, every 3 vertices are a triangle
+        :type batch: VertexBatch
+        :param doSmooth: Color smooth filling control flag
+        :type doSmooth: bool
+        :param doAA: Anti-aliasing control flag
+        :type doAA: bool
+        :param doTexture: Draw triangle with texture control flag
+        :type doTexture: bool
+        :rtype: None
+        """
+        self.drawCommand(self.buff, self.displayList.append(DisplayCommand.TRIANGLES, batch,
+                                                            {"doSmooth": doSmooth, "doAA": doAA,
+                                                             "doTexture": doTexture}))
+
+    def submitTriangleStrip(self, batch, doSmooth=None, doAA=None, doTexture=None):
+        """
+        Record a triangle strip in displayList and draw it on buff, flags work the same as in submitTriangles
+
+        :param batch: vertices of the strip
+        :type batch: VertexBatch
+        :rtype: None
+        """
+        self.drawCommand(self.buff, self.displayList.append(DisplayCommand.TRIANGLE_STRIP, batch,
+                                                            {"doSmooth": doSmooth, "doAA": doAA,
+                                                             "doTexture": doTexture}))
+
+    def submitTriangleFan(self, batch, doSmooth=None, doAA=None, doTexture=None):
+        """
+        Record a triangle fan in displayList and draw it on buff, flags work the same as in submitTriangles
+
+        :param batch: vertices of the fan, the first one is the center
+        :type batch: VertexBatch
+        :rtype: None
+        """
+        self.drawCommand(self.buff, self.displayList.append(DisplayCommand.TRIANGLE_FAN, batch,
+                                                            {"doSmooth": doSmooth, "doAA": doAA,
+                                                             "doTexture": doTexture}))
+
+    def submitPolygon(self, batch, doSmooth=None, doAA=None):
+        """
+        Record a polygon in displayList and draw it on buff with even-odd fill rule, flags work the same as in
+        submitTriangles
+
+        :param batch: polygon vertices in order
+        :type batch: VertexBatch
+        :rtype: None
+        """
+        self.drawCommand(self.buff, self.displayList.append(DisplayCommand.POLYGON, batch,
+                                                            {"doSmooth": doSmooth, "doAA": doAA}))
+
+    def drawCommand(self, buff, command, clip=None):
+        """
+        Draw one display list command on buff with its flags resolved against this sketch
+
+        :param buff: The buff to edit
+        :type buff: Buff
+        :param command: the command to draw
+        :type command: DisplayCommand
+        :param clip: only draw inside this rectangle (x_min, y_min, x_max, y_max), max values are exclusive
+        :type clip: tuple[int]
+        :rtype: None
+        """
+        flags = command.resolveFlags(self)
+        if command.kind == DisplayCommand.POINTS:
+            self.drawPoints(buff, command.batch, clip)
+        elif command.kind == DisplayCommand.LINES:
+            self.drawLines(buff, command.batch, doSmooth=flags["doSmooth"], doAA=flags["doAA"],
+                           doAAlevel=self.doAAlevel, clip=clip)
+        elif command.kind == DisplayCommand.TRIANGLES:
+            self.drawTriangles(buff, command.batch, flags["doSmooth"], flags["doAA"], self.doAAlevel,
+                               flags["doTexture"], clip)
+        elif command.kind == DisplayCommand.TRIANGLE_STRIP:
+            self.drawTriangleStrip(buff, command.batch, flags["doSmooth"], flags["doAA"], self.doAAlevel,
+                                   flags["doTexture"], clip)
+        elif command.kind == DisplayCommand.TRIANGLE_FAN:
+            self.drawTriangleFan(buff, command.batch, flags["doSmooth"], flags["doAA"], self.doAAlevel,
+                                 flags["doTexture"], clip)
+        else:
+            self.drawPolygon(buff, command.batch, flags["doSmooth"], flags["doAA"], self.doAAlevel, clip)
+
+    def redraw(self, flags=None, rect=None):
+        """
+        Re-rasterize buff from displayList. Only the region which can change is cleared and drawn again, all commands
+        overlapping it are replayed in submission order clipped to it.
+
+        :param flags: names of toggled flags, only the region of commands following them is drawn again.
+                      Redraw all commands if not given
+        :type flags: list[str]
+        :param rect: region to draw again (x_min, y_min, x_max, y_max), max values are exclusive. Whole buff if not
+                     given
+        :type rect: tuple[int]
+        :return: the region drawn again, None if nothing is affected
+        :rtype: tuple[int]
+        """
+        if flags is not None:
+            rect = self.displayList.affectedRect(flags)
+            if rect is None:
+                return None
+        if rect is None:
+            rect = (0, 0, self.buff.width, self.buff.height)
+        rect = (max(0, rect[0]), max(0, rect[1]), min(self.buff.width, rect[2]), min(self.buff.height, rect[3]))
+        if rect[0] >= rect[2] or rect[1] >= rect[3]:
+            return None
+        self.buff.clear(rect)
+        for command in self.displayList.overlapping(rect):
+            self.drawCommand(self.buff, command, rect)
+        return rect
+
+    @staticmethod
+    def __vertexBatch(primitiveList):
+        """
+        Turn a list of segments or triangles, whose vertices are (coords, color) pairs, into a VertexBatch
+        """
+        return VertexBatch([v[0] for primitive in primitiveList for v in primitive],
+                           [v[1] for primitive in primitiveList for v in primitive])
+
+    # test for lines lines in all directions
+    def testCaseLine01(self, n_steps):
+        center_x = int(self.buff.width / 2)
+        center_y = int(self.buff.height / 2)
+        radius = int(min(self.buff.width, self.buff.height) * 0.45)
+
+        v0 = ([center_x, center_y], (1, 1, 0))
+        lineList = []
+        for step in range(0, n_steps):
+            theta = math.pi * step / n_steps
+            v1 = ([center_x + int(math.sin(theta) * radius), center_y + int(math.cos(theta) * radius)],
+                  (0, 0, (1 - step / n_steps)))
+            v2 = ([center_x - int(math.sin(theta) * radius), center_y - int(math.cos(theta) * radius)],
+                  (0, (1 - step / n_steps), 0))
+            lineList.append((v2, v0))
+            lineList.append((v0, v1))
+        self.submitLines(self.__vertexBatch(lineList), doSmooth=True, doAA=False)
+
+    # test for lines: drawing circle and petal 
+    def testCaseLine02(self, n_steps):
+        n_steps = 2 * n_steps
+        d_theta = 2 * math.pi / n_steps
+        d_petal = 12 * math.pi / n_steps
+        cx = int(self.buff.width / 2)
+        cy = int(self.buff.height / 2)
+        radius = (0.75 * min(cx, cy))
+        p = radius * 0.25
+
+        # Outer petals
+        lineList = []
+        for i in range(n_steps + 2):
+            lineList.append((((math.floor(0.5 + radius * math.sin(d_theta * i) + p * math.sin(d_petal * i)) + cx,
+                               math.floor(0.5 + radius * math.cos(d_theta * i) + p * math.cos(d_petal * i)) + cy),
+                              (1, (128 + math.sin(d_theta * i * 5) * 127) / 255,
+                               (128 + math.cos(d_theta * i * 5) * 127) / 255)),
+                             ((math.floor(
+                                 0.5 + radius * math.sin(d_theta * (i + 1)) + p * math.sin(d_petal * (i + 1))) + cx,
+                               math.floor(0.5 + radius * math.cos(d_theta * (i + 1)) + p * math.cos(
+                                   d_petal * (i + 1))) + cy),
+                              (1, (128 + math.sin(d_theta * 5 * (i + 1)) * 127) / 255,
+                               (128 + math.cos(d_theta * 5 * (i + 1)) * 127) / 255))))
+        self.submitLines(self.__vertexBatch(lineList), doSmooth=True)
+
+        # Draw circle
+        lineList = []
+        for i in range(n_steps + 1):
+            v0 = ((math.floor(0.5 * radius * math.sin(d_theta * i)) + cx,
+                   math.floor(0.5 * radius * math.cos(d_theta * i)) + cy), (1, 97. / 255, 0))
+            v1 = ((math.floor(0.5 * radius * math.sin(d_theta * (i + 1))) + cx,
+                   math.floor(0.5 * radius * math.cos(d_theta * (i + 1))) + cy), (1, 97. / 255, 0))
+            lineList.append((v0, v1))
+        self.submitLines(self.__vertexBatch(lineList), doSmooth=True)
+
+    # test for smooth filling triangle
+    def testCaseTri01(self, n_steps):
+        n_steps = int(n_steps / 2)
+        delta = 2 * math.pi / n_steps
+        radius = int(min(self.buff.width, self.buff.height) * 0.45)
+        cx = int(self.buff.width / 2)
+        cy = int(self.buff.height / 2)
+        theta = 0
+
+        # the triangles share the center and their rim vertices, so they are submitted as one fan
+        fan = [((cx, cy), (1, 1, 1))]
+        for _ in range(n_steps):
+            theta += delta
+            fan.append(((int(cx + math.sin(theta) * radius), int(cy + math.cos(theta) * radius)),
+                        ((127. + 127. * math.sin(theta)) / 255,
+                         (127. + 127. * math.sin(theta + 2 * math.pi / 3)) / 255,
+                         (127. + 127. * math.sin(theta + 4 * math.pi / 3)) / 255)))
+        fan.append(((int(cx + math.sin(theta + delta) * radius), int(cy + math.cos(theta + delta) * radius)),
+                    ((127. + 127. * math.sin(theta + delta)) / 255,
+                     (127. + 127. * math.sin(theta + delta + 2 * math.pi / 3)) / 255,
+                     (127. + 127. * math.sin(theta + delta + 4 * math.pi / 3)) / 255)))
+        self.submitTriangleFan(self.__vertexBatch([fan]), doSmooth=False, doTexture=False)
+
+    def testCaseTri02(self, n_steps):
+        # Test case for no smooth color filling triangle
+        n_steps = int(n_steps / 2)
+        delta = 2 * math.pi / n_steps
+        radius = int(min(self.buff.width, self.buff.height) * 0.45)
+        cx = int(self.buff.width / 2)
+        cy = int(self.buff.height / 2)
+        theta = 0
+
+        triangleList = []
+        for _ in range(n_steps):
+            theta += delta
+            v0 = ((cx, cy), (1, 1, 1))
+            v1 = ((int(cx + math.sin(theta) * radius), int(cy + math.cos(theta) * radius)),
+                  ((127. + 127. * math.sin(theta)) / 255,
+                   (127. + 127. * math.sin(theta + 2 * math.pi / 3)) / 255,
+                   (127. + 127. * math.sin(theta + 4 * math.pi / 3)) / 255))
+            v2 = ((int(cx + math.sin(theta + delta) * radius), int(cy + math.cos(theta + delta) * radius)),
+                  ((127. + 127. * math.sin(theta + delta)) / 255,
+                   (127. + 127. * math.sin(theta + delta + 2 * math.pi / 3)) / 255,
+                   (127. + 127. * math.sin(theta + delta + 4 * math.pi / 3)) / 255))
+            triangleList.append([v0, v1, v2])
+        self.submitTriangles(self.__vertexBatch(triangleList), doSmooth=True, doTexture=False)
+
+    def testCaseTriTexture01(self, n_steps):
+        # Test case for no smooth color filling triangle
+        n_steps = int(n_steps / 2)
+        delta = 2 * math.pi / n_steps
+        radius = int(min(self.buff.width, self.buff.height) * 0.45)
+        cx = int(self.buff.width / 2)
+        cy = int(self.buff.height / 2)
+        theta = 0
+
+        triangleList = []
+        for _ in range(n_steps):
+            theta += delta
+            v0 = ((cx, cy), (1, 1, 1))
+            v1 = ((int(cx + math.sin(theta) * radius), int(cy + math.cos(theta) * radius)),
+                  ((127. + 127. * math.sin(theta)) / 255,
+                   (127. + 127. * math.sin(theta + 2 * math.pi / 3)) / 255,
+                   (127. + 127. * math.sin(theta + 4 * math.pi / 3)) / 255))
+            v2 = ((int(cx + math.sin(theta + delta) * radius), int(cy + math.cos(theta + delta) * radius)),
+                  ((127. + 127. * math.sin(theta + delta)) / 255,
+                   (127. + 127. * math.sin(theta + delta + 2 * math.pi / 3)) / 255,
+                   (127. + 127. * math.sin(theta + delta + 4 * math.pi / 3)) / 255))
+            triangleList.append([v0, v1, v2])
+
+        self.submitTriangles(self.__vertexBatch(triangleList), doSmooth=True, doAA=False, doTexture=True)
+
+    def testCaseTriTexture02(self, n_steps):
+        # Test case for texture filtering, the texture is mapped onto the square around a fan and minified on small
+        # canvases. Select the filter with setTextureFilter
+        n_steps = int(n_steps / 2)
+        delta = 2 * math.pi / n_steps
+        radius = int(min(self.buff.width, self.buff.height) * 0.45)
+        cx = int(self.buff.width / 2)
+        cy = int(self.buff.height / 2)
+
+        theta = np.arange(n_steps + 1) * delta
+        rim = np.stack([cx + np.sin(theta) * radius, cy + np.cos(theta) * radius], axis=1).astype(np.int64)
+        coords = np.stack([np.broadcast_to([cx, cy], (n_steps, 2)), rim[:-1], rim[1:]], axis=1).reshape(-1, 2)
+        uvs = (coords - [cx - radius, cy - radius]) / max(2 * radius, 1)
+        self.submitTriangles(VertexBatch(coords, np.ones((len(coords), 3)), uvs), doSmooth=True, doAA=False,
+                             doTexture=True)
+
+    def testCasePalette01(self, n_steps):
+        # Test case for flat triangles with random colors, the same for every render with the same palette seed
+        n_cells = max(int(n_steps / 2), 1)
+        size = int(min(self.buff.width, self.buff.height) * 0.9)
+        x0 = int((self.buff.width - size) / 2)
+        y0 = int((self.buff.height - size) / 2)
+
+        # grid corners, every cell is split into two triangles along its diagonal
+        edges = (np.arange(n_cells + 1) * size / n_cells).astype(np.int32)
+        gx, gy = np.meshgrid(edges[:-1], edges[:-1])
+        gx1, gy1 = np.meshgrid(edges[1:], edges[1:])
+        ll = np.stack([gx + x0, gy + y0], axis=-1).reshape(-1, 2)
+        ur = np.stack([gx1 + x0, gy1 + y0], axis=-1).reshape(-1, 2)
+        lr = np.stack([ur[:, 0], ll[:, 1]], axis=-1)
+        ul = np.stack([ll[:, 0], ur[:, 1]], axis=-1)
+        coords = np.stack([ll, lr, ur, ll, ur, ul], axis=1).reshape(-1, 2)
+        colors = np.repeat(self.palette.colors(np.arange(len(coords) // 3)), 3, axis=0)
+        self.submitTriangles(VertexBatch(coords, colors), doSmooth=False, doTexture=False)
+
+    def drawRectangle(self, buff: Buff, p1: Point, p2: Point):
+        """
+        Fill the rectangle with corners p1 and p2, both included, with the color of p1
+
+        :param buff: The buff to edit
+        :type buff: Buff
+        :param p1: One corner of the rectangle
+        :type p1: Point
+        :param p2: The opposite corner of the rectangle
+        :type p2: Point
+        :rtype: None
+        """
+        x1, y1 = p1.getCoords()
+        x2, y2 = p2.getCoords()
+
+        x_list = sorted([x1, x2])
+        y_list = sorted([y1, y2])
+
+        buff.fillRect((x_list[0], y_list[0], x_list[1] + 1, y_list[1] + 1), p1.getColor())
+
@@ -0,0 +1,233 @@
+"""
+Defines TextureSampler class to look up texture colors directly from the uint8 ndarray behind a Buff.
+No Point or ColorType is created for texels, and all queries take arrays of coordinates, so a whole triangle worth of
+texels can be fetched in one vectorized gather.
+
+Texture coordinates (u, v) are normalized to [0, 1], (0, 0) is the texel at buff position (0, 0) and (1, 1) is the
+opposite corner. Coordinates outside of [0, 1] are clamped to the texture border.
+
+For minified textures a mip pyramid can be built once, level k is the texture downsampled by 2^k with a 2x2 box filter.
+The level of detail (lod) of a triangle is chosen from the screen space derivatives of its texture coordinates, then
+samples are taken from the nearest level or blended between the two nearest levels (trilinear).
+"""
+
+import numpy as np
+
+
+class TextureSampler:
+    """
+    Sample texture colors from a Buff with nearest, bilinear, nearest mip level or trilinear filtering
+    """
+    NEAREST = "nearest"
+    BILINEAR = "bilinear"
+    NEAREST_MIPMAP = "nearestMipmap"
+    TRILINEAR = "trilinear"
+    MIPMAP_FILTERS = (NEAREST_MIPMAP, TRILINEAR)
+    FILTERS = (NEAREST, BILINEAR) + MIPMAP_FILTERS
+
+    texture = None
+    mipmaps = None
+
+    def __init__(self, texture, mipmap=False):
+        """
+        The sampler reads texture.data at query time, so level 0 always sees the current texture content without
+        copying it. Mip levels above 0 are computed once here, call buildMipmaps again if the texture is changed.
+
+        :param texture: The texture buff to sample from
+        :type texture: Buff
+        :param mipmap: build the mip pyramid, without it mipmapped filters sample level 0 only
+        :type mipmap: bool
+        :rtype: None
+        """
+        self.texture = texture
+        self.mipmaps = []
+        if mipmap:
+            self.buildMipmaps()
+
+    def buildMipmaps(self):
+        """
+        Build mip levels 1 and above, each one is half the size of the level below down to 1x1. Odd rows or
+        columns at the border are dropped before averaging.
+
+        :rtype: None
+        """
+        self.mipmaps = []
+        level = self.texture.data.astype(np.float64)
+        while level.shape[0] > 1 or level.shape[1] > 1:
+            h = max(1, level.shape[0] // 2)
+            w = max(1, level.shape[1] // 2)
+            # a side of length 1 is not halved, its only texel is used twice
+            rows = np.repeat(level, 2, axis=0) if level.shape[0] == 1 else level
+            rows = np.repeat(rows, 2, axis=1) if level.shape[1] == 1 else rows
+            rows = rows[:2 * h, :2 * w]
+            level = (rows[0::2, 0::2] + rows[1::2, 0::2] + rows[0::2, 1::2] + rows[1::2, 1::2]) / 4
+            self.mipmaps.append(np.round(level).astype(np.uint8))
+
+    @property
+    def levelCount(self):
+        """
+        Number of mip levels including level 0
+
+        :rtype: int
+        """
+        return 1 + len(self.mipmaps)
+
+    def level(self, index):
+        """
+        Texel array of a mip level, shape (height, width, 3)
+
+        :param index: level index, 0 is the texture itself
+        :type index: int
+        :rtype: numpy.ndarray[uint8]
+        """
+        return self.texture.data if index == 0 else self.mipmaps[index - 1]
+
+    def texel(self, x, y, level=0):
+        """
+        Fetch texels at integer coordinates of a mip level, coordinates are clamped to the level size
+
+        :param x: texel x coordinates
+        :type x: numpy.ndarray[int] or int
+        :param y: texel y coordinates
+        :type y: numpy.ndarray[int] or int
+        :param level: mip level index
+        :type level: int
+        :return: texel colors in [0, 255], shape (n, 3)
+        :rtype: numpy.ndarray[uint8]
+        """
+        data = self.level(level)
+        x = np.clip(np.asarray(x, dtype=np.int64), 0, data.shape[1] - 1)
+        y = np.clip(np.asarray(y, dtype=np.int64), 0, data.shape[0] - 1)
+        return data[y, x, :]
+
+    def sample(self, u, v, textureFilter=NEAREST, lod=None):
+        """
+        Sample texture colors at normalized texture coordinates
+
+        :param u: horizontal texture coordinates in [0, 1]
+        :type u: numpy.ndarray[float] or float
+        :param v: vertical texture coordinates in [0, 1]
+        :type v: numpy.ndarray[float] or float
+        :param textureFilter: TextureSampler.NEAREST, BILINEAR, NEAREST_MIPMAP or TRILINEAR
+        :type textureFilter: str
+        :param lod: level of detail of every sample, only used by mipmapped filters. Level 0 if not given
+        :type lod: numpy.ndarray[float] or float
+        :return: colors in [0, 1], shape (n, 3)
+        :rtype: numpy.ndarray[float]
+        """
+        u = np.asarray(u, dtype=np.float64)
+        v = np.asarray(v, dtype=np.float64)
+        if textureFilter == self.NEAREST:
+            return self.sampleNearest(u, v)
+        if textureFilter == self.BILINEAR:
+            return self.sampleBilinear(u, v)
+        if textureFilter in self.MIPMAP_FILTERS:
+            lod = np.zeros(u.shape) if lod is None else np.broadcast_to(np.asarray(lod, dtype=np.float64), u.shape)
+            return self.sampleMipmap(u, v, lod, textureFilter == self.TRILINEAR)
+        raise ValueError("Unknown texture filter: " + str(textureFilter))
+
+    def sampleNearest(self, u, v, level=0):
+        """
+        Nearest texel lookup
+
+        :rtype: numpy.ndarray[float]
+        """
+        data = self.level(level)
+        x = (u * data.shape[1]).astype(np.int64)
+        y = (v * data.shape[0]).astype(np.int64)
+        return self.texel(x, y, level) / 255
+
+    def sampleBilinear(self, u, v, level=0):
+        """
+        Bilinear interpolation between the four texels around each query, texel centers are at (i + 0.5) / size
+
+        :rtype: numpy.ndarray[float]
+        """
+        data = self.level(level)
+        fx = u * data.shape[1] - 0.5
+        fy = v * data.shape[0] - 0.5
+        x0 = np.floor(fx)
+        y0 = np.floor(fy)
+        wx = (fx - x0)[..., None]
+        wy = (fy - y0)[..., None]
+        x0 = x0.astype(np.int64)
+        y0 = y0.astype(np.int64)
+
+        c00 = self.texel(x0, y0, level).astype(np.float64)
+        c10 = self.texel(x0 + 1, y0, level).astype(np.float64)
+        c01 = self.texel(x0, y0 + 1, level).astype(np.float64)
+        c11 = self.texel(x0 + 1, y0 + 1, level).astype(np.float64)
+        top = c00 * (1 - wx) + c10 * wx
+        bottom = c01 * (1 - wx) + c11 * wx
+        return (top * (1 - wy) + bottom * wy) / 255
+
+    def sampleMipmap(self, u, v, lod, trilinear=True):
+        """
+        Bilinear samples from the mip level nearest to lod, or blended between the two levels around lod.
+        Samples are grouped by level, so every level is read with one gather.
+
+        :param lod: level of detail of every sample, clamped to the available levels
+        :type lod: numpy.ndarray[float]
+        :param trilinear: blend two levels or take the nearest one
+        :type trilinear: bool
+        :rtype: numpy.ndarray[float]
+        """
+        lod = np.clip(lod, 0, self.levelCount - 1)
+        if trilinear:
+            low = np.floor(lod).astype(np.int64)
+            blend = (lod - low)[..., None]
+        else:
+            low = np.floor(lod + 0.5).astype(np.int64)
+            blend = np.zeros(lod.shape + (1,))
+        rgb = np.zeros(u.shape + (3,))
+        for level in np.unique(low).tolist():
+            mask = low == level
+            color = self.sampleBilinear(u[mask], v[mask], level)
+            if trilinear and level + 1 < self.levelCount:
+                upper = self.sampleBilinear(u[mask], v[mask], level + 1)
+                color = color * (1 - blend[mask]) + upper * blend[mask]
+            rgb[mask] = color
+        return rgb
+
+    def triangleLod(self, coords, uvs):
+        """
+        Level of detail of every triangle from the screen space derivatives of its texture coordinates, which are
+        constant over a triangle. lod is log2 of the larger texel footprint of one pixel step in x or y, 0 for
+        degenerate triangles.
+
+        :param coords: triangle vertex coordinates, shape (n, 3, 2)
+        :type coords: numpy.ndarray[int]
+        :param uvs: texture coordinates, shape (n, 3, 2)
+        :type uvs: numpy.ndarray[float]
+        :return: lod of every triangle, shape (n,)
+        :rtype: numpy.ndarray[float]
+        """
+        p = np.asarray(coords, dtype=np.float64).reshape(-1, 3, 2)
+        t = np.asarray(uvs, dtype=np.float64).reshape(-1, 3, 2) * [self.texture.width, self.texture.height]
+        e1, e2 = p[:, 1] - p[:, 0], p[:, 2] - p[:, 0]
+        t1, t2 = t[:, 1] - t[:, 0], t[:, 2] - t[:, 0]
+        det = e1[:, 0] * e2[:, 1] - e2[:, 0] * e1[:, 1]
+        valid = det != 0
+        det = np.where(valid, det, 1)[:, None]
+        dtdx = (t1 * e2[:, 1:2] - t2 * e1[:, 1:2]) / det
+        dtdy = (t2 * e1[:, 0:1] - t1 * e2[:, 0:1]) / det
+        rho2 = np.maximum((dtdx ** 2).sum(axis=1), (dtdy ** 2).sum(axis=1))
+        lod = 0.5 * np.log2(np.maximum(rho2, 1e-12))
+        return np.where(valid, np.maximum(lod, 0), 0)
+
+
+if __name__ == "__main__":
+    from Buff import Buff
+
+    t = Buff(2, 2)
+    t.setPixel(0, 0, 0, 0, 0)
+    t.setPixel(1, 0, 255, 0, 0)
+    t.setPixel(0, 1, 0, 255, 0)
+    t.setPixel(1, 1, 0, 0, 255)
+    s = TextureSampler(t, mipmap=True)
+    print(s.texel([0, 1, 5], [0, 1, -1]))
+    print(s.sample([0.1, 0.9], [0.1, 0.9]))
+    print(s.sample([0.5, 0.25], [0.5, 0.25], TextureSampler.BILINEAR))
+    print("levels: ", s.levelCount, s.level(1))
+    print(s.sample([0.25, 0.25], [0.25, 0.25], TextureSampler.TRILINEAR, [0, 0.5]))
+    print(s.triangleLod([[[0, 0], [1, 0], [0, 1]]], [[[0, 0], [1, 0], [0, 1]]]))
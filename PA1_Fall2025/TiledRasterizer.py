@@ -0,0 +1,214 @@
+"""
+Defines TiledRasterizer class, a multi-core backend of Rasterizer. The buff is split into fixed-size tiles, every
+primitive is binned into the tiles its bounding box overlaps, and tiles are filled in parallel by a thread pool.
+All workers write into the same buff ndarray, each one only inside its own tile, so no copy or merge is needed.
+
+Inside a tile the primitives are drawn in submission order, with the same fragment generation as the serial
+Rasterizer clipped to the tile. Tiles never overlap, so the final image is byte-identical to the serial path.
+Triangles are set up once for the whole batch with Rasterizer.setupTriangles, and their spans are binned into bands
+of tileSize rows, so workers only get an index range of the binned spans and never run Python code per primitive.
+Threads are used instead of processes because what is left in the workers is NumPy array kernels, which release the
+GIL, and threads share the buff array without any shared-memory setup. Parallelism only pays off with several cores,
+so the serial Rasterizer stays the default and this backend is opt-in.
+"""
+
+import os
+from concurrent.futures import ThreadPoolExecutor
+
+import numpy as np
+
+from Layer import Layer
+from Rasterizer import Rasterizer
+from TextureSampler import TextureSampler
+
+
+class TiledRasterizer:
+    """
+    Draw primitive batches on buff tile by tile with a pool of worker threads
+    """
+    tileSize = 64
+    workers = None
+
+    __pool = None
+
+    def __init__(self, tileSize=64, workers=None):
+        """
+        :param tileSize: width and height of every tile in pixels
+        :type tileSize: int
+        :param workers: number of worker threads, use the number of cpu cores if not given
+        :type workers: int
+        :rtype: None
+        """
+        if (not isinstance(tileSize, int)) or tileSize < 1:
+            raise TypeError("tileSize can only accept integer >= 1")
+        self.tileSize = tileSize
+        self.workers = workers if workers is not None else (os.cpu_count() or 1)
+        self.__pool = ThreadPoolExecutor(max_workers=self.workers)
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc_val, exc_tb):
+        self.close()
+
+    def close(self):
+        """
+        Shut down worker threads
+        """
+        self.__pool.shutdown(wait=True)
+
+    def tiles(self, buff):
+        """
+        All tiles of buff as clip rectangles (x_min, y_min, x_max, y_max), max values are exclusive
+
+        :param buff: the buff to split
+        :type buff: Buff
+        :rtype: list[tuple[int]]
+        """
+        return [(x, y, min(x + self.tileSize, buff.width), min(y + self.tileSize, buff.height))
+                for y in range(0, buff.height, self.tileSize)
+                for x in range(0, buff.width, self.tileSize)]
+
+    def binPrimitives(self, buff, bboxMin, bboxMax):
+        """
+        Bin primitives into tiles by their bounding boxes
+
+        :param buff: the buff to draw on
+        :type buff: Buff
+        :param bboxMin: lower corner of every primitive bounding box, shape (n, 2)
+        :type bboxMin: numpy.ndarray[int]
+        :param bboxMax: upper corner of every primitive bounding box (inclusive), shape (n, 2)
+        :type bboxMax: numpy.ndarray[int]
+        :return: pairs of tile and indices of primitives overlapping it in submission order, empty tiles are skipped
+        :rtype: list[tuple]
+        """
+        bins = []
+        for tile in self.tiles(buff):
+            overlap = (bboxMin[:, 0] < tile[2]) & (bboxMax[:, 0] >= tile[0]) & \
+                      (bboxMin[:, 1] < tile[3]) & (bboxMax[:, 1] >= tile[1])
+            index = np.flatnonzero(overlap)
+            if index.size > 0:
+                bins.append((tile, index))
+        return bins
+
+    def __run(self, bins, job):
+        # list() waits for all tiles and raises the first exception from workers
+        list(self.__pool.map(lambda b: job(*b), bins))
+
+    def drawTriangles(self, buff, coords, colors, doSmooth=True, uvs=None, texture=None,
+                      textureFilter=TextureSampler.NEAREST, ws=None, depths=None, owner=None, blendMode=Layer.OVER):
+        """
+        Same as Rasterizer.drawTriangles, but fill tiles in parallel
+
+        :param buff: The buff to edit
+        :type buff: Buff
+        :param coords: triangle vertex coordinates, shape (n, 3, 2)
+        :type coords: numpy.ndarray[int]
+        :param colors: triangle vertex colors in [0, 1], shape (n, 3, 3)
+        :type colors: numpy.ndarray[float]
+        :param doSmooth: interpolate vertex colors or not
+        :type doSmooth: bool
+        :param uvs: texture coordinates in [0, 1], shape (n, 3, 2)
+        :type uvs: numpy.ndarray[float]
+        :param texture: The texture to sample from, pass a TextureSampler with mipmaps for mipmapped filters
+        :type texture: Buff or TextureSampler
+        :param textureFilter: TextureSampler.NEAREST, BILINEAR, NEAREST_MIPMAP or TRILINEAR
+        :type textureFilter: str
+        :param ws: clip space w of every vertex for perspective correct texture coordinates, shape (n, 3)
+        :type ws: numpy.ndarray[float]
+        :param depths: depth of every vertex for depth test, shape (n, 3). Tiles don't overlap, so every worker only
+                       reads and writes the depth plane inside its tile
+        :type depths: numpy.ndarray[float]
+        :param owner: see Rasterizer.drawTriangleSpans
+        :type owner: numpy.ndarray[int]
+        :param blendMode: see Rasterizer.drawTriangles
+        :type blendMode: str
+        :rtype: None
+        """
+        spans, shading = Rasterizer.setupTriangles(coords, colors, doSmooth, uvs, texture, textureFilter, ws,
+                                                   depths if buff.depth is not None else None)
+        # bin spans into bands of rows, stable sort keeps submission order inside every band
+        rows = spans[0]
+        inside = np.flatnonzero((rows >= 0) & (rows < buff.height))
+        band = rows[inside] // self.tileSize
+        order = np.argsort(band, kind="stable")
+        spans = tuple(a[inside[order]] for a in spans)
+        bounds = np.searchsorted(band[order], np.arange(-(-buff.height // self.tileSize) + 1))
+
+        def job(y, start, end):
+            Rasterizer.drawTriangleSpans(buff, tuple(a[start:end] for a in spans), shading,
+                                         (0, y, buff.width, min(y + self.tileSize, buff.height)), owner, blendMode)
+
+        self.__run([(b * self.tileSize, bounds[b], bounds[b + 1]) for b in range(len(bounds) - 1)
+                    if bounds[b + 1] > bounds[b]], job)
+
+    def drawLines(self, buff, starts, ends, colors, endColors=None, doSmooth=True, doAA=False, doAAlevel=4,
+                  depths=None, owner=None, order=None, blendMode=Layer.OVER):
+        """
+        Same as Rasterizer.drawLines, but fill tiles in parallel
+
+        :param buff: The buff to edit
+        :type buff: Buff
+        :param starts: segment start coordinates, shape (n, 2)
+        :type starts: numpy.ndarray[int]
+        :param ends: segment end coordinates, shape (n, 2)
+        :type ends: numpy.ndarray[int]
+        :param colors: colors at segment starts in [0, 1], shape (n, 3)
+        :type colors: numpy.ndarray[float]
+        :param endColors: colors at segment ends in [0, 1], shape (n, 3). Use colors if not given
+        :type endColors: numpy.ndarray[float]
+        :param doSmooth: Control flag of color smooth interpolation
+        :type doSmooth: bool
+        :param doAA: Control flag of doing anti-aliasing
+        :type doAA: bool
+        :param doAAlevel: kept for compatibility
+        :type doAAlevel: int
+        :param depths: depth at segment starts and ends for depth test, shape (n, 2)
+        :type depths: numpy.ndarray[float]
+        :param owner: see Rasterizer.drawLines
+        :type owner: numpy.ndarray[int]
+        :param order: see Rasterizer.drawLines
+        :type order: numpy.ndarray[int]
+        :param blendMode: see Rasterizer.drawLines
+        :type blendMode: str
+        :rtype: None
+        """
+        starts = np.asarray(starts, dtype=np.int64).reshape(-1, 2)
+        ends = np.asarray(ends, dtype=np.int64).reshape(-1, 2)
+        colors = np.asarray(colors, dtype=np.float64).reshape(-1, 3)
+        endColors = colors if endColors is None else np.asarray(endColors, dtype=np.float64).reshape(-1, 3)
+        if depths is not None:
+            depths = np.asarray(depths, dtype=np.float64).reshape(-1, 2)
+        if order is not None:
+            order = np.asarray(order, dtype=np.int64)
+
+        def job(tile, index):
+            Rasterizer.drawLines(buff, starts[index], ends[index], colors[index], endColors[index],
+                                 doSmooth, doAA, doAAlevel, tile, None if depths is None else depths[index],
+                                 owner, None if order is None else order[index], blendMode)
+
+        # anti-aliased lines also cover the pixel next to the ideal line on the minor axis
+        margin = 1 if doAA else 0
+        self.__run(self.binPrimitives(buff, np.minimum(starts, ends) - margin, np.maximum(starts, ends) + margin),
+                   job)
+
+
+if __name__ == "__main__":
+    import time
+    from Buff import Buff
+
+    n = 20000
+    rng = np.random.default_rng(0)
+    s = rng.integers(0, 1000, (n, 2))
+    e = s + rng.integers(-60, 60, (n, 2))
+    c = rng.random((n, 3))
+    serial = Buff(1000, 1000)
+    t1 = time.time()
+    Rasterizer.drawLines(serial, s, e, c, c[::-1], True, True)
+    print("serial: ", time.time() - t1)
+    with TiledRasterizer(128) as tr:
+        tiled = Buff(1000, 1000)
+        t1 = time.time()
+        tr.drawLines(tiled, s, e, c, c[::-1], True, True)
+        print("tiled:  ", time.time() - t1, "workers: ", tr.workers)
+    print("identical: ", np.array_equal(serial.buff, tiled.buff))
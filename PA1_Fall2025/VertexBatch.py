@@ -0,0 +1,170 @@
+"""
+Defines VertexBatch class, a struct-of-arrays container for many vertices. Coordinates, colors and texture
+coordinates of all vertices are kept in three contiguous arrays instead of one Point and one ColorType object per
+vertex, so building and drawing large primitive lists does not allocate small Python objects.
+Colors and texture coordinates stay in float64, the same precision ColorType holds, so colors truncated to 8 bit are
+the same as the ones drawn from Point lists.
+
+Vertices are grouped by position: every 2 vertices are a line segment when passed to drawLines, and every 3 vertices
+are a triangle when passed to drawTriangles. Triangle strips and fans share vertices between neighbour triangles,
+stripIndices and fanIndices give the vertex indices of their triangles, and take builds the triangle batch from them.
+"""
+
+import numpy as np
+
+from ColorType import ColorType
+from Point import Point
+
+
+class VertexBatch:
+    """
+    Properties:
+        coords: numpy.ndarray[int32], shape (n, 2)
+        colors: numpy.ndarray[float64], shape (n, 3), rgb in [0, 1]
+        uvs: numpy.ndarray[float64], shape (n, 2), or None if vertices have no texture coordinates
+        depths: numpy.ndarray[float64], shape (n,), or None if vertices have no depth. Smaller depth is nearer
+    """
+    coords = None
+    colors = None
+    uvs = None
+    depths = None
+
+    def __init__(self, coords, colors=None, uvs=None, depths=None):
+        """
+        :param coords: vertex coordinates, shape (n, 2)
+        :type coords: numpy.ndarray[int] or list
+        :param colors: vertex colors in [0, 1], shape (n, 3). All black if not given
+        :type colors: numpy.ndarray[float] or list
+        :param uvs: vertex texture coordinates, shape (n, 2)
+        :type uvs: numpy.ndarray[float] or list
+        :param depths: vertex depths for depth tested drawing, shape (n,)
+        :type depths: numpy.ndarray[float] or list
+        :rtype: None
+        """
+        self.coords = np.ascontiguousarray(coords, dtype=np.int32).reshape(-1, 2)
+        if colors is None:
+            self.colors = np.zeros((len(self.coords), 3), dtype=np.float64)
+        else:
+            self.colors = np.ascontiguousarray(colors, dtype=np.float64).reshape(-1, 3)
+        if uvs is not None:
+            uvs = np.ascontiguousarray(uvs, dtype=np.float64).reshape(-1, 2)
+        self.uvs = uvs
+        if depths is not None:
+            depths = np.ascontiguousarray(depths, dtype=np.float64).reshape(-1)
+        self.depths = depths
+        if len(self.colors) != len(self.coords) or (self.uvs is not None and len(self.uvs) != len(self.coords)) or \
+                (self.depths is not None and len(self.depths) != len(self.coords)):
+            raise ValueError("coords, colors, uvs and depths must have the same number of vertices")
+
+    def __len__(self):
+        return len(self.coords)
+
+    def __repr__(self):
+        return "VertexBatch(" + str(len(self)) + " vertices" + (", textured)" if self.uvs is not None else ")")
+
+    @classmethod
+    def fromPoints(cls, points):
+        """
+        Build a batch from a list of Point. Texture coordinates are kept only if every point has them
+
+        :param points: vertices to copy, a nested list (e.g. a triangle list) is flattened in order
+        :type points: list[Point] or list[list[Point]]
+        :rtype: VertexBatch
+        """
+        points = list(cls.__flatten(points))
+        coords = [p.getCoords() for p in points]
+        colors = [p.getColor().getRGB() if p.getColor() is not None else (0, 0, 0) for p in points]
+        uvs = None
+        if len(points) > 0 and all(p.getTextureCoords() is not None for p in points):
+            uvs = [p.getTextureCoords() for p in points]
+        return cls(coords, colors, uvs)
+
+    @staticmethod
+    def __flatten(points):
+        for p in points:
+            if isinstance(p, Point):
+                yield p
+            else:
+                yield from VertexBatch.__flatten(p)
+
+    def toPoints(self):
+        """
+        Convert the batch back to a list of Point, for code which still works on single vertices
+
+        :rtype: list[Point]
+        """
+        colors = self.colors.tolist()
+        uvs = self.uvs.tolist() if self.uvs is not None else [None] * len(self)
+        return [Point(tuple(c), ColorType(*rgb), uv) for c, rgb, uv in zip(self.coords.tolist(), colors, uvs)]
+
+    def take(self, indices):
+        """
+        A new batch of the vertices at indices, in order. Vertices can be taken more than once
+
+        :param indices: vertex indices of any shape, flattened in C-order
+        :type indices: numpy.ndarray[int]
+        :rtype: VertexBatch
+        """
+        indices = np.asarray(indices, dtype=np.int64).reshape(-1)
+        return VertexBatch(self.coords[indices], self.colors[indices],
+                           None if self.uvs is None else self.uvs[indices],
+                           None if self.depths is None else self.depths[indices])
+
+    @staticmethod
+    def stripIndices(n):
+        """
+        Triangles of a strip of n vertices, triangle i is made of vertices i, i + 1 and i + 2. Every odd triangle
+        swaps its first two vertices, so all triangles keep the same winding and the last vertex stays third
+
+        :param n: number of vertices in the strip
+        :type n: int
+        :return: vertex indices, shape (max(n - 2, 0), 3)
+        :rtype: numpy.ndarray[int]
+        """
+        i = np.arange(max(n - 2, 0))
+        odd = i % 2 == 1
+        return np.stack([np.where(odd, i + 1, i), np.where(odd, i, i + 1), i + 2], axis=1)
+
+    @staticmethod
+    def fanIndices(n):
+        """
+        Triangles of a fan of n vertices, triangle i is made of vertices 0, i + 1 and i + 2
+
+        :param n: number of vertices in the fan, the first one is the center
+        :type n: int
+        :return: vertex indices, shape (max(n - 2, 0), 3)
+        :rtype: numpy.ndarray[int]
+        """
+        i = np.arange(1, max(n - 1, 1))
+        return np.stack([np.zeros_like(i), i, i + 1], axis=1)
+
+    def triangles(self):
+        """
+        Views of the batch grouped into triangles, every 3 vertices are one triangle
+
+        :return: coords of shape (m, 3, 2), colors of shape (m, 3, 3), uvs of shape (m, 3, 2) or None
+        :rtype: tuple
+        """
+        if len(self) % 3 != 0:
+            raise ValueError("Vertex count of a triangle batch must be a multiple of 3")
+        uvs = self.uvs.reshape(-1, 3, 2) if self.uvs is not None else None
+        return self.coords.reshape(-1, 3, 2), self.colors.reshape(-1, 3, 3), uvs
+
+    def segments(self):
+        """
+        Views of the batch grouped into line segments, every 2 vertices are one segment
+
+        :return: starts, ends of shape (m, 2) and start colors, end colors of shape (m, 3)
+        :rtype: tuple
+        """
+        if len(self) % 2 != 0:
+            raise ValueError("Vertex count of a line batch must be a multiple of 2")
+        return self.coords[0::2], self.coords[1::2], self.colors[0::2], self.colors[1::2]
+
+
+if __name__ == "__main__":
+    b = VertexBatch.fromPoints([[Point((0, 0), ColorType(1, 0, 0)), Point((4, 0), ColorType(0, 1, 0)),
+                                 Point((0, 4), ColorType(0, 0, 1))]])
+    print(b, b.coords.dtype, b.colors.dtype)
+    print(b.triangles()[0])
+    print(b.toPoints()[1].getCoords(), b.toPoints()[1].getColor())
@@ -54,6 +54,12 @@ class Component:
 
     # the homogeneous transformation matrix for the current joint
     transformationMat = None
+    # cached by update, computed again only after the pose of this component or one of its ancestors changed
+    localTransformationMat = None  # transformation relative to the parent
+    parentTransformationMat = None  # parent transformation used by the last update
+    parentComponent = None  # the component this one was added to by addChild
+    poseChanged = True
+    childChanged = False  # pose of some descendant changed since the last update
 
     # a instance of class which inherit from Displayable
     # if this class is used as skeleton, then keep this empty
@@ -149,6 +155,8 @@ class Component:
         # prevent the duplicate child to be added to the self.children
         if child not in self.children:
             self.children.append(child)
+            child.parentComponent = self
+            child.markPoseChanged()
 
     def clear(self):
         """
@@ -195,11 +203,49 @@ class Component:
         Apply translation, rotation and scaling to this component and all its children
         Must be called after any changes made to the instance
 
+        Matrices are cached, so only components whose pose changed since the last update, and their descendants, are
+        computed again, and subtrees without any change are skipped.
+
+        :param parentTransformationMat: transformation of the parent. If not given, the one used by the last update, \
+        or identity if this component has never been updated
+        :type parentTransformationMat: numpy.ndarray
         :return: None
         """
+        if parentTransformationMat is None:
+            parentTransformationMat = self.parentTransformationMat
         if parentTransformationMat is None:
             parentTransformationMat = np.identity(4)
+        if self.parentTransformationMat is None or \
+                not np.array_equal(parentTransformationMat, self.parentTransformationMat):
+            self.__updateTree(np.array(parentTransformationMat), True)
+        else:
+            self.__updateTree(self.parentTransformationMat, False)
+
+    def __updateTree(self, parentTransformationMat, parentChanged):
+        """
+        Compute transformation of this component again if its pose or its parent transformation changed, and go on to
+        the children which need it
+        """
+        if self.poseChanged:
+            self.localTransformationMat = self.localTransformation()
+            self.poseChanged = False
+            parentChanged = True
+        if parentChanged:
+            self.parentTransformationMat = parentTransformationMat
+            self.transformationMat = parentTransformationMat @ self.localTransformationMat
+        elif not self.childChanged:
+            return
+        self.childChanged = False
+        for c in self.children:
+            c.__updateTree(self.transformationMat, parentChanged)
 
+    def localTransformation(self):
+        """
+        Transformation of this component relative to its parent, from its translation, rotation and scaling
+        all matrix are stored in column-major order
+
+        :rtype: numpy.ndarray
+        """
         translationMat = self.glUtility.translate(*self.currentPos.getCoords(), False)
 
         # if self.quat is set, use the quaternion as your rotation matrix.
@@ -223,10 +269,20 @@ class Component:
 
         # Change only this line!
         myTransformation = translationMat @ rotationMatW @ rotationMatV @ rotationMatU @ scalingMat
-        self.transformationMat = parentTransformationMat @ self.postRotationMat @ myTransformation @ self.preRotationMat 
+        return self.postRotationMat @ myTransformation @ self.preRotationMat
 
-        for c in self.children:
-            c.update(self.transformationMat)
+    def markPoseChanged(self):
+        """
+        Record that the pose of this component changed, so the next update computes its transformation and the ones
+        of its descendants again. Setters call this, call it after changing pose attributes directly
+
+        :return: None
+        """
+        self.poseChanged = True
+        component = self.parentComponent
+        while component is not None and not component.childChanged:
+            component.childChanged = True
+            component = component.parentComponent
 
     def rotate(self, degree, axis):
         """
@@ -250,6 +306,7 @@ class Component:
         else:
             self.wAngle = max(min(degree + self.wAngle, self.wRange[1]), self.wRange[0])
             # print(self.wAngle)
+        self.markPoseChanged()
 
     def reset(self, mode="all"):
         """
@@ -272,6 +329,7 @@ class Component:
             self.setU([1, 0, 0])
             self.setV([0, 1, 0])
             self.setW([0, 0, 1])
+        self.markPoseChanged()
         if mode in ["color", "all"]:
             self.setCurrentColor(self.default_color)
 
@@ -344,7 +402,7 @@ class Component:
             self.vAngle = self.clamp(angle, self.vRange[0], self.vRange[1])
         else:
             self.wAngle = self.clamp(angle, self.wRange[0], self.wRange[1])
-        self.update()
+        self.markPoseChanged()
 
     def setDefaultAngle(self, angle, axis):
         """
@@ -365,6 +423,7 @@ class Component:
         else:
             self.default_wAngle = angle
             self.wAngle = angle
+        self.markPoseChanged()
 
     def setDefaultPosition(self, pos):
         """
@@ -377,6 +436,7 @@ class Component:
             raise TypeError("pos should have type Point")
         self.defaultPos = pos.copy()
         self.currentPos = copy.deepcopy(self.defaultPos)
+        self.markPoseChanged()
 
     def setDefaultScale(self, scale):
         """
@@ -394,7 +454,7 @@ class Component:
             raise ValueError("Component only accept uniform scaling")"""
         self.defaultScaling = copy.deepcopy(scale)
         self.currentScaling = copy.deepcopy(self.defaultScaling)
-        self.update()
+        self.markPoseChanged()
 
     def setDefaultColor(self, color):
         """
@@ -418,7 +478,7 @@ class Component:
         if not isinstance(pos, Point):
             raise TypeError("pos should have type Point")
         self.currentPos = pos.copy()
-        self.update()
+        self.markPoseChanged()
 
     def setCurrentColor(self, color):
         """
@@ -449,7 +509,7 @@ class Component:
         if min(scale) != max(scale):
             raise ValueError("Component only accept uniform scaling")
         self.currentScaling = copy.deepcopy(scale)
-        self.update()
+        self.markPoseChanged()
 
     def changeRotationAxis(self, u, v, w):
         """
@@ -481,6 +541,7 @@ class Component:
         self.uAngle = 0
         self.vAngle = 0
         self.wAngle = 0
+        self.markPoseChanged()
 
     def setPreRotation(self, rotation_matrix=None):
         """
@@ -493,6 +554,7 @@ class Component:
         """
         if isinstance(rotation_matrix, np.ndarray):
             self.preRotationMat = rotation_matrix
+            self.markPoseChanged()
 
     def setPostRotation(self, rotation_matrix=None):
         """
@@ -504,6 +566,7 @@ class Component:
         """
         if isinstance(rotation_matrix, np.ndarray):
             self.postRotationMat = rotation_matrix
+            self.markPoseChanged()
 
     def u(self):
         return self.uAxis.copy()
@@ -519,18 +582,21 @@ class Component:
             raise TypeError("axis should have the same size as the current one")
         for i in range(len(u)):
             self.uAxis[i] = u[i]
+        self.markPoseChanged()
 
     def setV(self, v):
         if len(v) != len(self.vAxis):
             raise TypeError("axis should have the same size as the current one")
         for i in range(len(v)):
             self.vAxis[i] = v[i]
+        self.markPoseChanged()
 
     def setW(self, w):
         if len(w) != len(self.wAxis):
             raise TypeError("axis should have the same size as the current one")
         for i in range(len(w)):
             self.wAxis[i] = w[i]
+        self.markPoseChanged()
     
     def setQuaternion(self, q):
         """ 
@@ -542,9 +608,11 @@ class Component:
         if not isinstance(q, Quaternion):
             raise TypeError("q must be of type Quaternion")
         self.quat = q
+        self.markPoseChanged()
 
     def clearQuaternion(self):
         """ 
         clears the existing quaternion
         """
         self.quat = None
+        self.markPoseChanged()
@@ -54,6 +54,14 @@ class Component:
 
     # the homogeneous transformation matrix for the current joint
     transformationMat = None
+    # cached by update, computed again only after the pose of this component or one of its ancestors changed
+    localTransformationMat = None  # transformation relative to the parent
+    parentTransformationMat = None  # parent transformation used by the last update
+    parentComponent = None  # the component this one was added to by addChild
+    poseChanged = True
+    childChanged = False  # pose of some descendant changed since the last update
+    sceneGraph = None  # SceneGraph which computes the transformations of this component, if any
+    sceneIndex = None  # row of this component in sceneGraph
 
     # a instance of class which inherit from Displayable
     # if this class is used as skeleton, then keep this empty
@@ -151,6 +159,23 @@ class Component:
         # prevent the duplicate child to be added to the self.children
         if child not in self.children:
             self.children.append(child)
+            child.parentComponent = self
+            child.markPoseChanged()
+            if self.sceneGraph is not None:
+                self.sceneGraph.structureChanged = True
+
+    def removeChild(self, child):
+        """
+        Remove a child from this Component child list.
+
+        :param child: The child Component to be removed
+        :type child: Component
+        :return: None
+        """
+        self.children.remove(child)
+        child.parentComponent = None
+        if self.sceneGraph is not None:
+            self.sceneGraph.structureChanged = True
 
     def clear(self):
         """
@@ -198,11 +223,56 @@ class Component:
         all matrix are stored in column-major order
         Must be called after any changes made to the instance
 
+        Matrices are cached, so only components whose pose changed since the last update, and their descendants, are
+        computed again, and subtrees without any change are skipped.
+
+        :param parentTransformationMat: transformation of the parent. If not given, the one used by the last update, \
+        or identity if this component has never been updated
+        :type parentTransformationMat: numpy.ndarray
         :return: None
         """
+        if self.sceneGraph is not None:
+            # the store computes the whole tree in batch, only its root takes a parent transformation
+            self.sceneGraph.update(parentTransformationMat if self is self.sceneGraph.root else None)
+            return
+        if parentTransformationMat is None:
+            parentTransformationMat = self.parentTransformationMat
         if parentTransformationMat is None:
             parentTransformationMat = np.identity(4)
+        if self.parentTransformationMat is None or \
+                not np.array_equal(parentTransformationMat, self.parentTransformationMat):
+            self.__updateTree(np.array(parentTransformationMat), True)
+        else:
+            self.__updateTree(self.parentTransformationMat, False)
+
+    def __updateTree(self, parentTransformationMat, parentChanged):
+        """
+        Compute transformation of this component again if its pose or its parent transformation changed, and go on to
+        the children which need it
+        """
+        if self.sceneGraph is not None:
+            self.sceneGraph.update(parentTransformationMat, parentChanged)
+            return
+        if self.poseChanged:
+            self.localTransformationMat = self.localTransformation()
+            self.poseChanged = False
+            parentChanged = True
+        if parentChanged:
+            self.parentTransformationMat = parentTransformationMat
+            self.transformationMat = parentTransformationMat @ self.localTransformationMat
+        elif not self.childChanged:
+            return
+        self.childChanged = False
+        for c in self.children:
+            c.__updateTree(self.transformationMat, parentChanged)
 
+    def localTransformation(self):
+        """
+        Transformation of this component relative to its parent, from its translation, rotation and scaling
+        all matrix are stored in column-major order
+
+        :rtype: numpy.ndarray
+        """
         translationMat = self.glUtility.translate(*self.currentPos.getCoords(), False)
 
         # if self.quat is set, use the quaternion as your rotation matrix.
@@ -219,11 +289,23 @@ class Component:
             rotationMatW = self.glUtility.rotate(self.wAngle, self.wAxis, False)
         scalingMat = self.glUtility.scale(*self.currentScaling, False)
 
-        self.transformationMat = parentTransformationMat @ translationMat @ self.postRotationMat @ self.outRotation @ rotationMatU @ rotationMatV @ \
-                                 rotationMatW @ self.inRotation @ self.preRotationMat @ scalingMat
+        return translationMat @ self.postRotationMat @ self.outRotation @ rotationMatU @ rotationMatV @ \
+               rotationMatW @ self.inRotation @ self.preRotationMat @ scalingMat
 
-        for c in self.children:
-            c.update(self.transformationMat)
+    def markPoseChanged(self):
+        """
+        Record that the pose of this component changed, so the next update computes its transformation and the ones
+        of its descendants again. Setters call this, call it after changing pose attributes directly
+
+        :return: None
+        """
+        if self.sceneGraph is not None and not self.poseChanged:
+            self.sceneGraph.changed.append(self.sceneIndex)
+        self.poseChanged = True
+        component = self.parentComponent
+        while component is not None and not component.childChanged:
+            component.childChanged = True
+            component = component.parentComponent
 
     def rotate(self, degree, axis):
         """
@@ -247,6 +329,7 @@ class Component:
         else:
             self.wAngle = max(min(degree + self.wAngle, self.wRange[1]), self.wRange[0])
             # print(self.wAngle)
+        self.markPoseChanged()
 
     def reset(self, mode="all"):
         """
@@ -270,6 +353,7 @@ class Component:
             self.setU([1, 0, 0])
             self.setV([0, 1, 0])
             self.setW([0, 0, 1])
+        self.markPoseChanged()
 
     def setRotateExtent(self, axis, minDeg=None, maxDeg=None):
         """
@@ -340,7 +424,7 @@ class Component:
             self.vAngle = self.clamp(angle, self.vRange[0], self.vRange[1])
         else:
             self.wAngle = self.clamp(angle, self.wRange[0], self.wRange[1])
-        self.update()
+        self.markPoseChanged()
 
     def setDefaultAngle(self, angle, axis):
         """
@@ -361,6 +445,7 @@ class Component:
         else:
             self.default_wAngle = angle
             self.wAngle = angle
+        self.markPoseChanged()
 
     def setDefaultPosition(self, pos):
         """
@@ -373,6 +458,7 @@ class Component:
             raise TypeError("pos should have type Point")
         self.defaultPos = pos.copy()
         self.currentPos = copy.deepcopy(self.defaultPos)
+        self.markPoseChanged()
 
     def setDefaultScale(self, scale):
         """
@@ -388,7 +474,7 @@ class Component:
             raise ValueError("Component only accept uniform scaling")"""
         self.defaultScaling = copy.deepcopy(scale)
         self.currentScaling = copy.deepcopy(self.defaultScaling)
-        self.update()
+        self.markPoseChanged()
 
     def setDefaultColor(self, color):
         """
@@ -412,7 +498,7 @@ class Component:
         if not isinstance(pos, Point):
             raise TypeError("pos should have type Point")
         self.currentPos = pos.copy()
-        self.update()
+        self.markPoseChanged()
 
     def setCurrentColor(self, color):
         """
@@ -443,7 +529,7 @@ class Component:
         if min(scale) != max(scale):
             raise ValueError("Component only accept uniform scaling")
         self.currentScaling = copy.deepcopy(scale)
-        self.update()
+        self.markPoseChanged()
 
     def setPreRotation(self, rotation_matrix=None):
         """
@@ -455,6 +541,7 @@ class Component:
         """
         if isinstance(rotation_matrix, np.ndarray):
             self.preRotationMat = rotation_matrix
+            self.markPoseChanged()
 
     def setPostRotation(self, rotation_matrix=None):
         """
@@ -465,6 +552,7 @@ class Component:
         """
         if isinstance(rotation_matrix, np.ndarray):
             self.postRotationMat = rotation_matrix
+            self.markPoseChanged()
 
     def u(self):
         return self.uAxis.copy()
@@ -480,25 +568,30 @@ class Component:
             raise TypeError("axis should have the same size as the current one")
         for i in range(len(u)):
             self.uAxis[i] = u[i]
+        self.markPoseChanged()
 
     def setV(self, v):
         if len(v) != len(self.vAxis):
             raise TypeError("axis should have the same size as the current one")
         for i in range(len(v)):
             self.vAxis[i] = v[i]
+        self.markPoseChanged()
 
     def setW(self, w):
         if len(w) != len(self.wAxis):
             raise TypeError("axis should have the same size as the current one")
         for i in range(len(w)):
             self.wAxis[i] = w[i]
+        self.markPoseChanged()
     
     def setQuaternion(self, q):
         """ sets a quaternion for rotation """
         if not isinstance(q, Quaternion):
             raise TypeError("q must be of type Quaternion")
         self.quat = q
+        self.markPoseChanged()
 
     def clearQuaternion(self):
         """ clears the existing quaternion """
         self.quat = None
+        self.markPoseChanged()
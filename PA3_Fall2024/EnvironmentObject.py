@@ -43,9 +43,10 @@ class EnvironmentObject:
 
     def animationUpdate(self):
         """
-        Perform the next frame of this environment object's animation.
+        Perform the next frame of this environment object's animation. Transformations are not computed here, the
+        vivarium updates all creatures at once after animating them.
         """
-        self.update()
+        pass
 
     def stepForward(self):
         """
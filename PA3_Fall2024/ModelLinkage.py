@@ -111,8 +111,6 @@ class Prey(Component, EnvironmentObject):
             if comp.wAngle in comp.wRange:
                 self.rotation_speed[i][2] *= -1
 
-        self.update()
-
     def stepForward(self, components, tank_dimensions, vivarium):
         nextPos = self.currentPos.coords + (self.direction * self.step_size)
         potential_force = self.calculatePotentialForce(self.env_obj_list)
@@ -192,7 +190,6 @@ class Predator(Component, EnvironmentObject):
             comp.rotate(self.rotation_speed[0], comp.uAxis)
             if comp.uAngle in comp.uRange:
                 self.rotation_speed[0] *= -1
-        self.update()
 
     def stepForward(self, components, tank_dimensions, vivarium):
         potential_force = self.calculatePotentialForce(self.env_obj_list)
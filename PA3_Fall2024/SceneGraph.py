@@ -0,0 +1,265 @@
+"""
+Flattened scene graph store. A SceneGraph takes over the transformations of a Component tree: the pose of every
+component is gathered into contiguous NumPy arrays, sorted so that parents always come before their children, and
+local and world matrices are computed for many components at once with batched matrix products, one tree level at a
+time, instead of one component at a time with GLUtility.
+
+Components keep their pose attributes and setters, so models are written the same way. A component in a store is a
+handle to one row: setters record the row as changed, update copies only the changed rows into the arrays, and the
+transformationMat of every component is a view into the world matrices of the store, refreshed in place.
+
+Usage, once the tree is built:
+
+    sceneGraph = SceneGraph(rootComponent)
+    ...
+    rootComponent.update(parentMatrix)  # or update any component of the tree
+
+Adding or removing children (with addChild and removeChild) rebuilds the arrays at the next update.
+"""
+
+import numpy as np
+
+
+class SceneGraph:
+    """
+    Properties:
+        root: Component, root of the stored tree
+        components: list<Component>, all components of the tree, parents before their children
+        parents: numpy.ndarray<int>(n), index of the parent of every component, -1 for root
+        levels: list<numpy.ndarray<int>>, indices of components at every depth of the tree
+        angles: numpy.ndarray<float>(n, 3), rotation angles around u, v, w axes, in degrees
+        axes: numpy.ndarray<float>(n, 3, 3), u, v, w axes of every component
+        translations: numpy.ndarray<float>(n, 3), translation relative to parent
+        scales: numpy.ndarray<float>(n, 3), scaling along three axes
+        quaternions: numpy.ndarray<float>(n, 4), s, x, y, z of rotation quaternions, used where useQuaternion is set
+        useQuaternion: numpy.ndarray<bool>(n), quaternion overrides Euler angles
+        preRotations, postRotations, inRotations, outRotations: numpy.ndarray<float>(n, 4, 4)
+        local: numpy.ndarray<float>(n, 4, 4), transformation of every component relative to its parent
+        world: numpy.ndarray<float>(n, 4, 4), transformation of every component, transformationMat views rows of it
+        parentTransformationMat: numpy.ndarray<float>(4, 4), transformation above root used by the last update
+        changed: list<int>, indices of components whose pose changed since the last update
+        structureChanged: bool, children were added or removed, arrays are built again by the next update
+    """
+    root = None
+    components = None
+    parents = None
+    levels = None
+    parentTransformationMat = None
+    changed = None
+    structureChanged = True
+
+    def __init__(self, root):
+        """
+        :param root: root of the tree to store
+        :type root: Component
+        :rtype: None
+        """
+        self.root = root
+        self.components = []
+        self.changed = []
+        self.build()
+
+    def __len__(self):
+        return len(self.components)
+
+    def build(self):
+        """
+        Gather the tree below root into arrays again, components which left the tree get their own matrices back
+        """
+        for c in self.components:
+            c.sceneGraph = None
+            c.sceneIndex = None
+            if c.transformationMat is not None:
+                c.transformationMat = np.array(c.transformationMat)
+            if c.localTransformationMat is not None:
+                c.localTransformationMat = np.array(c.localTransformationMat)
+
+        # breadth first order sorts components by depth, so parents are before their children
+        components = [self.root]
+        parents = [-1]
+        levels = [np.array([0])]
+        start = 0
+        while start < len(components):
+            end = len(components)
+            for i in range(start, end):
+                for c in components[i].children:
+                    components.append(c)
+                    parents.append(i)
+            if len(components) > end:
+                levels.append(np.arange(end, len(components)))
+            start = end
+
+        n = len(components)
+        self.components = components
+        self.parents = np.array(parents)
+        self.levels = levels
+        self.angles = np.zeros((n, 3))
+        self.axes = np.zeros((n, 3, 3))
+        self.translations = np.zeros((n, 3))
+        self.scales = np.ones((n, 3))
+        self.quaternions = np.zeros((n, 4))
+        self.useQuaternion = np.zeros(n, dtype=bool)
+        self.preRotations = np.tile(np.identity(4), (n, 1, 1))
+        self.postRotations = self.preRotations.copy()
+        self.inRotations = self.preRotations.copy()
+        self.outRotations = self.preRotations.copy()
+        self.local = self.preRotations.copy()
+        self.world = self.preRotations.copy()
+
+        for i, c in enumerate(components):
+            c.sceneGraph = self
+            c.sceneIndex = i
+            c.transformationMat = self.world[i]
+            c.localTransformationMat = self.local[i]
+            c.childChanged = False
+        self.changed = list(range(n))
+        self.parentTransformationMat = None
+        self.structureChanged = False
+
+    def pull(self, indices):
+        """
+        Copy pose of components at indices into the arrays, one bulk assignment per array
+        """
+        components = [self.components[i] for i in indices]
+        self.angles[indices] = [(c.uAngle, c.vAngle, c.wAngle) for c in components]
+        self.axes[indices] = [(c.uAxis.coords, c.vAxis.coords, c.wAxis.coords) for c in components]
+        self.translations[indices] = [c.currentPos.coords for c in components]
+        self.scales[indices] = [c.currentScaling for c in components]
+        self.preRotations[indices] = [c.preRotationMat for c in components]
+        self.postRotations[indices] = [c.postRotationMat for c in components]
+        self.inRotations[indices] = [c.inRotation for c in components]
+        self.outRotations[indices] = [c.outRotation for c in components]
+        useQuaternion = [c.quat is not None for c in components]
+        self.useQuaternion[indices] = useQuaternion
+        for i, c, q in zip(indices, components, useQuaternion):
+            if q:
+                self.quaternions[i] = (c.quat.s, *c.quat.v)
+            c.poseChanged = False
+
+    @staticmethod
+    def rotations(angles, axes):
+        """
+        Rotation matrices around axes, the same as GLUtility.rotate(angle, axis, False) for every row
+
+        :param angles: rotation angles in degrees, shape (k,)
+        :type angles: numpy.ndarray
+        :param axes: rotation axes, shape (k, 3)
+        :type axes: numpy.ndarray
+        :return: row-major matrices, shape (k, 4, 4)
+        :rtype: numpy.ndarray
+        """
+        half = np.radians(angles) * 0.5
+        q = np.concatenate([np.cos(half)[:, None], np.sin(half)[:, None] * axes], axis=1)
+        norm = np.linalg.norm(q, axis=1)
+        degenerate = norm < 1e-6
+        q /= np.where(degenerate, 1, norm)[:, None]
+        result = SceneGraph.quaternionMatrices(q)
+        result[degenerate] = np.identity(4)
+        return result
+
+    @staticmethod
+    def quaternionMatrices(q):
+        """
+        Rotation matrices of unit quaternions, the same as Quaternion.toMatrix for every row
+
+        :param q: s, x, y, z of quaternions, shape (k, 4)
+        :type q: numpy.ndarray
+        :return: row-major matrices, shape (k, 4, 4)
+        :rtype: numpy.ndarray
+        """
+        s, a, b, c = q.T
+        result = np.zeros((len(q), 4, 4))
+        result[:, 0, 0] = 1 - 2 * b * b - 2 * c * c
+        result[:, 1, 0] = 2 * a * b + 2 * s * c
+        result[:, 2, 0] = 2 * a * c - 2 * s * b
+        result[:, 0, 1] = 2 * a * b - 2 * s * c
+        result[:, 1, 1] = 1 - 2 * a * a - 2 * c * c
+        result[:, 2, 1] = 2 * b * c + 2 * s * a
+        result[:, 0, 2] = 2 * a * c + 2 * s * b
+        result[:, 1, 2] = 2 * b * c - 2 * s * a
+        result[:, 2, 2] = 1 - 2 * a * a - 2 * b * b
+        result[:, 3, 3] = 1
+        return result
+
+    def computeLocal(self, indices):
+        """
+        Local transformations of components at indices, in batch. Same order of transformations as
+        Component.localTransformation
+        """
+        translationMat = np.tile(np.identity(4), (len(indices), 1, 1))
+        translationMat[:, :3, 3] = self.translations[indices]
+        scalingMat = np.zeros((len(indices), 4, 4))
+        scalingMat[:, [0, 1, 2], [0, 1, 2]] = self.scales[indices]
+        scalingMat[:, 3, 3] = 1
+
+        angles = self.angles[indices]
+        axes = self.axes[indices]
+        rotationMatU = self.rotations(angles[:, 0], axes[:, 0])
+        rotationMatV = self.rotations(angles[:, 1], axes[:, 1])
+        rotationMatW = self.rotations(angles[:, 2], axes[:, 2])
+        # quaternions override Euler angles
+        useQuaternion = self.useQuaternion[indices]
+        if useQuaternion.any():
+            rotationMatU[useQuaternion] = \
+                self.quaternionMatrices(self.quaternions[indices][useQuaternion]).transpose(0, 2, 1)
+            rotationMatV[useQuaternion] = np.identity(4)
+            rotationMatW[useQuaternion] = np.identity(4)
+
+        self.local[indices] = translationMat @ self.postRotations[indices] @ self.outRotations[indices] @ \
+            rotationMatU @ rotationMatV @ rotationMatW @ self.inRotations[indices] @ \
+            self.preRotations[indices] @ scalingMat
+
+    def update(self, parentTransformationMat=None, parentChanged=None):
+        """
+        Compute transformations of changed components and their descendants, level by level
+
+        :param parentTransformationMat: transformation above root, the one used by the last update if not given
+        :type parentTransformationMat: numpy.ndarray
+        :param parentChanged: whether parentTransformationMat differs from the last update, compared if not given
+        :type parentChanged: bool
+        :rtype: None
+        """
+        if self.structureChanged:
+            self.build()
+        if parentTransformationMat is None:
+            parentTransformationMat = self.parentTransformationMat
+            if parentTransformationMat is None:
+                parentTransformationMat = np.identity(4)
+        if parentChanged is None or self.parentTransformationMat is None:
+            parentChanged = self.parentTransformationMat is None or \
+                not np.array_equal(parentTransformationMat, self.parentTransformationMat)
+        if parentChanged:
+            self.parentTransformationMat = np.array(parentTransformationMat)
+
+        if len(self.changed) == 0 and not parentChanged:
+            return
+        changed = np.zeros(len(self), dtype=bool)
+        if len(self.changed) > 0:
+            indices = np.unique(self.changed)
+            self.pull(indices)
+            self.computeLocal(indices)
+            changed[indices] = True
+            self.clearChildChanged()
+        changed[0] |= parentChanged
+
+        if changed[0]:
+            self.world[0] = self.parentTransformationMat @ self.local[0]
+        for level in self.levels[1:]:
+            parents = self.parents[level]
+            levelChanged = changed[level] | changed[parents]
+            changed[level] = levelChanged
+            rows = level[levelChanged]
+            if len(rows) > 0:
+                self.world[rows] = np.matmul(self.world[self.parents[rows]], self.local[rows])
+
+    def clearChildChanged(self):
+        """
+        Clear the changed descendant flags set on the way from changed components up to root
+        """
+        for i in self.changed:
+            c = self.components[i].parentComponent
+            while c is not None and c.sceneGraph is self and c.childChanged:
+                c.childChanged = False
+                c = c.parentComponent
+        self.root.childChanged = False
+        self.changed.clear()
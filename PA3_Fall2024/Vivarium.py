@@ -13,6 +13,7 @@ from Point import Point
 from Component import Component
 from ModelTank import Tank
 from EnvironmentObject import EnvironmentObject
+from SceneGraph import SceneGraph
 
 
 class Vivarium(Component):
@@ -46,6 +47,8 @@ class Vivarium(Component):
 
         # Store all components in one list, for us to access them later
         self.components = [tank]
+        # compute transformations of all creatures in batch, the store is built again when creatures come and go
+        SceneGraph(self)
 
     def animationUpdate(self):
         """
@@ -61,7 +64,7 @@ class Vivarium(Component):
 
     def delObjInTank(self, obj):
         if isinstance(obj, Component):
-            self.tank.children.remove(obj)
+            self.tank.removeChild(obj)
             self.components.remove(obj)
             del obj
 
@@ -20,6 +20,7 @@ from Displayable import Displayable
 from Quaternion import Quaternion
 from GLUtility import GLUtility
 from GLBuffer import Texture
+from RenderQueue import RenderQueue
 
 try:
     import OpenGL
@@ -52,6 +53,12 @@ class Component:
 
     # the homogeneous transformation matrix for the current joint
     transformationMat = None
+    # cached by update, computed again only after the pose of this component or one of its ancestors changed
+    localTransformationMat = None  # transformation relative to the parent
+    parentTransformationMat = None  # parent transformation used by the last update
+    parentComponent = None  # the component this one was added to by addChild
+    poseChanged = True
+    childChanged = False  # pose of some descendant changed since the last update
 
     # a instance of class which inherit from Displayable
     # if this class is used as skeleton, then keep this empty
@@ -141,6 +148,8 @@ class Component:
         # prevent the duplicate child to be added to the self.children
         if child not in self.children:
             self.children.append(child)
+            child.parentComponent = self
+            child.markPoseChanged()
 
     def clear(self):
         """
@@ -168,23 +177,26 @@ class Component:
         self.update()
 
     def draw(self, shaderProg):
+        """
+        Draw this component and all its children right away, sorted by shader state like a RenderQueue
+        """
+        renderQueue = RenderQueue()
+        self.enqueue(renderQueue)
+        renderQueue.submit(shaderProg)
+
+    def enqueue(self, renderQueue):
+        """
+        Add the draws of this component and all its children to renderQueue, in tree order
+
+        :type renderQueue: RenderQueue
+        :return: None
+        """
         if isinstance(self.displayObj, Displayable):
-            shaderProg.setMat4("model", self.transformationMat)
-            shaderProg.setVec4("material.diffuse", self.material.diffuse)
-            shaderProg.setVec4("material.specular", self.material.specular)
-            shaderProg.setVec4("material.ambient", self.material.ambient)
-            shaderProg.setFloat("material.highlight", self.material.highLight)
-            shaderProg.setFragmentShaderRouting(self.renderingRouting)
-            if self.textureOn:
-                shaderProg.use()
-                self.texture.bind(shaderProg.getUniformLocation("textureImage"))
-            else:
-                shaderProg.use()
-                self.texture.unbind(shaderProg.getUniformLocation("textureImage"))
-            self.displayObj.draw()
+            renderQueue.append(self.transformationMat, self.displayObj, self.material, self.renderingRouting,
+                               self.texture, self.textureOn)
 
         for c in self.children:
-            c.draw(shaderProg)
+            c.enqueue(renderQueue)
 
     def update(self, parentTransformationMat=None):
         """
@@ -192,11 +204,49 @@ class Component:
         all matrix are stored in column-major order
         Must be called after any changes made to the instance
 
+        Matrices are cached, so only components whose pose changed since the last update, and their descendants, are
+        computed again, and subtrees without any change are skipped.
+
+        :param parentTransformationMat: transformation of the parent. If not given, the one used by the last update, \
+        or identity if this component has never been updated
+        :type parentTransformationMat: numpy.ndarray
         :return: None
         """
+        if parentTransformationMat is None:
+            parentTransformationMat = self.parentTransformationMat
         if parentTransformationMat is None:
             parentTransformationMat = np.identity(4)
+        if self.parentTransformationMat is None or \
+                not np.array_equal(parentTransformationMat, self.parentTransformationMat):
+            self.__updateTree(np.array(parentTransformationMat), True)
+        else:
+            self.__updateTree(self.parentTransformationMat, False)
+
+    def __updateTree(self, parentTransformationMat, parentChanged):
+        """
+        Compute transformation of this component again if its pose or its parent transformation changed, and go on to
+        the children which need it
+        """
+        if self.poseChanged:
+            self.localTransformationMat = self.localTransformation()
+            self.poseChanged = False
+            parentChanged = True
+        if parentChanged:
+            self.parentTransformationMat = parentTransformationMat
+            self.transformationMat = self.localTransformationMat @ parentTransformationMat
+        elif not self.childChanged:
+            return
+        self.childChanged = False
+        for c in self.children:
+            c.__updateTree(self.transformationMat, parentChanged)
 
+    def localTransformation(self):
+        """
+        Transformation of this component relative to its parent, from its translation, rotation and scaling
+        all matrix are stored in column-major order
+
+        :rtype: numpy.ndarray
+        """
         translationMat = self.glUtility.translate(*self.currentPos.getCoords())
         rotationMatU = self.glUtility.rotate(self.uAngle, self.uAxis)
         rotationMatV = self.glUtility.rotate(self.vAngle, self.vAxis)
@@ -205,11 +255,21 @@ class Component:
 
         # remember that all above matrix are store in column-major, which is the transpose of row-major
         # be careful about the applying order
-        self.transformationMat = scalingMat @ self.preRotationMat @ rotationMatW @ rotationMatV @ rotationMatU @ \
-                                 self.postRotationMat @ translationMat @ parentTransformationMat
+        return scalingMat @ self.preRotationMat @ rotationMatW @ rotationMatV @ rotationMatU @ \
+               self.postRotationMat @ translationMat
 
-        for c in self.children:
-            c.update(self.transformationMat)
+    def markPoseChanged(self):
+        """
+        Record that the pose of this component changed, so the next update computes its transformation and the ones
+        of its descendants again. Setters call this, call it after changing pose attributes directly
+
+        :return: None
+        """
+        self.poseChanged = True
+        component = self.parentComponent
+        while component is not None and not component.childChanged:
+            component.childChanged = True
+            component = component.parentComponent
 
     def rotate(self, angle, axis):
         """
@@ -248,6 +308,7 @@ class Component:
             self.setU([1, 0, 0])
             self.setV([0, 1, 0])
             self.setW([0, 0, 1])
+        self.markPoseChanged()
 
     def setRotateExtent(self, axis, minDeg=None, maxDeg=None):
         """
@@ -326,7 +387,7 @@ class Component:
             self.vAngle = self.clamp(angle, self.vRange[0], self.vRange[1])
         else:
             self.wAngle = self.clamp(angle, self.wRange[0], self.wRange[1])
-        self.update()
+        self.markPoseChanged()
 
     def setDefaultAngle(self, angle, axis):
         """
@@ -347,6 +408,7 @@ class Component:
         else:
             self.default_wAngle = angle
             self.wAngle = angle
+        self.markPoseChanged()
 
     def setDefaultPosition(self, pos):
         """
@@ -359,6 +421,7 @@ class Component:
             raise TypeError("pos should have type Point")
         self.defaultPos = pos.copy()
         self.currentPos = copy.deepcopy(self.defaultPos)
+        self.markPoseChanged()
 
     def setDefaultScale(self, scale):
         """
@@ -374,7 +437,7 @@ class Component:
             raise ValueError("Component only accept uniform scaling")
         self.defaultScaling = copy.deepcopy(scale)
         self.currentScaling = copy.deepcopy(self.defaultScaling)
-        self.update()
+        self.markPoseChanged()
 
     def setCurrentPosition(self, pos):
         """
@@ -386,7 +449,7 @@ class Component:
         if not isinstance(pos, Point):
             raise TypeError("pos should have type Point")
         self.currentPos = pos.copy()
-        self.update()
+        self.markPoseChanged()
 
     def setCurrentScale(self, scale):
         """
@@ -401,7 +464,7 @@ class Component:
         if min(scale) != max(scale):
             raise ValueError("Component only accept uniform scaling")
         self.currentScaling = copy.deepcopy(scale)
-        self.update()
+        self.markPoseChanged()
 
     def changeRotationAxis(self, u, v, w):
         """
@@ -433,6 +496,7 @@ class Component:
         self.uAngle = 0
         self.vAngle = 0
         self.wAngle = 0
+        self.markPoseChanged()
 
     def setPreRotation(self, rotation_matrix=None):
         """
@@ -444,6 +508,7 @@ class Component:
         """
         if isinstance(rotation_matrix, np.ndarray):
             self.preRotationMat = rotation_matrix
+            self.markPoseChanged()
 
     def u(self):
         return self.uAxis.copy()
@@ -459,15 +524,18 @@ class Component:
             raise TypeError("axis should have the same size as the current one")
         for i in range(len(u)):
             self.uAxis[i] = u[i]
+        self.markPoseChanged()
 
     def setV(self, v):
         if len(v) != len(self.vAxis):
             raise TypeError("axis should have the same size as the current one")
         for i in range(len(v)):
             self.vAxis[i] = v[i]
+        self.markPoseChanged()
 
     def setW(self, w):
         if len(w) != len(self.wAxis):
             raise TypeError("axis should have the same size as the current one")
         for i in range(len(w)):
             self.wAxis[i] = w[i]
+        self.markPoseChanged()
@@ -33,6 +33,8 @@ except ImportError:
 import numpy as np
 import ctypes
 
+from GLState import glState
+
 
 class VBO:
     """
@@ -172,7 +174,7 @@ class Texture:
         height, width, channel = image.shape
         imageData = image.flatten("C")
 
-        gl.glBindTexture(gl.GL_TEXTURE_2D, self.textureName)
+        glState.bindTexture(self.textureUnitID, self.textureName)
         gl.glTexImage2D(gl.GL_TEXTURE_2D, 0, gl.GL_RGB, width, height, 0, gl.GL_RGB, gl.GL_UNSIGNED_BYTE, imageData)
         gl.glGenerateMipmap(gl.GL_TEXTURE_2D)
         self.setTextureParameters()
@@ -184,13 +186,12 @@ class Texture:
         gl.glTexParameteri(gl.GL_TEXTURE_2D, gl.GL_TEXTURE_MIN_FILTER, gl.GL_LINEAR)
         gl.glTexParameteri(gl.GL_TEXTURE_2D, gl.GL_TEXTURE_MAG_FILTER, gl.GL_LINEAR)
 
+    # binding and the sampler uniform go through glState, so drawing again with the same texture sets nothing
     def bind(self, glslVariableLoc):
-        gl.glActiveTexture(gl.GL_TEXTURE0 + self.textureUnitID)
-        gl.glBindTexture(gl.GL_TEXTURE_2D, self.textureName)
-        gl.glUniform1i(glslVariableLoc, self.textureUnitID)
+        glState.bindTexture(self.textureUnitID, self.textureName)
+        glState.uniform(gl.glUniform1i, glslVariableLoc, self.textureUnitID, self.textureUnitID)
 
     def unbind(self, glslVariableLoc):
-        gl.glActiveTexture(gl.GL_TEXTURE0)
-        gl.glBindTexture(gl.GL_TEXTURE_2D, 0)
-        gl.glUniform1i(glslVariableLoc, 0)
+        glState.bindTexture(0, 0)
+        glState.uniform(gl.glUniform1i, glslVariableLoc, 0, 0)
 
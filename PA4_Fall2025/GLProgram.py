@@ -34,6 +34,8 @@ except ImportError:
 import numpy as np
 import math
 
+from GLState import glState
+
 def perspectiveMatrix(angleOfView, near, far):
     result = np.identity(4)
     angleOfView = min(179, max(0, angleOfView))
@@ -60,14 +62,22 @@ class GLProgram:
     ready = False  # a control flag which reflects if this GLprogram is ready
     debug = 0
 
+    uniformLocations = None  # dict, uniform name to location, filled with all active uniforms by compile
+    lightLocations = None  # dict, light index to locations of its fields, in the order of LIGHT_FIELDS
+    renderingFlags = {}  # routing string to rendering flag, shared by all instances
+
     # if you change either of these, make sure that you also update the shader!
     MAX_LIGHT_NUM = 20
     MAX_MATERIAL_NUM = 20
+    LIGHT_FIELDS = ("position", "color", "infiniteOn", "infiniteDirection",
+                    "spotOn", "spotDirection", "spotRadialFactor", "spotAngleLimit")
 
     def __init__(self) -> None:
         self.program = gl.glCreateProgram()
 
         self.ready = False
+        self.uniformLocations = {}
+        self.lightLocations = {}
 
         with open("./VertexShader.glsl", "r") as fv:
             self.vertexShaderSource = fv.read()
@@ -77,6 +87,8 @@ class GLProgram:
 
     def __del__(self) -> None:
         try:
+            if glState.program == self.program:
+                glState.reset()
             gl.glDeleteProgram(self.program)
         except Exception as e:
             pass
@@ -110,7 +122,14 @@ class GLProgram:
         return attribLoc
 
     def getUniformLocation(self, name):
-        uniformLoc = gl.glGetUniformLocation(self.program, name)
+        """
+        Location of uniform name, looked up in the locations found by compile. Names not found there are queried once
+        and remembered
+        """
+        uniformLoc = self.uniformLocations.get(name)
+        if uniformLoc is None:
+            uniformLoc = gl.glGetUniformLocation(self.program, name)
+            self.uniformLocations[name] = uniformLoc
         if uniformLoc == -1 and self.debug > 1:
             print(f"Warning: Uniform {name} not found. Might have been optimized off")
         return uniformLoc
@@ -144,6 +163,38 @@ class GLProgram:
             raise Exception(info)
 
         self.ready = True
+        # a new program is compiled for every new context, which starts with its own state
+        glState.reset()
+        self.loadUniformLocations()
+
+    def loadUniformLocations(self):
+        """
+        Enumerate all active uniforms and remember their locations, so setting uniforms by name doesn't query the
+        driver. Elements of uniform arrays are listed one by one, and the array name is the location of its first one
+        """
+        self.uniformLocations = {}
+        self.lightLocations = {}
+        for i in range(gl.glGetProgramiv(self.program, gl.GL_ACTIVE_UNIFORMS)):
+            name, size, _ = gl.glGetActiveUniform(self.program, i)
+            if isinstance(name, bytes):
+                name = name.decode()
+            self.uniformLocations[name] = gl.glGetUniformLocation(self.program, name)
+            if name.endswith("[0]"):
+                self.uniformLocations[name[:-3]] = self.uniformLocations[name]
+                for j in range(1, size):
+                    element = f"{name[:-3]}[{j}]"
+                    self.uniformLocations[element] = gl.glGetUniformLocation(self.program, element)
+
+    def getLightLocations(self, lightIndex):
+        """
+        Locations of the fields of light[lightIndex], in the order of LIGHT_FIELDS
+        """
+        locations = self.lightLocations.get(lightIndex)
+        if locations is None:
+            locations = tuple(self.getUniformLocation(f"""light[{lightIndex}].{field}""")
+                              for field in self.LIGHT_FIELDS)
+            self.lightLocations[lightIndex] = locations
+        return locations
 
     def setFragmentShaderRouting(self, routing="lighting"):
         """
@@ -157,53 +208,68 @@ class GLProgram:
         "custom": some customized rendering
         "texture": this must use previous routing, if set to true, then mix color with texture
         """
-        renderingFlag = 0
-        if isinstance(routing, str):
-            routing = routing.lower()
-            if ("lighting" in routing) or ("illumination" in routing):
-                renderingFlag = renderingFlag | 0x1
-            if "vertex" in routing:
-                renderingFlag = renderingFlag | (0x1 << 1)
-            if "pure" in routing:
-                renderingFlag = renderingFlag | (0x1 << 2)
-            if "normal" in routing:
-                renderingFlag = renderingFlag | (0x1 << 3)
-            if "bump" in routing:
-                renderingFlag = renderingFlag | (0x1 << 4)
-            if "artist" in routing:
-                renderingFlag = renderingFlag | (0x1 << 5)
-            if "custom" in routing:
-                renderingFlag = renderingFlag | (0x1 << 6)
-            if "texture" in routing:
-                renderingFlag = renderingFlag | (0x1 << 8)
-            if "custom" in routing:
-                renderingFlag = renderingFlag | (0x1 << 9)
+        self.setInt("renderingFlag", self.renderingFlag(routing))
 
-        self.use()
-        self.setInt("renderingFlag", renderingFlag)
+    @classmethod
+    def renderingFlag(cls, routing):
+        """
+        Rendering flag of a routing string, see setFragmentShaderRouting. Every string is parsed only once
+        """
+        if not isinstance(routing, str):
+            return 0
+        renderingFlag = cls.renderingFlags.get(routing)
+        if renderingFlag is not None:
+            return renderingFlag
+
+        key = routing
+        renderingFlag = 0
+        routing = routing.lower()
+        if ("lighting" in routing) or ("illumination" in routing):
+            renderingFlag = renderingFlag | 0x1
+        if "vertex" in routing:
+            renderingFlag = renderingFlag | (0x1 << 1)
+        if "pure" in routing:
+            renderingFlag = renderingFlag | (0x1 << 2)
+        if "normal" in routing:
+            renderingFlag = renderingFlag | (0x1 << 3)
+        if "bump" in routing:
+            renderingFlag = renderingFlag | (0x1 << 4)
+        if "artist" in routing:
+            renderingFlag = renderingFlag | (0x1 << 5)
+        if "custom" in routing:
+            renderingFlag = renderingFlag | (0x1 << 6)
+        if "texture" in routing:
+            renderingFlag = renderingFlag | (0x1 << 8)
+        if "custom" in routing:
+            renderingFlag = renderingFlag | (0x1 << 9)
+        cls.renderingFlags[key] = renderingFlag
+        return renderingFlag
 
     def use(self):
         """
         This is required before the uniforms set up.
+        glUseProgram is skipped when this program is already in use
         """
         if not self.ready:
             raise Exception("GLProgram must compile before use it")
-        gl.glUseProgram(self.program)
+        glState.useProgram(self.program)
 
     def setLight(self, lightIndex: int, light: Light):
         if not isinstance(light, Light):
             raise TypeError("light type must be Light")
 
-        self.setVec3(f"""light[{lightIndex}].position""", light.position)
-        self.setVec4(f"""light[{lightIndex}].color""", light.color)
+        position, color, infiniteOn, infiniteDirection, spotOn, spotDirection, spotRadialFactor, spotAngleLimit = \
+            self.getLightLocations(lightIndex)
+        self.setVec3(position, light.position)
+        self.setVec4(color, light.color)
 
-        self.setBool(f"""light[{lightIndex}].infiniteOn""", light.infiniteOn)
-        self.setVec3(f"""light[{lightIndex}].infiniteDirection""", light.infiniteDirection)
+        self.setBool(infiniteOn, light.infiniteOn)
+        self.setVec3(infiniteDirection, light.infiniteDirection)
 
-        self.setBool(f"""light[{lightIndex}].spotOn""", light.spotOn)
-        self.setVec3(f"""light[{lightIndex}].spotDirection""", light.spotDirection)
-        self.setVec3(f"""light[{lightIndex}].spotRadialFactor""", light.spotRadialFactor)
-        self.setFloat(f"""light[{lightIndex}].spotAngleLimit""", light.spotAngleLimit)
+        self.setBool(spotOn, light.spotOn)
+        self.setVec3(spotDirection, light.spotDirection)
+        self.setVec3(spotRadialFactor, light.spotRadialFactor)
+        self.setFloat(spotAngleLimit, light.spotAngleLimit)
 
     def clearAllLights(self):
         maxLightsNum = self.MAX_LIGHT_NUM
@@ -212,54 +278,62 @@ class GLProgram:
             self.setLight(i, light)
 
     # some help methods to set uniform in program
+    # name can be a uniform name, or a location from getUniformLocation to skip the look up.
+    # A uniform is only uploaded when its value differs from the last one set, see GLState
+    def location(self, name):
+        return self.getUniformLocation(name) if isinstance(name, str) else name
+
     def setMat4(self, name, mat):
         self.use()
         if mat.shape != (4, 4):
             raise Exception("Matrix must have 4x4 shape")
-        gl.glUniformMatrix4fv(self.getUniformLocation(name), 1, gl.GL_FALSE, mat.flatten("C"))
+        mat = mat.flatten("C")
+        glState.uniform(gl.glUniformMatrix4fv, self.location(name), mat.tobytes(), 1, gl.GL_FALSE, mat)
 
     def setMat3(self, name, mat):
         self.use()
         if mat.shape != (3, 3):
             raise Exception("Matrix must have 3x3 shape")
-        gl.glUniformMatrix3fv(self.getUniformLocation(name), 1, gl.GL_FALSE, mat.flatten("C"))
+        mat = mat.flatten("C")
+        glState.uniform(gl.glUniformMatrix3fv, self.location(name), mat.tobytes(), 1, gl.GL_FALSE, mat)
 
     def setMat2(self, name, mat):
         self.use()
         if mat.shape != (2, 2):
             raise Exception("Matrix must have 2x2 shape")
-        gl.glUniformMatrix2fv(self.getUniformLocation(name), 1, gl.GL_FALSE, mat.flatten("C"))
+        mat = mat.flatten("C")
+        glState.uniform(gl.glUniformMatrix2fv, self.location(name), mat.tobytes(), 1, gl.GL_FALSE, mat)
 
     def setVec4(self, name, vec):
         self.use()
         if vec.size != 4:
             raise Exception("Vector must have size 4")
-        gl.glUniform4fv(self.getUniformLocation(name), 1, vec)
+        glState.uniform(gl.glUniform4fv, self.location(name), vec.tobytes(), 1, vec)
 
     def setVec3(self, name, vec):
         self.use()
         if vec.size != 3:
             raise Exception("Vector must have size 3")
-        gl.glUniform3fv(self.getUniformLocation(name), 1, vec)
+        glState.uniform(gl.glUniform3fv, self.location(name), vec.tobytes(), 1, vec)
 
     def setVec2(self, name, vec):
         self.use()
         if vec.size != 2:
             raise Exception("Vector must have size 2")
-        gl.glUniform2fv(self.getUniformLocation(name), 1, vec)
+        glState.uniform(gl.glUniform2fv, self.location(name), vec.tobytes(), 1, vec)
 
     def setBool(self, name, value):
         self.use()
         if value not in (0, 1):
             raise Exception("bool only accept True/False/0/1")
-        gl.glUniform1i(self.getUniformLocation(name), int(value))
+        glState.uniform(gl.glUniform1i, self.location(name), int(value), int(value))
 
     def setInt(self, name, value):
         self.use()
         if value != int(value):
             raise Exception("set int only accept integer")
-        gl.glUniform1i(self.getUniformLocation(name), int(value))
+        glState.uniform(gl.glUniform1i, self.location(name), int(value), int(value))
 
     def setFloat(self, name, value):
         self.use()
-        gl.glUniform1f(self.getUniformLocation(name), float(value))
+        glState.uniform(gl.glUniform1f, self.location(name), float(value), float(value))
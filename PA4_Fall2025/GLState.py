@@ -0,0 +1,125 @@
+"""
+Define GLState class, a cache of the OpenGL state set through GLProgram and Texture. Every change of state goes
+through the cache, which remembers the program in use, the texture bound to every texture unit, the active unit and
+the value of every uniform, and skips calls which would set what is already set.
+
+The cache is shared by all programs and textures of a context as the module level glState. Code which changes this
+state by calling OpenGL directly must call glState.reset() afterwards, and a new context starts with reset too.
+
+Texture bindings and uniforms are counted, one count for every request, issued if it reached OpenGL and skipped
+otherwise. Program switches are not counted, because every draw asks for its program once. endFrame returns the counts
+of the frame and starts counting again.
+"""
+import OpenGL.GL as gl
+
+
+class GLState:
+    """
+    Properties:
+        program: int, program in use, None if unknown
+        activeTextureUnit: int, active texture unit, None if unknown
+        textures: dict, texture unit to the texture name bound to GL_TEXTURE_2D
+        uniforms: dict, (program, location) to the last value set
+        issued: int, texture and uniform requests issued in the current frame
+        skipped: int, texture and uniform requests skipped in the current frame
+        lastFrame: tuple, (issued, skipped) of the last finished frame
+    """
+    program = None
+    activeTextureUnit = None
+    textures = None
+    uniforms = None
+
+    issued = 0
+    skipped = 0
+    lastFrame = (0, 0)
+
+    def __init__(self):
+        self.reset()
+
+    def __repr__(self):
+        return "GLState(" + str(self.issued) + " calls issued, " + str(self.skipped) + " skipped)"
+
+    def reset(self):
+        """
+        Forget everything known about the state, the next call of every kind is issued
+        """
+        self.program = None
+        self.activeTextureUnit = None
+        self.textures = {}
+        self.uniforms = {}
+
+    def endFrame(self):
+        """
+        Finish counting a frame
+
+        :return: calls issued and skipped in the frame
+        :rtype: tuple
+        """
+        self.lastFrame = (self.issued, self.skipped)
+        self.issued = 0
+        self.skipped = 0
+        return self.lastFrame
+
+    def count(self, changed):
+        if changed:
+            self.issued += 1
+        else:
+            self.skipped += 1
+        return changed
+
+    def useProgram(self, program):
+        """
+        :param program: program object name
+        :type program: int
+        :rtype: None
+        """
+        if self.program != program:
+            gl.glUseProgram(program)
+            self.program = program
+
+    def activeTexture(self, unit):
+        """
+        :param unit: texture unit, 0 for GL_TEXTURE0
+        :type unit: int
+        :rtype: None
+        """
+        if self.count(self.activeTextureUnit != unit):
+            self.__activate(unit)
+
+    def __activate(self, unit):
+        gl.glActiveTexture(gl.GL_TEXTURE0 + unit)
+        self.activeTextureUnit = unit
+
+    def bindTexture(self, unit, textureName):
+        """
+        Bind textureName to GL_TEXTURE_2D of unit, and make unit active if it is bound
+
+        :param unit: texture unit, 0 for GL_TEXTURE0
+        :type unit: int
+        :param textureName: texture object name, 0 to unbind
+        :type textureName: int
+        :rtype: None
+        """
+        if self.count(self.textures.get(unit) != textureName):
+            if self.activeTextureUnit != unit:
+                self.__activate(unit)
+            gl.glBindTexture(gl.GL_TEXTURE_2D, textureName)
+            self.textures[unit] = textureName
+
+    def uniform(self, setter, location, key, *args):
+        """
+        Set a uniform of the program in use with setter(location, *args), unless it was set to key already
+
+        :param setter: glUniform function
+        :param location: uniform location
+        :type location: int
+        :param key: value to compare with the last one, must support ==
+        :rtype: None
+        """
+        cacheKey = (self.program, location)
+        if self.count(self.uniforms.get(cacheKey) != key):
+            setter(location, *args)
+            self.uniforms[cacheKey] = key
+
+
+glState = GLState()
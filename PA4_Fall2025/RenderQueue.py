@@ -0,0 +1,133 @@
+"""
+Define RenderQueue class, a flat list of the draws of a Component tree. Traversal with Component.enqueue records one
+RenderItem for every component with something to draw, the queue is then sorted by shader state before it is
+submitted, so components with the same rendering routing, texture, mesh and material are drawn one after another and
+glState skips setting what the previous draw already set.
+
+Draws are only reordered, each one sets the same uniforms and texture as when drawn in tree order. With depth testing
+and no blending, the image does not depend on the order of draws. Sorting is stable, so draws with the same state keep
+their tree order.
+
+Usage, every frame:
+
+    renderQueue.clear()
+    topLevelComponent.enqueue(renderQueue)
+    renderQueue.submit(shaderProg)
+"""
+
+from GLProgram import GLProgram
+
+
+class RenderItem:
+    """
+    One draw, with everything it sets
+
+    Properties:
+        transformationMat: numpy.ndarray(4, 4), world matrix, uploaded as model
+        displayObj: Displayable, the mesh to draw
+        material: Material
+        routing: str, rendering routing of setFragmentShaderRouting
+        texture: Texture, bound when textureOn, otherwise unbound
+        textureOn: bool
+        sortKey: tuple, shader state the queue is sorted by
+    """
+    __slots__ = ["transformationMat", "displayObj", "material", "routing", "texture", "textureOn", "sortKey"]
+
+    def __init__(self, transformationMat, displayObj, material, routing, texture, textureOn):
+        self.transformationMat = transformationMat
+        self.displayObj = displayObj
+        self.material = material
+        self.routing = routing
+        self.texture = texture
+        self.textureOn = textureOn
+        # most expensive switch first: routing, then texture, mesh and material
+        self.sortKey = (GLProgram.renderingFlag(routing),
+                        texture.textureName if textureOn else 0,
+                        id(displayObj),
+                        material.diffuse.tobytes(), material.specular.tobytes(), material.ambient.tobytes(),
+                        material.highLight)
+
+    def __repr__(self):
+        return "RenderItem(" + type(self.displayObj).__name__ + ", " + str(self.routing) + ")"
+
+    def submit(self, shaderProg):
+        """
+        Set the uniforms and texture of this draw and draw the mesh
+
+        :type shaderProg: GLProgram
+        :rtype: None
+        """
+        shaderProg.setMat4("model", self.transformationMat)
+        shaderProg.setVec4("material.diffuse", self.material.diffuse)
+        shaderProg.setVec4("material.specular", self.material.specular)
+        shaderProg.setVec4("material.ambient", self.material.ambient)
+        shaderProg.setFloat("material.highlight", self.material.highLight)
+        shaderProg.setFragmentShaderRouting(self.routing)
+        shaderProg.use()
+        if self.textureOn:
+            self.texture.bind(shaderProg.getUniformLocation("textureImage"))
+        else:
+            self.texture.unbind(shaderProg.getUniformLocation("textureImage"))
+        self.displayObj.draw()
+
+
+class RenderQueue:
+    """
+    Properties:
+        items: list<RenderItem>, draws in the order they were added, or sorted after sort
+        sortOn: bool, submit sorts the items first, draws are submitted in tree order when off
+    """
+    items = None
+    sortOn = True
+
+    def __init__(self, sortOn=True):
+        """
+        :param sortOn: sort items by shader state before they are submitted
+        :type sortOn: bool
+        :rtype: None
+        """
+        self.items = []
+        self.sortOn = sortOn
+
+    def __len__(self):
+        return len(self.items)
+
+    def __iter__(self):
+        return iter(self.items)
+
+    def __repr__(self):
+        return "RenderQueue(" + str(len(self)) + " items)"
+
+    def clear(self):
+        """
+        Remove all items, call before the traversal of every frame
+        """
+        self.items.clear()
+
+    def append(self, transformationMat, displayObj, material, routing, texture, textureOn):
+        """
+        Add a draw at the end of the queue
+
+        :rtype: RenderItem
+        """
+        item = RenderItem(transformationMat, displayObj, material, routing, texture, textureOn)
+        self.items.append(item)
+        return item
+
+    def sort(self):
+        """
+        Sort items by shader state, keeping the tree order of items with the same state
+        """
+        self.items.sort(key=lambda item: item.sortKey)
+
+    def submit(self, shaderProg):
+        """
+        Draw all items
+
+        :type shaderProg: GLProgram
+        :rtype: None
+        """
+        if self.sortOn:
+            self.sort()
+        for item in self.items:
+            item.submit(shaderProg)
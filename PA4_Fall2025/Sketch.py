@@ -20,6 +20,8 @@ from Point import Point
 from CanvasBase import CanvasBase
 from GLProgram import GLProgram
 from GLBuffer import VAO, VBO, EBO, Texture
+from GLState import glState
+from RenderQueue import RenderQueue
 import GLUtility
 from SceneOne import SceneOne
 from SceneTwo import SceneTwo
@@ -104,6 +106,8 @@ class Sketch(CanvasBase):
     glutility = None
 
     frameCount = 0
+    renderQueue = None  # draws of the scene, refilled every frame
+    showGLState = False  # print GL calls issued and skipped by glState every frame, toggled with g
 
     lookAtPt = None
     upVector = None
@@ -147,6 +151,7 @@ class Sketch(CanvasBase):
         self.last_mouse_leftPosition = [0, 0]
         self.last_mouse_middlePosition = [0, 0]
         self.components = []
+        self.renderQueue = RenderQueue()
         self.backgroundColor = ColorType.BLUEGREEN
 
         # Image mode settings
@@ -249,7 +254,9 @@ class Sketch(CanvasBase):
         if not self.pauseScene and isinstance(self.scene, Scene):
             self.scene.animationUpdate()
         self.topLevelComponent.update(np.identity(4))
-        self.topLevelComponent.draw(self.shaderProg)
+        self.renderQueue.clear()
+        self.topLevelComponent.enqueue(self.renderQueue)
+        self.renderQueue.submit(self.shaderProg)
 
         # draw the axes on the canvas bottom right corner
         resultPt = self.unprojectCanvas(0.9 * self.size[0], 0.1 * self.size[1], 0.3)
@@ -258,6 +265,11 @@ class Sketch(CanvasBase):
 
         self.SwapBuffers()
 
+        issued, skipped = glState.endFrame()
+        if self.showGLState:
+            print(f"frame {self.frameCount}: {issued} GL calls issued, {skipped} skipped")
+        self.frameCount += 1
+
     def OnDestroy(self, event):
         """
         Window destroy event binding
@@ -424,6 +436,11 @@ class Sketch(CanvasBase):
             self.resetView()
         if chr(keycode) in "pP":
             self.pauseScene = not self.pauseScene
+        if chr(keycode) in "gG":
+            self.showGLState = not self.showGLState
+        if chr(keycode) in "qQ":
+            # compare with g: draws in tree order when sorting is off
+            self.renderQueue.sortOn = not self.renderQueue.sortOn
         if chr(keycode) in "iI":
             self.ImageModeOn = not self.ImageModeOn
             self.shaderProg.setBool("imageFlag", self.ImageModeOn)